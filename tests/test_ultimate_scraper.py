@@ -0,0 +1,722 @@
+import ultimate_all_in_one_scraper as scraper
+
+
+def _item(name, tooltip, **stored):
+    return dict({'name': name, 'description': tooltip}, **stored)
+
+
+BLOODTHIRSTER = _item('Bloodthirster', 'BloodthirsterLifesteal+55 Attack Damage+15% Physical Vamp3000Bloodthirster TIPS:x',
+                      cost=225)
+INFINITY_EDGE = _item('Infinity Edge', 'Infinity EdgeCrit damage+60 Attack Damage+25% Critical Rate3400Infinity Edge TIPS:x',
+                      cost=100, stats={'attack_damage': {'value': 1, 'type': 'flat'}})
+
+
+def test_build_totals_prefer_tooltip_over_stale_stored_cost():
+    totals = scraper.compute_build_totals({'core_items': [BLOODTHIRSTER, INFINITY_EDGE],
+                                           'example_build': [BLOODTHIRSTER, INFINITY_EDGE]})
+    assert totals['core_gold'] == 6400
+    assert totals['cumulative_gold'] == [3000, 6400]
+    assert totals['item_stats']['attack_damage'] == {'flat': 115}
+
+
+def test_build_totals_fall_back_to_stored_cost_without_tooltip():
+    totals = scraper.compute_build_totals({'core_items': [{'name': 'Mystery', 'cost': 1200}]})
+    assert totals['core_gold'] == 1200
+
+
+def test_merge_adds_tooltip_fields_to_stored_items(tmp_path):
+    stored_item = {'name': 'Bloodthirster', 'description': BLOODTHIRSTER['description'], 'cost': 225}
+    stored_spell = {'name': 'Flash', 'description': 'FlashTeleport a short distance.Cooldown:150s'}
+    stored = {'name': 'Caitlyn', 'lanes': ['Dragon'],
+              'builds': [{'lane': 'Dragon', 'core_items': [stored_item], 'summoner_spells': [stored_spell],
+                          'runes': {'keystone': {'name': 'Lethal Tempo'}}}]}
+    (tmp_path / 'caitlyn.json').write_text(scraper.json.dumps(stored))
+    fresh_item = dict(stored_item, cost=3000, stats={'attack_damage': {'value': 55, 'type': 'flat'}},
+                      passive='Lifesteal')
+    fresh = {'name': 'Caitlyn', 'lanes': ['Dragon'],
+             'builds': [{'lane': 'Dragon', 'core_items': [fresh_item], 'runes': {}}]}
+
+    assert scraper.merge_champion_data('Caitlyn', fresh, champions_dir=str(tmp_path))
+
+    build = scraper.json.loads((tmp_path / 'caitlyn.json').read_text())['builds'][0]
+    assert build['core_items'][0]['cost'] == 3000
+    assert build['core_items'][0]['stats'] == {'attack_damage': {'value': 55, 'type': 'flat'}}
+    assert build['core_items'][0]['passive'] == 'Lifesteal'
+    assert build['summoner_spells'][0]['cooldown'] == 150
+
+
+def test_section_cache_is_dropped_for_another_extractor_version(tmp_path):
+    state_file = tmp_path / 'section_fingerprints.json'
+    pages = {'https://example.com/caitlyn': {'stats': ['abc', {'tier': 'S'}]}}
+
+    state_file.write_text(scraper.json.dumps({'extractor_version': scraper.SECTION_EXTRACTOR_VERSION - 1,
+                                              'pages': pages}))
+    assert scraper.IncrementalPageParser(str(state_file)).state == {}
+
+    state_file.write_text(scraper.json.dumps(pages))
+    assert scraper.IncrementalPageParser(str(state_file)).state == {}
+
+    page_parser = scraper.IncrementalPageParser(str(state_file))
+    page_parser.state = pages
+    page_parser.save()
+    assert scraper.IncrementalPageParser(str(state_file)).state == pages
+
+
+def test_run_extractor_off_main_thread_keeps_slow_result(monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setattr(scraper, 'DEFAULT_EXTRACTOR_TIME_BUDGET', 0.01)
+    log = scraper.ExtractionLog()
+    results = []
+
+    def extract():
+        time.sleep(0.05)
+        return {'tier': 'S'}
+
+    worker = threading.Thread(target=lambda: results.append(scraper.run_extractor('test-section', extract, log)))
+    worker.start()
+    worker.join()
+
+    assert results == [{'tier': 'S'}]
+    assert log.failures == []
+    assert [entry['section'] for entry in log.slow] == ['test-section']
+
+
+def test_requeue_expired_fails_jobs_out_of_attempts(tmp_path):
+    queue = scraper.SQLiteWorkQueue(str(tmp_path / 'queue.sqlite3'), max_attempts=2)
+    queue.enqueue([('caitlyn', {'slug': 'caitlyn'})])
+    for attempt in range(2):
+        assert queue.lease('worker', lease_seconds=-1)['attempts'] == attempt + 1
+        queue.requeue_expired()
+
+    assert queue.lease('worker') is None
+    assert queue.counts().get('failed') == 1
+    queue.close()
+
+
+def test_queue_worker_records_the_scrape_exception(tmp_path, monkeypatch):
+    def fetch(url, session=None, **kwargs):
+        raise ConnectionError('connection reset')
+
+    monkeypatch.setattr(scraper, 'fetch_champion_page', fetch)
+    monkeypatch.setattr(scraper.SQLiteWorkQueue, 'acquire_rate_token', lambda self, rate: 0)
+    queue = scraper.SQLiteWorkQueue(str(tmp_path / 'queue.sqlite3'), max_attempts=1)
+    queue.enqueue([('caitlyn', {'slug': 'caitlyn', 'url': 'https://example.com/caitlyn'})])
+
+    assert scraper.run_queue_worker(queue, worker_id='worker') == 0
+    status, last_error = queue.db.execute("SELECT status, last_error FROM jobs").fetchone()
+    assert status == 'failed'
+    assert last_error == "ConnectionError('connection reset')"
+    queue.close()
+
+
+def test_scheduler_writes_refreshed_tier_and_core_build(tmp_path, monkeypatch):
+    champions_dir = tmp_path / 'champions'
+    champions_dir.mkdir()
+    stored = {'name': 'Caitlyn', 'tier': 'S', 'lanes': ['Dragon'],
+              'builds': [{'lane': 'Dragon', 'core_items': [{'name': 'Infinity Edge'}]}]}
+    (champions_dir / 'caitlyn.json').write_text(scraper.json.dumps(stored))
+    fresh = {'name': 'Caitlyn', 'tier': 'A', 'lanes': ['Dragon'],
+             'builds': [{'lane': 'Dragon', 'core_items': [{'name': 'Bloodthirster'}], 'runes': {}}]}
+    calls = []
+    monkeypatch.setattr(scraper, 'load_champion_urls', lambda: {'caitlyn': 'https://example.com/caitlyn'})
+    monkeypatch.setattr(scraper, 'scrape_champion_complete', lambda url, **kwargs: fresh)
+    monkeypatch.setattr(scraper, 'write_run_outputs', lambda champions_dir, **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(scraper.time, 'sleep', lambda seconds: None)
+
+    scraper.run_refresh_scheduler(max_refreshes=3, champions_dir=str(champions_dir),
+                                  state_file=str(tmp_path / 'scheduler_state.json'), outputs_every=2)
+
+    written = scraper.json.loads((champions_dir / 'caitlyn.json').read_text())
+    assert written['tier'] == 'A'
+    assert [item['name'] for item in written['builds'][0]['core_items']] == ['Bloodthirster']
+    # Outputs are rebuilt once for the batch of two refreshes; the third changed nothing
+    assert [call['changed_slugs'] for call in calls] == [['caitlyn']]
+
+
+def test_refresh_policies_keep_stored_values_for_empty_sections():
+    stored = {'tier': 'S', 'base_stats': {'health': 600}, 'builds': [{'lane': 'Dragon', 'runes': {'keystone': 'Fleet'}}]}
+    fresh = {'tier': '', 'base_stats': {'health': 0}, 'builds': [{'lane': 'Dragon', 'runes': {'primary': []}}]}
+
+    merged, _ = scraper.merge_records(stored, fresh, scraper.REFRESH_MERGE_POLICIES)
+
+    assert merged['tier'] == 'S'
+    assert merged['base_stats'] == {'health': 600}
+    assert merged['builds'][0]['runes'] == {'keystone': 'Fleet'}
+
+
+def _write_locales(locales_dir):
+    locales_dir.mkdir()
+    english = {'game_terms': {'Armor': 'Armor', 'Mana': 'Mana'},
+               'stats': {'armor': 'Armor', 'mana': 'Mana', 'health': 'Health'}}
+    mongolian = {'stats': {'armor': 'Хуяг', 'mana': 'Мана', 'health': 'Эрүүл мэнд'}, 'roles': {'mage': 'Шидтэн'}}
+    (locales_dir / 'en.json').write_text(scraper.json.dumps(english), encoding='utf-8')
+    (locales_dir / 'mn.json').write_text(scraper.json.dumps(mongolian, ensure_ascii=False), encoding='utf-8')
+
+
+def test_locale_stat_keeps_protected_game_terms(tmp_path):
+    _write_locales(tmp_path / 'locales')
+    terms = scraper.LocaleTerms('mn', str(tmp_path / 'locales'))
+
+    assert terms.stat('armor') == 'Armor'
+    assert terms.stat('mana') == 'Mana'
+    assert terms.stat('health') == 'Эрүүл мэнд'
+
+
+
+def test_locale_bundle_decodes_to_the_localized_champions(tmp_path):
+    _write_locales(tmp_path / 'locales')
+    terms = scraper.LocaleTerms('mn', str(tmp_path / 'locales'))
+    champions = {'ahri': {'name': 'Ahri', 'roles': ['Mage'], 'tier': 1, 'builds': [_build('Mid', 'Luden', 'Mana')]},
+                 'lux': {'name': 'Lux', 'roles': ['Mage', 'Support'], 'builds': []}}
+    localized = {slug: scraper.localize_champion(champion, terms) for slug, champion in champions.items()}
+
+    bundle = scraper.build_locale_bundle(champions, terms)
+
+    assert localized['ahri']['role_labels'] == ['Шидтэн']
+    assert scraper.decode_locale_bundle(bundle) == localized
+    assert bundle['strings'][0] == 'Mage'
+    assert bundle['stat_labels']['armor'] == 'Armor'
+
+    # Re-encoding against an existing table keeps its indices and appends the new strings
+    changed = dict(champions['lux'], name='Lux Crownguard')
+    appended = scraper.build_locale_bundle({'lux': changed}, terms, strings=bundle['strings'])
+    assert appended['strings'] == bundle['strings'] + ['Lux Crownguard']
+    assert scraper.decode_locale_bundle(appended) == {'lux': scraper.localize_champion(changed, terms)}
+
+
+def test_locale_bundles_rewrite_only_changed_champion_payloads(tmp_path):
+    import os
+
+    _write_locales(tmp_path / 'locales')
+    champions_dir = tmp_path / 'champions'
+    output_dir = tmp_path / 'locale_bundles'
+    champions = {'ahri': {'name': 'Ahri', 'roles': ['Mage'], 'builds': [_build('Mid', 'Luden')]},
+                 'garen': {'name': 'Garen', 'roles': ['Fighter']}}
+    _write_champions(champions_dir, champions)
+
+    def write(changed_slugs=None):
+        return scraper.write_locale_bundles(str(champions_dir), str(tmp_path / 'locales'), str(output_dir),
+                                            changed_slugs=changed_slugs)
+
+    def strings():
+        return scraper.read_locale_bundle('mn', str(output_dir), slugs=[])['strings']
+
+    assert len(write()) == 2
+    garen_payload = output_dir / 'mn' / 'champions' / 'garen.json'
+    os.utime(garen_payload, ns=(0, 0))
+    before = strings()
+
+    _write_champions(champions_dir, {'ahri': dict(champions['ahri'], tier=1, roles=['Mage', 'Assassin'])})
+    assert len(write(changed_slugs=['ahri'])) == 2
+
+    assert garen_payload.stat().st_mtime_ns == 0
+    assert strings() == before + ['Assassin']
+    terms = scraper.LocaleTerms('mn', str(tmp_path / 'locales'))
+    decoded = scraper.decode_locale_bundle(scraper.read_locale_bundle('mn', str(output_dir)))
+    assert decoded == {slug: scraper.localize_champion(scraper.load_champion_data(champions_dir / f'{slug}.json'), terms)
+                       for slug in ('ahri', 'garen')}
+
+    (champions_dir / 'garen.json').unlink()
+    write(changed_slugs=['garen'])
+    assert not garen_payload.exists()
+    assert list(scraper.decode_locale_bundle(scraper.read_locale_bundle('mn', str(output_dir)))) == ['ahri']
+
+
+class _FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b'<html></html>'
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def test_fetch_reports_each_attempt_without_the_retry_wait():
+    session = _FakeSession([_FakeResponse(429, {'Retry-After': '0.2'}), _FakeResponse(200)])
+    attempts = []
+
+    scraper.fetch_champion_page('https://example.com/caitlyn', session,
+                                on_response=lambda status, seconds: attempts.append((status, seconds)))
+
+    assert [status for status, _ in attempts] == [429, 200]
+    assert all(seconds < 0.1 for _, seconds in attempts)
+
+
+def test_adaptive_concurrency_counts_a_throttled_fetch_once():
+    controller = scraper.AdaptiveConcurrency(initial=2)
+    session = _FakeSession([_FakeResponse(429, {'Retry-After': '0'}), _FakeResponse(200)])
+
+    records = list(scraper.iter_scrape({'caitlyn': 'https://example.com/caitlyn'}, session=session,
+                                       concurrency=controller, parser=lambda html, url: {'name': 'Caitlyn'}))
+
+    assert records[0]['data'] == {'name': 'Caitlyn'}
+    assert controller.requests == 2
+    assert controller.errors == 1
+
+
+def test_streaming_slicer_output_does_not_depend_on_chunking():
+    page = ('<html><body><div class="nav">menu</div>\n<h1 class="firstscrean-main-title">Caitlyn</h1>\n'
+            '<div class="stats-block"><div class="circle">6</div><span>Damage</span></div>\n'
+            '<h2>Caitlyn Build</h2><div><div class="ico-holder3"><p>Long Sword</p></div></div>\n'
+            '<div class="footer">x</div></body></html>')
+    whole = scraper.StreamingPageSlicer()
+    whole.feed(page)
+    by_character = scraper.StreamingPageSlicer()
+    for character in page:
+        by_character.feed(character)
+
+    assert 'Caitlyn Build' in whole.document() and 'Long Sword' in whole.document()
+    assert 'menu' not in whole.document()
+    assert by_character.document() == whole.document()
+
+
+def test_patch_refresh_writes_new_tier_and_outputs_only_changed_champions(tmp_path, monkeypatch):
+    champions_dir = tmp_path / 'champions'
+    champions_dir.mkdir()
+    stored = {'caitlyn': {'name': 'Caitlyn', 'tier': 'S'}, 'jinx': {'name': 'Jinx', 'tier': 'A'}}
+    for slug, data in stored.items():
+        (champions_dir / f'{slug}.json').write_text(scraper.json.dumps(data))
+    notes = tmp_path / 'patch-notes-6-3.html'
+    notes.write_text('<h2>Champion Nerfs</h2><h3>Caitlyn</h3><h2>Champion Buffs</h2><h3>Jinx</h3>')
+    fresh = {'https://example.com/caitlyn': {'name': 'Caitlyn', 'tier': 'B'},
+             'https://example.com/jinx': None}
+    calls = []
+    monkeypatch.setattr(scraper, 'load_champion_urls', lambda: {slug: f'https://example.com/{slug}' for slug in stored})
+    monkeypatch.setattr(scraper, 'scrape_champion_complete', lambda url, **kwargs: fresh[url])
+    monkeypatch.setattr(scraper, 'write_run_outputs', lambda champions_dir, **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(scraper.ValidationReport, 'write', lambda self: 'report.json')
+    monkeypatch.setattr(scraper.time, 'sleep', lambda seconds: None)
+
+    scraper.run_patch_refresh(source=str(notes), champions_dir=str(champions_dir),
+                              state_file=str(tmp_path / 'scheduler_state.json'))
+
+    assert scraper.json.loads((champions_dir / 'caitlyn.json').read_text())['tier'] == 'B'
+    # Jinx's scrape failed, so outputs are only rebuilt for Caitlyn
+    assert calls == [{'changed_slugs': ['caitlyn'], 'patch': '6.3'}]
+
+
+def test_every_stored_champion_round_trips_through_records():
+    from pathlib import Path
+
+    champion_files = sorted((Path(__file__).resolve().parent.parent / 'champions_clean').glob('*.json'))
+    assert champion_files
+    for champion_file in champion_files:
+        data = scraper.json.loads(champion_file.read_text(encoding='utf-8'))
+        assert scraper.Champion.from_dict(data).to_dict() == data, champion_file.name
+
+
+def test_adaptive_concurrency_grows_after_a_clean_round():
+    controller = scraper.AdaptiveConcurrency(initial=2, maximum=8, target_p95=1.0)
+    controller.record(0.1)
+    assert controller.current == 2
+    controller.record(0.1)
+
+    assert controller.current == 3
+    assert controller.increases == 1
+
+
+def test_adaptive_concurrency_halves_on_throttling_and_on_slow_rounds():
+    throttled = scraper.AdaptiveConcurrency(initial=4, maximum=8)
+    throttled.record(0.1, congested=True)
+    assert throttled.current == 2
+
+    slow = scraper.AdaptiveConcurrency(initial=4, maximum=8, target_p95=1.0)
+    for _ in range(4):
+        slow.record(3.0)
+    assert slow.current == 2
+    assert slow.decreases == 1
+
+
+def test_adaptive_concurrency_cuts_at_most_once_per_round():
+    controller = scraper.AdaptiveConcurrency(initial=8, maximum=8)
+    for _ in range(3):
+        controller.record(0.1, congested=True)
+    assert controller.current == 4
+    assert controller.decreases == 1
+
+    # Once a full round (the new limit of 4 responses) has passed, congestion cuts again
+    controller.record(0.1, congested=True)
+    assert controller.current == 4
+    controller.record(0.1, congested=True)
+    assert controller.current == 2
+
+
+def test_page_deadline_leaves_out_later_sections_off_the_main_thread():
+    import threading
+    import time
+
+    log = scraper.ExtractionLog()
+    results = []
+    calls = []
+    deadline = time.perf_counter() - 1
+
+    worker = threading.Thread(target=lambda: results.append(
+        scraper.run_extractor('abilities', lambda: calls.append(1) or [], log, deadline)))
+    worker.start()
+    worker.join()
+
+    assert results == [scraper._MISSING]
+    assert calls == []
+    assert [failure['section'] for failure in log.failures] == ['abilities']
+    assert 'ExtractorTimeout' in log.failures[0]['error']
+
+
+def test_merge_reports_sections_left_out_of_the_page(tmp_path):
+    (tmp_path / 'caitlyn.json').write_text(scraper.json.dumps({'name': 'Caitlyn', 'abilities': [{'key': 'Q'}]}))
+    validation = scraper.ValidationReport()
+    failures = [{'section': 'abilities', 'error': 'ExtractorTimeout: over the 1s budget'}]
+
+    assert scraper.merge_champion_data('Caitlyn', {'name': 'Caitlyn', 'tier': 'S'}, champions_dir=str(tmp_path),
+                                       validation=validation, policies=scraper.REFRESH_MERGE_POLICIES,
+                                       extraction_failures=failures)
+
+    written = scraper.json.loads((tmp_path / 'caitlyn.json').read_text())
+    assert written['abilities'] == [{'key': 'Q'}]
+    assert validation.extraction_failures == {str(tmp_path / 'caitlyn.json'): failures}
+
+
+CHANGE_HISTORY_PAGE = (
+    '<html><body><section class="bg-very-light-gray3"><div class="content_block">'
+    '<div class="berrorsred"><b>NERFED 12 MAR 2026 (PATCH 6.3)</b><br>Q (Q)<br>Damage lowered</div>'
+    '<div class="berrors"><b>BUFFED 10 FEB 2026 (PATCH 6.2)</b><br>W (W)<br>Cooldown lowered</div>'
+    '<div class="berrorsred"><b>NERFED 08 JAN 2026 (PATCH 6.1)</b><br>E (E)<br>Range lowered</div>'
+    '</div></section></body></html>')
+STORED_HISTORY = [{'type': 'buff', 'date': '10 FEB 2026', 'patch': '6.2', 'changes': ['stored']},
+                  {'type': 'nerf', 'date': '08 JAN 2026', 'patch': '6.1', 'changes': ['stored']}]
+
+
+def test_batch_parse_stops_change_history_at_the_stored_head(monkeypatch):
+    parsed_blocks = []
+    parse_changes = scraper.parse_change_entry_changes
+    monkeypatch.setattr(scraper, 'parse_change_entry_changes',
+                        lambda change_div: parsed_blocks.append(1) or parse_changes(change_div))
+    page_url = 'https://example.com/caitlyn'
+
+    records = list(scraper.iter_scrape({'caitlyn': page_url}, concurrency=1, cache={page_url: CHANGE_HISTORY_PAGE},
+                                       change_history=lambda slug: STORED_HISTORY))
+
+    fresh_history = records[0]['data']['change_history']
+    assert len(parsed_blocks) == 1
+    assert [entry['patch'] for entry in fresh_history] == ['6.3', '6.2', '6.1']
+    assert fresh_history[1:] == STORED_HISTORY
+
+    merged, changes = scraper.merge_records({'name': 'Caitlyn', 'change_history': STORED_HISTORY},
+                                            {'change_history': fresh_history})
+    assert [entry['patch'] for entry in merged['change_history']] == ['6.3', '6.2', '6.1']
+    assert merged['change_history'][1:] == STORED_HISTORY
+    assert changes == {'change_history': 1}
+
+
+def _item_holder(name, tooltip):
+    return f'<div class="ico-holder3"><img data-src="/img/{name}.webp" alt="{name}"><span>{name}</span><p>{tooltip}</p></div>'
+
+
+ITEM_PAGE = ('<html><body>'
+             + _item_holder('Long Sword', 'Long Sword+12 Attack Damage350')
+             + _item_holder("Mercury's Treads", "Mercury's Treads+25 Magic Resist+40 Movement Speed900")
+             + _item_holder('Plated Steelcaps', 'Plated Steelcaps+20 Armor+40 Movement Speed900')
+             + _item_holder("Mercury's Treads", "Mercury's TreadsDuplicate900")
+             + _item_holder('Stasis Enchant', 'Stasis EnchantStasis (Active):Become invulnerable0')
+             + '</body></html>')
+
+
+def test_boots_fallback_matches_the_uncached_page_walk():
+    soup = scraper._beautiful_soup()(ITEM_PAGE, 'html.parser')
+    url = 'https://example.com/caitlyn'
+    preferred = scraper.LANE_PREFERRED_BOOTS_ENCHANTS['Dragon']
+
+    # What the fallback returned before the page item map existed: first holder of each preferred name
+    expected = []
+    for holder in soup.find_all('div', class_='ico-holder3'):
+        item = scraper.parse_item_holder(holder, url)
+        if item['name'] in preferred and item['name'] not in [entry['name'] for entry in expected]:
+            expected.append(item)
+
+    assert scraper.get_smart_boots_enchants_fallback(soup, url, 'Dragon') == expected[:4]
+
+
+def test_cached_items_are_independent_copies():
+    soup = scraper._beautiful_soup()(ITEM_PAGE, 'html.parser')
+    url = 'https://example.com/caitlyn'
+
+    first = scraper.extract_items_from_section(soup, url)
+    first[0]['stats']['attack_damage']['value'] = 999
+    scraper.get_smart_boots_enchants_fallback(soup, url, 'Dragon')[0]['stats'].clear()
+
+    again = scraper.extract_items_from_section(soup, url)
+    assert again[0]['stats'] == {'attack_damage': {'value': 12, 'type': 'flat'}}
+    assert again[1]['stats']
+
+
+def _stored_champion(slug='caitlyn'):
+    from pathlib import Path
+
+    champion_file = Path(__file__).resolve().parent.parent / 'champions_clean' / f'{slug}.json'
+    return scraper.json.loads(champion_file.read_text(encoding='utf-8'))
+
+
+def _without_core_items(champion):
+    champion = scraper.copy.deepcopy(champion)
+    champion['builds'][0]['core_items'] = []
+    return champion
+
+
+def test_write_path_refuses_new_critical_issues_and_skips_unchanged(tmp_path):
+    champion = _stored_champion()
+    champion_file = tmp_path / 'caitlyn.json'
+    champion_file.write_text(scraper.json.dumps(champion))
+    before = champion_file.read_text()
+
+    assert scraper.save_champion_data(champion_file, _without_core_items(champion), champion) == 'blocked'
+    assert champion_file.read_text() == before
+    assert scraper.save_champion_data(champion_file, scraper.copy.deepcopy(champion), champion) == 'unchanged'
+
+    # A champion that never had core items can still be updated
+    broken = _without_core_items(champion)
+    assert scraper.save_champion_data(champion_file, dict(broken, tier=5), broken) == 'written'
+
+
+def test_write_path_stops_writing_past_the_max_error_rate(tmp_path):
+    validation = scraper.ValidationReport(max_error_rate=0.5, min_checked=2)
+    champion = _stored_champion()
+    results = []
+    for slug in ('a', 'b'):
+        results.append(scraper.save_champion_data(tmp_path / f'{slug}.json', _without_core_items(champion),
+                                                  champion, validation=validation))
+    results.append(scraper.save_champion_data(tmp_path / 'c.json', dict(champion, tier=5), champion,
+                                              validation=validation))
+
+    assert results == ['blocked', 'blocked', 'blocked']
+    assert validation.threshold_exceeded()
+    assert not (tmp_path / 'c.json').exists()
+
+
+def test_changed_only_validation_rechecks_only_modified_files(tmp_path):
+    import os
+
+    champions_dir = tmp_path / 'champions'
+    champions_dir.mkdir()
+    for slug in ('caitlyn', 'jinx'):
+        (champions_dir / f'{slug}.json').write_text(scraper.json.dumps(_stored_champion(slug)))
+    cache_file = str(tmp_path / 'validation_cache.json')
+
+    def validate():
+        return scraper.validate_champion_files(str(champions_dir), workers=1, changed_only=True, cache_file=cache_file)
+
+    assert validate()[1] == 2
+    report, checked = validate()
+    assert checked == 0 and len(report.results) == 2
+
+    changed = champions_dir / 'jinx.json'
+    changed.write_text(scraper.json.dumps(_without_core_items(_stored_champion('jinx'))))
+    os.utime(changed, ns=(changed.stat().st_atime_ns, changed.stat().st_mtime_ns + 1_000_000_000))
+    report, checked = validate()
+    assert checked == 1
+    assert report.failing_files == {str(changed)}
+
+
+def _build(lane, *core_items, boots=()):
+    return {'lane': lane, 'core_items': [{'name': name} for name in core_items],
+            'boots_enchants': [{'name': name} for name in boots]}
+
+
+def test_merge_matches_builds_by_lane_when_the_page_reorders_them():
+    existing = {'builds': [_build('Mid', 'Luden'), _build('Baron', 'Sunfire')]}
+    fresh = {'builds': [_build('Baron', 'Titanic', boots=['Steelcaps']), _build('Mid', 'Rabadon', boots=['Mana'])]}
+
+    merged, _ = scraper.merge_records(existing, fresh)
+
+    assert [build['lane'] for build in merged['builds']] == ['Mid', 'Baron']
+    assert [build['boots_enchants'][0]['name'] for build in merged['builds']] == ['Mana', 'Steelcaps']
+    # prefer-non-empty keeps each lane's own stored core build
+    assert [build['core_items'][0]['name'] for build in merged['builds']] == ['Luden', 'Sunfire']
+
+
+def test_merge_gives_placeholder_lanes_the_remaining_fresh_builds_in_order():
+    existing = {'builds': [_build('Mid', 'Luden'), _build('Build_1'), _build('Build_2')]}
+    fresh = {'builds': [_build('Jungle', 'Eclipse'), _build('Mid', 'Rabadon'), _build('Baron', 'Sunfire')]}
+
+    merged, _ = scraper.merge_records(existing, fresh)
+
+    assert [build['lane'] for build in merged['builds']] == ['Mid', 'Build_1', 'Build_2']
+    assert [build['core_items'][0]['name'] for build in merged['builds']] == ['Luden', 'Eclipse', 'Sunfire']
+
+
+def test_merge_counts_changes_per_policy_path():
+    existing = {'name': 'Ahri', 'tier': 2, 'roles': [],
+                'builds': [_build('Mid', 'Luden', boots=['Mana']), _build('Support', 'Locket', boots=['Mana'])]}
+    fresh = {'name': 'Ahri', 'tier': 1, 'roles': ['Mage'], 'patch': '6.3',
+             'builds': [_build('Mid', 'Rabadon', boots=['Stasis']), _build('Support', 'Locket', boots=['Stasis']),
+                        _build('Jungle', 'Eclipse')]}
+
+    merged, changes = scraper.merge_records(existing, fresh)
+
+    assert merged['tier'] == 2
+    assert changes == {'roles': 1, 'patch': 1, 'builds[].boots_enchants': 2, 'builds': 1}
+
+
+def _write_champions(champions_dir, champions):
+    champions_dir.mkdir(exist_ok=True)
+    for slug, champion in champions.items():
+        (champions_dir / f'{slug}.json').write_text(scraper.json.dumps(champion))
+
+
+def test_aggregates_count_lane_usage_and_core_item_pairs(tmp_path):
+    keystone = {'runes': {'keystone': {'name': 'Electrocute'}}}
+    _write_champions(tmp_path, {
+        'ahri': {'name': 'Ahri', 'tier': 2, 'roles': ['Mage'],
+                 'builds': [dict(_build('Mid', 'Luden', 'Rabadon'), **keystone), _build('Jungle', 'Eclipse')]},
+        'lux': {'name': 'Lux', 'tier': 1, 'roles': ['Mage'],
+                'builds': [_build('Mid', 'Luden', 'Rabadon', boots=['Mana']), _build('Build_1', 'Luden')]}
+    })
+
+    aggregates = scraper.compute_aggregates(str(tmp_path))
+
+    assert (aggregates['champion_count'], aggregates['build_count']) == (2, 3)
+    assert aggregates['core_item_usage_by_lane'] == {
+        'Jungle': [{'name': 'Eclipse', 'count': 1, 'rate': 1.0}],
+        'Mid': [{'name': 'Luden', 'count': 2, 'rate': 1.0}, {'name': 'Rabadon', 'count': 2, 'rate': 1.0}]
+    }
+    assert aggregates['item_usage_by_lane']['Mid'][-1] == {'name': 'Mana', 'count': 1, 'rate': 0.5}
+    assert aggregates['rune_usage_by_lane']['Mid'] == [{'name': 'Electrocute', 'count': 1, 'rate': 0.5}]
+    assert aggregates['core_item_cooccurrence']['all'] == {'items': ['Luden', 'Rabadon'], 'counts': [[2, 2], [2, 2]]}
+    assert aggregates['core_item_cooccurrence']['by_lane']['Jungle'] == {'items': [], 'counts': []}
+    assert [entry['slug'] for entry in aggregates['tier_lists']['by_role']['Mage']] == ['lux', 'ahri']
+
+
+def test_search_index_matches_prefixes_and_rereads_only_changed_champions(tmp_path, monkeypatch):
+    champions_dir = tmp_path / 'champions'
+    _write_champions(champions_dir, {
+        'ahri': {'name': 'Ahri', 'roles': ['Mage'], 'abilities': [{'name': 'Orb of Deception'}],
+                 'builds': [_build('Mid', 'Luden')]},
+        'garen': {'name': 'Garen', 'roles': ['Fighter'], 'abilities': [{'name': 'Judgment'}]}
+    })
+    paths = {'index_file': str(tmp_path / 'index.json'), 'state_file': str(tmp_path / 'state.json')}
+
+    index = scraper.update_search_index(str(champions_dir), **paths)
+
+    assert [doc[:3] for doc in scraper.search_index_lookup(index, 'orb of dec')] == [['champion', 'ahri', 'Ahri']]
+    assert [doc[:3] for doc in scraper.search_index_lookup(index, 'lude')] == [['item', None, 'Luden']]
+    assert scraper.search_index_lookup(index, 'mage jud') == []
+
+    loaded = []
+    load_champion_data = scraper.load_champion_data
+    monkeypatch.setattr(scraper, 'load_champion_data', lambda filename: loaded.append(filename.stem) or load_champion_data(filename))
+    _write_champions(champions_dir, {'garen': {'name': 'Garen', 'roles': ['Fighter'], 'abilities': [{'name': 'Decisive Strike'}]}})
+
+    index = scraper.update_search_index(str(champions_dir), changed_slugs=['garen'], **paths)
+
+    assert loaded == ['garen']
+    assert scraper.search_index_lookup(index, 'judgment') == []
+    assert sorted(doc[1] for doc in scraper.search_index_lookup(index, 'dec')) == ['ahri', 'garen']
+    assert scraper.json.loads((tmp_path / 'index.json').read_text()) == index
+
+
+def test_snapshot_runs_share_unchanged_chunks_and_resolve_by_patch(tmp_path):
+    champions_dir = tmp_path / 'champions'
+    history_dir = str(tmp_path / 'history')
+    ahri = {'name': 'Ahri', 'tier': 2, 'patch': '6.2', 'abilities': [{'name': 'Orb of Deception'}],
+            'builds': [_build('Mid', 'Luden')]}
+    garen = {'name': 'Garen', 'tier': 3, 'patch': '6.2', 'abilities': [{'name': 'Judgment'}], 'builds': []}
+    _write_champions(champions_dir, {'ahri': ahri, 'garen': garen})
+
+    def chunk_count():
+        return len(list((tmp_path / 'history' / 'chunks').glob('*/*.json')))
+
+    first = scraper.record_snapshot_run(str(champions_dir), history_dir=history_dir)
+    assert chunk_count() == 5
+    assert scraper.record_snapshot_run(str(champions_dir), changed_slugs=['ahri', 'garen'], history_dir=history_dir) is None
+
+    patched = dict(ahri, tier=1, patch='6.3')
+    _write_champions(champions_dir, {'ahri': patched})
+    second = scraper.record_snapshot_run(str(champions_dir), changed_slugs=['ahri'], history_dir=history_dir)
+
+    # Only the summary changed; the abilities and build chunks are shared with the first run
+    assert chunk_count() == 6
+    runs = scraper.load_history_index(history_dir)['runs']
+    assert [(run['run'], run['patch'], run['changed']) for run in runs] == [
+        (first, '6.2', ['ahri', 'garen']), (second, '6.3', ['ahri'])]
+    assert scraper.load_snapshot('ahri', history_dir=history_dir) == patched
+    assert scraper.load_snapshot('ahri', patch='6.2', history_dir=history_dir) == ahri
+    assert scraper.load_snapshot('ahri', patches_ago=1, history_dir=history_dir) == ahri
+    assert scraper.load_snapshot('garen', run=second, history_dir=history_dir) == garen
+    assert scraper.load_snapshot('ahri', patches_ago=2, history_dir=history_dir) is None
+
+
+def test_shards_leave_unchanged_files_alone_and_drop_removed_lanes(tmp_path):
+    import os
+
+    ahri = {'name': 'Ahri', 'tier': 2, 'abilities': [{'name': 'Orb of Deception'}],
+            'builds': [_build('Mid', 'Luden'), _build('Support', 'Locket')]}
+    champion_dir = tmp_path / 'ahri'
+
+    assert scraper.write_champion_shards('ahri', ahri, str(tmp_path)) == 4
+    unchanged = [champion_dir / 'abilities.json', champion_dir / 'builds' / 'mid.json']
+    for shard_file in unchanged:
+        os.utime(shard_file, ns=(0, 0))
+
+    assert scraper.write_champion_shards('ahri', dict(ahri, tier=1, builds=ahri['builds'][:1]), str(tmp_path)) == 1
+
+    assert [shard_file.stat().st_mtime_ns for shard_file in unchanged] == [0, 0]
+    assert not (champion_dir / 'builds' / 'support.json').exists()
+    manifest = scraper.json.loads((champion_dir / 'manifest.json').read_text())
+    assert manifest['lanes'] == {'Mid': 'builds/mid.json'}
+    assert sorted(manifest['shards']) == ['abilities.json', 'builds/mid.json', 'summary.json']
+    assert scraper.json.loads((champion_dir / 'summary.json').read_text()) == {'name': 'Ahri', 'tier': 1}
+
+
+def test_bundle_round_trips_and_copies_unchanged_records(tmp_path):
+    champions_dir = tmp_path / 'champions'
+    bundle_file = str(tmp_path / 'champions.bundle')
+    champions = {slug: {'name': slug.title(), 'tier': tier, 'builds': [_build('Mid', 'Luden')]}
+                 for tier, slug in enumerate(('ahri', 'garen', 'lux'), start=1)}
+    _write_champions(champions_dir, champions)
+
+    assert scraper.write_champion_bundle(str(champions_dir), bundle_file) == 3
+    with scraper.ChampionBundle(bundle_file) as bundle:
+        assert list(bundle) == ['ahri', 'garen', 'lux']
+        assert dict(bundle.items()) == champions
+        assert bundle.get('zed') is None
+        garen = bytes(bundle.raw('garen'))
+
+    # Unchanged records are copied from the old bundle, not re-read from the champion files
+    (champions_dir / 'garen.json').write_text('{"name": "Garen", "tier": 5}')
+    _write_champions(champions_dir, {'lux': dict(champions['lux'], tier=1)})
+    scraper.write_champion_bundle(str(champions_dir), bundle_file, changed_slugs=['lux'])
+
+    with scraper.ChampionBundle(bundle_file, records=True) as bundle:
+        assert bytes(bundle.raw('garen')) == garen
+        assert bundle['garen'].tier == 2
+        assert bundle['lux'].tier == 1
+        assert bundle['lux'].builds[0].core_items[0].name == 'Luden'
+
+
+def test_bundle_cache_evicts_the_least_recently_used_champion(tmp_path):
+    champions_dir = tmp_path / 'champions'
+    bundle_file = str(tmp_path / 'champions.bundle')
+    _write_champions(champions_dir, {slug: {'name': slug.title()} for slug in ('ahri', 'garen', 'lux')})
+    scraper.write_champion_bundle(str(champions_dir), bundle_file)
+
+    with scraper.ChampionBundle(bundle_file, cache_size=2) as bundle:
+        ahri = bundle['ahri']
+        bundle['garen']
+        assert bundle['ahri'] is ahri
+        bundle['lux']
+        assert list(bundle._cache) == ['ahri', 'lux']
+        assert bundle['ahri'] is ahri
+        assert bundle['garen'] == {'name': 'Garen'}
+        assert list(bundle._cache) == ['ahri', 'garen']
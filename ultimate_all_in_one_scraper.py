@@ -10,22 +10,45 @@ This is THE FINAL SCRIPT that does everything correctly:
 - Handles all champions in batch
 """
 
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
 from urllib.parse import urljoin
 import time
 from pathlib import Path
 import os
+import argparse
+import copy
+import functools
+import heapq
+import itertools
+import sys
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import datetime
+from typing import Dict, List, Optional
 
-def load_champion_urls():
+# bs4 and requests are heavy; they are imported on first use so that
+# --help and the light subcommands start instantly
+def _requests():
+    """Lazily import requests"""
+    import requests
+    return requests
+
+def _beautiful_soup():
+    """Lazily import BeautifulSoup"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def load_champion_urls(mapping_file='champion_url_mapping.json'):
     """Load champion URLs from the mapping file"""
     try:
-        with open('champion_url_mapping.json', 'r', encoding='utf-8') as f:
+        with open(mapping_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
-        print("Error: champion_url_mapping.json not found.")
+        print(f"Error: {mapping_file} not found.")
         return {}
 
 def load_champion_data(filename):
@@ -36,6 +59,204 @@ def load_champion_data(filename):
     except Exception as e:
         return None
 
+# Typed compact record model
+# Slotted dataclasses for champion output. Every field defaults to None, which
+# means "absent" so records round-trip to exactly the JSON the extractors emit;
+# keys the model doesn't know about are kept in `extra`. Repeated strings (item
+# tooltips, image URLs) are interned so a batch holds one copy of each.
+
+def _intern(value):
+    """Intern strings so identical tooltips/URLs share memory across records"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _Record:
+    """Shared dict/JSON codec for the slotted record classes"""
+    __slots__ = ()
+    
+    # field name -> record class for nested records, or [record class] for lists of them
+    _nested = {}
+    
+    @classmethod
+    def from_dict(cls, data):
+        if data is None:
+            return None
+        values = {}
+        extra = None
+        known = cls._field_names()
+        for key, value in data.items():
+            if key not in known:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+                continue
+            nested = cls._nested.get(key)
+            if nested is None:
+                values[key] = _intern(value)
+            elif isinstance(nested, list):
+                values[key] = [nested[0].from_dict(element) for element in value] if isinstance(value, list) else value
+            else:
+                values[key] = nested.from_dict(value) if isinstance(value, dict) else value
+        record = cls(**values)
+        record.extra = extra
+        return record
+    
+    @classmethod
+    def _field_names(cls):
+        names = cls.__dict__.get('_field_name_cache')
+        if names is None:
+            names = frozenset(f.name for f in dataclass_fields(cls) if f.name != 'extra')
+            cls._field_name_cache = names
+        return names
+    
+    def to_dict(self):
+        data = {}
+        for f in dataclass_fields(self):
+            if f.name == 'extra':
+                continue
+            value = getattr(self, f.name)
+            if value is None:
+                continue
+            if isinstance(value, _Record):
+                value = value.to_dict()
+            elif isinstance(value, list) and value and isinstance(value[0], _Record):
+                value = [element.to_dict() for element in value]
+            data[f.name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+@dataclass(slots=True)
+class Item(_Record):
+    image: Optional[str] = None
+    alt: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    cost: Optional[int] = None
+    stats: Optional[Dict[str, dict]] = None
+    passive: Optional[str] = None
+    active: Optional[str] = None
+    cooldown: Optional[float] = None
+    type: Optional[str] = None
+    extra: Optional[dict] = None
+
+@dataclass(slots=True)
+class Rune(_Record):
+    image: Optional[str] = None
+    alt: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    stats: Optional[Dict[str, dict]] = None
+    passive: Optional[str] = None
+    active: Optional[str] = None
+    cooldown: Optional[float] = None
+    extra: Optional[dict] = None
+
+@dataclass(slots=True)
+class Spell(_Record):
+    image: Optional[str] = None
+    alt: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    passive: Optional[str] = None
+    active: Optional[str] = None
+    cooldown: Optional[float] = None
+    extra: Optional[dict] = None
+
+@dataclass(slots=True)
+class Ability(_Record):
+    image: Optional[str] = None
+    alt_text: Optional[str] = None
+    key: Optional[str] = None
+    description: Optional[str] = None
+    name: Optional[str] = None
+    extra: Optional[dict] = None
+
+@dataclass(slots=True)
+class RunePage(_Record):
+    primary: Optional[List[Rune]] = None
+    secondary: Optional[List[Rune]] = None
+    keystone: Optional[Rune] = None
+    extra: Optional[dict] = None
+    
+    _nested = {'primary': [Rune], 'secondary': [Rune], 'keystone': Rune}
+
+@dataclass(slots=True)
+class SituationalItems(_Record):
+    purpose: Optional[str] = None
+    items: Optional[List[Item]] = None
+    tips: Optional[str] = None
+    extra: Optional[dict] = None
+    
+    _nested = {'items': [Item]}
+
+@dataclass(slots=True)
+class SituationalRunes(_Record):
+    purpose: Optional[str] = None
+    runes: Optional[List[Rune]] = None
+    tips: Optional[str] = None
+    extra: Optional[dict] = None
+    
+    _nested = {'runes': [Rune]}
+
+@dataclass(slots=True)
+class Build(_Record):
+    lane: Optional[str] = None
+    start_items: Optional[List[Item]] = None
+    core_items: Optional[List[Item]] = None
+    boots_enchants: Optional[List[Item]] = None
+    example_build: Optional[List[Item]] = None
+    situational_items: Optional[List[SituationalItems]] = None
+    summoner_spells: Optional[List[Spell]] = None
+    runes: Optional[RunePage] = None
+    situational_runes: Optional[List[SituationalRunes]] = None
+    totals: Optional[dict] = None
+    extra: Optional[dict] = None
+    
+    _nested = {
+        'start_items': [Item], 'core_items': [Item], 'boots_enchants': [Item], 'example_build': [Item],
+        'situational_items': [SituationalItems], 'summoner_spells': [Spell], 'runes': RunePage,
+        'situational_runes': [SituationalRunes]
+    }
+
+@dataclass(slots=True)
+class ChangeEntry(_Record):
+    type: Optional[str] = None
+    date: Optional[str] = None
+    patch: Optional[str] = None
+    changes: Optional[list] = None
+    extra: Optional[dict] = None
+
+@dataclass(slots=True)
+class Champion(_Record):
+    name: Optional[str] = None
+    roles: Optional[List[str]] = None
+    image: Optional[str] = None
+    tier: Optional[int] = None
+    balance_status: Optional[str] = None
+    stats: Optional[Dict[str, int]] = None
+    base_stats: Optional[Dict[str, float]] = None
+    base_stats_growth: Optional[Dict[str, float]] = None
+    abilities: Optional[List[Ability]] = None
+    lanes: Optional[List[str]] = None
+    builds: Optional[List[Build]] = None
+    change_history: Optional[List[ChangeEntry]] = None
+    patch: Optional[str] = None
+    extra: Optional[dict] = None
+    
+    _nested = {'abilities': [Ability], 'builds': [Build], 'change_history': [ChangeEntry]}
+
+def champion_from_json(text):
+    """Decode a champion JSON document into a Champion record"""
+    return Champion.from_dict(json.loads(text))
+
+def load_champion_records(champions_dir='champions_clean'):
+    """Yield (slug, Champion) for every champion file"""
+    for champion_file in sorted(Path(champions_dir).glob('*.json')):
+        try:
+            yield champion_file.stem, champion_from_json(champion_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+
 def extract_champion_basic_info(soup, url):
     """Extract basic champion information"""
     champion_data = {}
@@ -48,7 +269,7 @@ def extract_champion_basic_info(soup, url):
             champion_data['name'] = span_element.get_text(strip=True)
         else:
             title_text = title_element.get_text(strip=True)
-            match = re.search(r'Wild Rift:\s*([A-Z\s&\'\-]+?)(?:\s+Build Guide|\s*$)', title_text)
+            match = re.search(r'Wild Rift:\s*([A-Z\s&\'\-]{1,60}?)(?:\s+Build Guide|\s*$)', title_text)
             if match:
                 champion_data['name'] = match.group(1).strip()
     
@@ -113,12 +334,39 @@ def extract_champion_image_and_stats(soup, url, champion_data):
             stats[title] = percentage
     champion_data['stats'] = stats
     
-    # Extract base stats
-    base_stats = extract_base_stats(soup)
-    champion_data['base_stats'] = base_stats
-    
     return champion_data
 
+BASE_STAT_SMILES = {
+    'attack_damage': 'attackdamage',
+    'health': 'heal',
+    'health_regen': 'healthregeneration',
+    'attack_speed': 'attackspeed',
+    'mana': 'mana',
+    'mana_regen': 'mpreg',
+    'movement_speed': 'movementspeed',
+    'armor': 'armor',
+    'magic_resist': 'magicresistance'
+}
+# Shown as whole numbers on the page
+INTEGER_BASE_STATS = ('health', 'mana', 'movement_speed')
+
+def extract_base_stats_growth(soup):
+    """Extract per-level growth, shown as "(N)" after each value in the stats table"""
+    growth = {}
+    stats_block = soup.find('div', class_='stats-block')
+    table = stats_block.find('table') if stats_block else None
+    if not table:
+        return growth
+    
+    table_html = str(table)
+    for stat_name, smile in BASE_STAT_SMILES.items():
+        # The gap may not run into the next stat's cell, whose growth would be picked up instead
+        match = re.search(rf'<!--smile:{smile}-->(?:(?!<!--smile:).){{0,400}}?<!--/smile-->\s*\d+(?:\.\d+)?\s*\(\s*\+?(\d+(?:\.\d+)?)\s*%?\s*\)',
+                          table_html, re.IGNORECASE | re.DOTALL)
+        if match:
+            growth[stat_name] = float(match.group(1))
+    return growth
+
 def extract_base_stats(soup):
     """Extract champion base stats from the stats table"""
     base_stats = {}
@@ -132,23 +380,14 @@ def extract_base_stats(soup):
             
             # Extract stats using specific patterns for the wr-meta format
             # Pattern: <!--smile:statname-->...<!--/smile--> NUMBER (GROWTH)
-            stat_patterns = {
-                'attack_damage': r'<!--smile:attackdamage-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)',
-                'health': r'<!--smile:heal-->.*?<!--/smile-->\s*(\d+)',
-                'health_regen': r'<!--smile:healthregeneration-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)',
-                'attack_speed': r'<!--smile:attackspeed-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)',
-                'mana': r'<!--smile:mana-->.*?<!--/smile-->\s*(\d+)',
-                'mana_regen': r'<!--smile:mpreg-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)',
-                'movement_speed': r'<!--smile:movementspeed-->.*?<!--/smile-->\s*(\d+)',
-                'armor': r'<!--smile:armor-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)',
-                'magic_resist': r'<!--smile:magicresistance-->.*?<!--/smile-->\s*(\d+(?:\.\d+)?)'
-            }
-            
-            for stat_name, pattern in stat_patterns.items():
-                match = re.search(pattern, table_html, re.IGNORECASE | re.DOTALL)
+            # (the gap is bounded so unclosed smile comments cannot make this quadratic)
+            for stat_name, smile in BASE_STAT_SMILES.items():
+                number = r'(\d+)' if stat_name in INTEGER_BASE_STATS else r'(\d+(?:\.\d+)?)'
+                match = re.search(rf'<!--smile:{smile}-->.{{0,400}}?<!--/smile-->\s*{number}',
+                                  table_html, re.IGNORECASE | re.DOTALL)
                 if match:
                     try:
-                        if stat_name in ['health', 'mana', 'movement_speed']:
+                        if stat_name in INTEGER_BASE_STATS:
                             base_stats[stat_name] = int(match.group(1))
                         else:
                             base_stats[stat_name] = float(match.group(1))
@@ -168,50 +407,18 @@ def extract_base_stats(soup):
                     cell_text = cell.get_text(strip=True)
                     
                     # Look for emoji images with alt attributes
-                    if 'alt="attackdamage"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['attack_damage'] = float(match.group(1))
-                    
-                    elif 'alt="heal"' in cell_html:
-                        match = re.search(r'(\d+)', cell_text)
-                        if match:
-                            base_stats['health'] = int(match.group(1))
-                    
-                    elif 'alt="healthregeneration"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['health_regen'] = float(match.group(1))
-                    
-                    elif 'alt="attackspeed"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['attack_speed'] = float(match.group(1))
-                    
-                    elif 'alt="mana"' in cell_html:
-                        match = re.search(r'(\d+)', cell_text)
-                        if match:
-                            base_stats['mana'] = int(match.group(1))
-                    
-                    elif 'alt="mpreg"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['mana_regen'] = float(match.group(1))
-                    
-                    elif 'alt="movementspeed"' in cell_html:
-                        match = re.search(r'(\d+)', cell_text)
-                        if match:
-                            base_stats['movement_speed'] = int(match.group(1))
-                    
-                    elif 'alt="armor"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['armor'] = float(match.group(1))
-                    
-                    elif 'alt="magicresistance"' in cell_html:
-                        match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
-                        if match:
-                            base_stats['magic_resist'] = float(match.group(1))
+                    for stat_name, smile in BASE_STAT_SMILES.items():
+                        if f'alt="{smile}"' not in cell_html:
+                            continue
+                        if stat_name in INTEGER_BASE_STATS:
+                            match = re.search(r'(\d+)', cell_text)
+                            if match:
+                                base_stats[stat_name] = int(match.group(1))
+                        else:
+                            match = re.search(r'(\d+(?:\.\d+)?)', cell_text)
+                            if match:
+                                base_stats[stat_name] = float(match.group(1))
+                        break
     
     # Method 3: Fallback - look for any table with stats
     if not base_stats:
@@ -221,7 +428,7 @@ def extract_base_stats(soup):
             
             # Look for number patterns that might be stats
             # Format: "52 (3.6)" where 52 is base stat and 3.6 is growth
-            stat_matches = re.findall(r'(\d+(?:\.\d+)?)\s*\([^)]+\)', table_text)
+            stat_matches = re.findall(r'(\d+(?:\.\d+)?)\s*\([^)]{1,20}\)', table_text)
             
             if len(stat_matches) >= 6:  # Should have at least 6 base stats
                 try:
@@ -270,7 +477,7 @@ def extract_abilities(soup, url, champion_data):
             ability['description'] = description_p.get_text(strip=True)
             
             # Extract ability name from description
-            name_match = re.search(r'\(([^)]+)\)\s*([A-Z\s/]+)', ability['description'])
+            name_match = re.search(r'\(([^)]{1,40})\)\s*([A-Z\s/]+)', ability['description'])
             if name_match:
                 ability['name'] = name_match.group(2).strip()
         
@@ -328,10 +535,10 @@ def extract_lanes_improved(soup, url):
     
     return lanes
 
-def extract_complete_builds(soup, url):
-    """Extract complete build data with lane-specific boots/enchants"""
+def find_build_headers(soup):
+    """(header, lane) for the first build header of each lane, in page order"""
     lanes = []
-    builds = []
+    headers = []
     
     # Find all build headers
     build_headers = soup.find_all('h2')
@@ -358,18 +565,27 @@ def extract_complete_builds(soup, url):
             
             if lane and lane not in lanes:
                 lanes.append(lane)
-                
-                # Extract the complete build for this lane
-                build = extract_single_build_complete(header, lane, soup, url)
-                if build:
-                    builds.append(build)
+                headers.append((header, lane))
     
-    return lanes, builds
+    return headers
 
-def extract_single_build_complete(header, lane, soup, url):
-    """Extract complete build data for a single lane"""
-    build = {'lane': lane}
+def extract_complete_builds(soup, url):
+    """Extract complete build data with lane-specific boots/enchants"""
+    lanes = []
+    builds = []
+    
+    for header, lane in find_build_headers(soup):
+        lanes.append(lane)
+        
+        # Extract the complete build for this lane
+        build = extract_single_build_complete(header, lane, soup, url)
+        if build:
+            builds.append(build)
     
+    return lanes, builds
+
+def find_build_content_section(header):
+    """The container holding a lane's build: the first div after its header"""
     # Find the content section after this header
     content_section = None
     current = header.find_next_sibling()
@@ -388,13 +604,26 @@ def extract_single_build_complete(header, lane, soup, url):
         if parent_section:
             content_section = parent_section
     
+    return content_section
+
+def extract_lane_build_items(content_section, url, lane):
+    """Item sections of one lane build (everything that lives inside the lane block)"""
+    return {
+        'start_items': extract_start_items(content_section, url),
+        'core_items': extract_core_items(content_section, url),
+        'boots_enchants': extract_lane_specific_boots_enchants(content_section, url, lane),
+        'example_build': extract_example_build(content_section, url),
+        'situational_items': extract_situational_items(content_section, url)
+    }
+
+def extract_single_build_complete(header, lane, soup, url):
+    """Extract complete build data for a single lane"""
+    build = {'lane': lane}
+    content_section = find_build_content_section(header)
+    
     if content_section:
         # Extract ALL build components
-        build['start_items'] = extract_start_items(content_section, url)
-        build['core_items'] = extract_core_items(content_section, url)
-        build['boots_enchants'] = extract_lane_specific_boots_enchants(content_section, url, lane)
-        build['example_build'] = extract_example_build(content_section, url)
-        build['situational_items'] = extract_situational_items(content_section, url)
+        build.update(extract_lane_build_items(content_section, url, lane))
         build['summoner_spells'] = extract_summoner_spells(soup, url)
         build['runes'] = extract_runes_data(soup, url)
         build['situational_runes'] = extract_situational_runes(soup, url)
@@ -475,66 +704,36 @@ def extract_lane_specific_boots_enchants(content_section, url, lane):
                     boots_enchants.extend(items)
                     break
     
-    # Method 2: If no lane-specific boots found, use smart fallback
+    # Method 2: If no lane-specific boots found, use smart fallback (shares the page item map)
     if not boots_enchants:
-        full_soup = content_section.find_parent('html') or content_section
-        boots_enchants = get_smart_boots_enchants_fallback(full_soup, url, lane)
+        boots_enchants = get_smart_boots_enchants_fallback(content_section, url, lane)
     
     return boots_enchants
 
+# Lane-appropriate boots/enchants used when a lane has no "Boots & Enchant" block
+LANE_PREFERRED_BOOTS_ENCHANTS = {
+    'Baron': ['Plated Steelcaps', 'Mercury\'s Treads', 'Stoneplate Enchant', 'Protobelt Enchant'],
+    'Support': ['Plated Steelcaps', 'Mercury\'s Treads', 'Stoneplate Enchant', 'Protobelt Enchant'],
+    'Mid': ['Boots of Mana', 'Mercury\'s Treads', 'Stasis Enchant', 'Protobelt Enchant'],
+    'Dragon': ['Plated Steelcaps', 'Mercury\'s Treads', 'Quicksilver Enchant', 'Stasis Enchant'],
+    'Jungle': ['Plated Steelcaps', 'Mercury\'s Treads', 'Quicksilver Enchant', 'Stasis Enchant']
+}
+DEFAULT_PREFERRED_BOOTS_ENCHANTS = ['Plated Steelcaps', 'Mercury\'s Treads', 'Stoneplate Enchant', 'Stasis Enchant']
+MAX_FALLBACK_BOOTS_ENCHANTS = 4
+
 def get_smart_boots_enchants_fallback(soup, url, lane):
     """Smart fallback for boots/enchants based on lane"""
     boots_enchants = []
-    found_items = set()
-    
-    # Define lane-appropriate items
-    if lane in ['Baron', 'Support']:
-        preferred_items = ['Plated Steelcaps', 'Mercury\'s Treads', 'Stoneplate Enchant', 'Protobelt Enchant']
-    elif lane == 'Mid':
-        preferred_items = ['Boots of Mana', 'Mercury\'s Treads', 'Stasis Enchant', 'Protobelt Enchant']
-    elif lane in ['Dragon', 'Jungle']:
-        preferred_items = ['Plated Steelcaps', 'Mercury\'s Treads', 'Quicksilver Enchant', 'Stasis Enchant']
-    else:
-        preferred_items = ['Plated Steelcaps', 'Mercury\'s Treads', 'Stoneplate Enchant', 'Stasis Enchant']
-    
-    # Find these items in the document
-    all_item_holders = soup.find_all('div', class_='ico-holder3')
-    for holder in all_item_holders:
-        span = holder.find('span')
-        if span:
-            item_name = span.get_text(strip=True)
-            if item_name in preferred_items and item_name not in found_items:
-                found_items.add(item_name)
-                
-                item = {}
-                img = holder.find('img')
-                if img:
-                    img_src = img.get('data-src') or img.get('src')
-                    if img_src and not img_src.startswith('data:'):
-                        item['image'] = urljoin(url, img_src)
-                    item['alt'] = img.get('alt', '')
-                
-                item['name'] = item_name
-                
-                tooltip = holder.find('p')
-                if tooltip:
-                    tooltip_text = tooltip.get_text(strip=True)
-                    item['description'] = tooltip_text
-                    
-                    cost_match = re.search(r'(?<![+\-])\b(\d{3,})\b(?![%\s]*[A-Za-z])', tooltip_text)
-                    if cost_match:
-                        try:
-                            item['cost'] = int(cost_match.group(1))
-                        except:
-                            pass
-                
-                if 'Enchant' in item_name:
-                    item['type'] = 'enchant'
-                
-                boots_enchants.append(item)
-                
-                if len(boots_enchants) >= 4:
-                    break
+    preferred_items = set(LANE_PREFERRED_BOOTS_ENCHANTS.get(lane, DEFAULT_PREFERRED_BOOTS_ENCHANTS))
+    
+    # Find these items in the document (first occurrence of each name, in page order)
+    item_map = get_page_item_map(soup, url)
+    for item_name, item in item_map['by_name'].items():
+        if item_name in preferred_items:
+            boots_enchants.append(copy.deepcopy(item))
+            
+            if len(boots_enchants) >= MAX_FALLBACK_BOOTS_ENCHANTS:
+                break
     
     return boots_enchants
 
@@ -553,47 +752,202 @@ def extract_example_build(content_section, url):
     
     return example_build
 
+# Tooltip grammar (items, runes, summoner spells). Tooltip text is the flattened
+# markup, so parts run together: <name><summary><+N stat>...<Heading:>effect...<cost><name> TIPS:...
+# Stat keys follow items/*.json; flat armor penetration is lethality.
+TOOLTIP_STAT_LABELS = {
+    'Attack Damage': 'attack_damage',
+    'Ability Power': 'ability_power',
+    'Ability Haste': 'ability_haste',
+    'Armor Penetration': 'armor_penetration',
+    'Magic Penetration': 'magic_penetration',
+    'Armor': 'armor',
+    'Magic Resistance': 'magic_resistance',
+    'Magic Resist': 'magic_resistance',
+    'Attack Speed': 'attack_speed',
+    'Max Health': 'health',
+    'Health': 'health',
+    'Max Mana': 'mana',
+    'Mana': 'mana',
+    'Move Speed': 'movement_speed',
+    'Movement Speed': 'movement_speed',
+    'Critical Rate': 'critical_strike',
+    'Crit Rate': 'critical_strike',
+    'Critical Strike': 'critical_strike',
+    'Lethality': 'lethality',
+    'Health Regen': 'health_regen',
+    'Mana Regeneration': 'mana_regen',
+    'Mana Regen': 'mana_regen',
+    'Physical Vamp': 'physical_vamp',
+    'Omnivamp': 'omnivamp',
+    'Heal and Shield Strength': 'heal_and_shield_power',
+    'Tenacity': 'tenacity'
+}
+TOOLTIP_FLAT_STAT_KEYS = {'armor_penetration': 'lethality'}
+TOOLTIP_STAT_PATTERN = re.compile(
+    r'\+\s*(\d+(?:\.\d+)?)(%?)\s*('
+    + '|'.join(re.escape(label) for label in sorted(TOOLTIP_STAT_LABELS, key=len, reverse=True)) + ')')
+TOOLTIP_STAT_GAP_PATTERN = re.compile(r'[\s.,]*')
+# An effect heading ("Lifeline:", "Stasis (Active):") starts a capitalized run after a word or sentence end
+TOOLTIP_HEADING_PATTERN = re.compile(
+    r"(?:(?<=[a-z.)%\d\s])|^)([A-Z][a-z'’\-]*(?: [A-Z][a-z'’\-]*){0,3}(?:\s*\((?:Active|Passive|Unique)\))?):")
+# The price sits right before the trailing "<name> TIPS:" (free items show 0); without that tail it must look like a price
+TOOLTIP_COST_PATTERN = re.compile(r'(\d{1,5})\s*$')
+TOOLTIP_UNANCHORED_COST_PATTERN = re.compile(r'(?<![\d,/+\-])(\d{3,5})$')
+TOOLTIP_COOLDOWN_PATTERN = re.compile(r'Cooldown:\s*(\d+(?:\.\d+)?)\s*s')
+TOOLTIP_EFFECT_COOLDOWN_PATTERN = re.compile(r'\((\d+(?:\.\d+)?)\s*s\s+Cooldown\)')
+
+def _tooltip_number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+@functools.lru_cache(maxsize=4096)
+def _parse_tooltip_cached(name, text):
+    body = text
+    tips_at = body.find('TIPS:')
+    if tips_at >= 0:
+        body = body[:tips_at]
+    body = body.rstrip()
+    anchored = tips_at >= 0
+    if name and body.endswith(name):
+        body = body[:-len(name)].rstrip()
+        anchored = True
+    if name and body.startswith(name):
+        body = body[len(name):]
+    
+    cost = None
+    cost_match = (TOOLTIP_COST_PATTERN if anchored else TOOLTIP_UNANCHORED_COST_PATTERN).search(body)
+    if cost_match:
+        cost = int(cost_match.group(1))
+        body = body[:cost_match.start()]
+    
+    # Stats: the first unbroken run of "+N Label" tokens, unless an effect heading precedes it
+    stats = []
+    effects_start = 0
+    run_end = None
+    for match in TOOLTIP_STAT_PATTERN.finditer(body):
+        if run_end is None:
+            if TOOLTIP_HEADING_PATTERN.search(body, 0, match.start()):
+                break
+        elif not TOOLTIP_STAT_GAP_PATTERN.fullmatch(body, run_end, match.start()):
+            break
+        key = TOOLTIP_STAT_LABELS[match.group(3)]
+        stat_type = 'percentage' if match.group(2) else 'flat'
+        if stat_type == 'flat':
+            key = TOOLTIP_FLAT_STAT_KEYS.get(key, key)
+        stats.append((key, _tooltip_number(match.group(1)), stat_type))
+        run_end = effects_start = match.end()
+    
+    cooldown_match = TOOLTIP_COOLDOWN_PATTERN.search(body)
+    cooldown = _tooltip_number(cooldown_match.group(1)) if cooldown_match else None
+    
+    passive, active = [], []
+    headings = list(TOOLTIP_HEADING_PATTERN.finditer(body, effects_start))
+    for index, heading in enumerate(headings):
+        label = heading.group(1)
+        if label == 'Cooldown':
+            continue
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(body)
+        effect = body[heading.end():end].strip()
+        if '(Active)' in label or label == 'Active':
+            active.append(f"{label}: {effect}")
+            effect_cooldown = TOOLTIP_EFFECT_COOLDOWN_PATTERN.search(effect)
+            if cooldown is None and effect_cooldown:
+                cooldown = _tooltip_number(effect_cooldown.group(1))
+        else:
+            passive.append(f"{label}: {effect}")
+    
+    return tuple(stats), cost, '\n'.join(passive), '\n'.join(active), cooldown
+
+def parse_tooltip(name, text):
+    """Structured fields of an item/rune/spell tooltip: stats, cost, passive, active, cooldown
+    
+    Only fields found in the text are returned. Each distinct tooltip is parsed
+    once per process; callers get fresh dicts.
+    """
+    stats, cost, passive, active, cooldown = _parse_tooltip_cached(name or '', text or '')
+    fields = {}
+    if cost is not None:
+        fields['cost'] = cost
+    if stats:
+        fields['stats'] = {}
+        for key, value, stat_type in stats:
+            fields['stats'].setdefault(key, {'value': value, 'type': stat_type})
+    if passive:
+        fields['passive'] = passive
+    if active:
+        fields['active'] = active
+    if cooldown is not None:
+        fields['cooldown'] = cooldown
+    return fields
+
+def parse_item_holder(holder, base_url):
+    """Parse a single ico-holder3 item block"""
+    item = {}
+    
+    # Extract item image
+    img = holder.find('img')
+    if img:
+        img_src = img.get('data-src') or img.get('src')
+        if img_src and not img_src.startswith('data:'):
+            item['image'] = urljoin(base_url, img_src)
+        item['alt'] = img.get('alt', '')
+    
+    # Extract item name
+    span = holder.find('span')
+    if span:
+        item['name'] = span.get_text(strip=True)
+    
+    # Extract item details from tooltip
+    tooltip = holder.find('p')
+    if tooltip:
+        tooltip_text = tooltip.get_text(strip=True)
+        item['description'] = tooltip_text
+        item.update(parse_tooltip(item.get('name'), tooltip_text))
+    
+    # Check if it's an enchant
+    enchant_marker = holder.find('div', class_='enchant')
+    if enchant_marker or 'Enchant' in item.get('name', ''):
+        item['type'] = 'enchant'
+    
+    return item
+
+def get_page_root(element):
+    """Climb to the document root of any element on a page"""
+    while element.parent is not None:
+        element = element.parent
+    return element
+
+def get_page_item_map(element, base_url):
+    """Per-page item holder map, built lazily on first use and shared by every extractor on the page"""
+    root = get_page_root(element)
+    
+    # vars() so a missing cache doesn't fall through to Tag.__getattr__ (a tree search)
+    item_map = vars(root).get('_wr_item_map')
+    if item_map is None:
+        item_map = {'holders': {}, 'by_name': {}}
+        for holder in root.find_all('div', class_='ico-holder3'):
+            item = parse_item_holder(holder, base_url)
+            item_map['holders'][id(holder)] = item
+            if item.get('name') and item['name'] not in item_map['by_name']:
+                item_map['by_name'][item['name']] = item
+        root._wr_item_map = item_map
+    
+    return item_map
+
 def extract_items_from_section(section, base_url):
     """Extract items from a section"""
     items = []
+    item_map = get_page_item_map(section, base_url)
     item_holders = section.find_all('div', class_='ico-holder3')
     
     for holder in item_holders:
-        item = {}
-        
-        # Extract item image
-        img = holder.find('img')
-        if img:
-            img_src = img.get('data-src') or img.get('src')
-            if img_src and not img_src.startswith('data:'):
-                item['image'] = urljoin(base_url, img_src)
-            item['alt'] = img.get('alt', '')
-        
-        # Extract item name
-        span = holder.find('span')
-        if span:
-            item['name'] = span.get_text(strip=True)
-        
-        # Extract item details from tooltip
-        tooltip = holder.find('p')
-        if tooltip:
-            tooltip_text = tooltip.get_text(strip=True)
-            item['description'] = tooltip_text
-            
-            # Extract cost
-            cost_match = re.search(r'(?<![+\-])\b(\d{3,})\b(?![%\s]*[A-Za-z])', tooltip_text)
-            if cost_match:
-                try:
-                    item['cost'] = int(cost_match.group(1))
-                except:
-                    pass
-        
-        # Check if it's an enchant
-        enchant_marker = holder.find('div', class_='enchant')
-        if enchant_marker or 'Enchant' in item.get('name', ''):
-            item['type'] = 'enchant'
+        item = item_map['holders'].get(id(holder))
+        if item is None:
+            item = parse_item_holder(holder, base_url)
         
-        items.append(item)
+        # Deep copy (items hold nested stats) so callers can edit their item without touching the shared map
+        items.append(copy.deepcopy(item))
     
     return items
 
@@ -647,10 +1001,7 @@ def extract_summoner_spells(soup, base_url):
                 tooltip = holder.find('p')
                 if tooltip:
                     spell['description'] = tooltip.get_text(strip=True)
-                    
-                    cooldown_match = re.search(r'Cooldown:\s*(\d+)s', spell['description'])
-                    if cooldown_match:
-                        spell['cooldown'] = int(cooldown_match.group(1))
+                    spell.update(parse_tooltip(spell.get('name'), spell['description']))
                 
                 spells.append(spell)
             break
@@ -739,6 +1090,10 @@ def extract_runes_data(soup, base_url):
         
         runes['secondary'] = [secondary_rune]
     
+    for rune in [runes.get('keystone')] + runes['primary'] + runes['secondary']:
+        if rune and rune.get('description'):
+            rune.update(parse_tooltip(rune.get('name'), rune['description']))
+    
     return runes
 
 def extract_situational_runes(soup, base_url):
@@ -777,6 +1132,7 @@ def extract_situational_runes(soup, base_url):
             tooltip = holder.find('p')
             if tooltip:
                 rune['description'] = tooltip.get_text(strip=True)
+                rune.update(parse_tooltip(rune.get('name'), rune['description']))
             
             runes.append(rune)
         
@@ -790,8 +1146,17 @@ def extract_situational_runes(soup, base_url):
     
     return situational
 
-def extract_change_history(soup):
-    """Extract champion change history"""
+def change_entry_key(entry):
+    """(date, patch) identifying a change-history entry, whitespace and case normalized"""
+    return (' '.join((entry.get('date') or '').split()), (entry.get('patch') or '').strip().lower())
+
+def extract_change_history(soup, known=None):
+    """Extract champion change history (newest first)
+    
+    With known (entries already stored, newest first) the page is only read up
+    to the first entry that is already known: new entries are parsed and
+    returned ahead of the known ones.
+    """
     change_history = []
     
     change_section = soup.find('section', class_='bg-very-light-gray3')
@@ -803,391 +1168,4140 @@ def extract_change_history(soup):
         return change_history
     
     change_divs = content_block.find_all('div', class_=['berrorsred', 'berrors'])
+    known_keys = {change_entry_key(entry) for entry in known or []} - {('', '')}
     
     for change_div in change_divs:
-        change_entry = {}
-        
-        first_b = change_div.find('b')
-        if first_b:
-            change_text = first_b.get_text(strip=True)
-            
-            if 'NERFED' in change_text:
-                change_entry['type'] = 'nerf'
-            elif 'REWORKED' in change_text:
-                change_entry['type'] = 'rework'
-            elif 'ADJUSTED' in change_text:
-                change_entry['type'] = 'adjustment'
-            elif 'BUFFED' in change_text:
-                change_entry['type'] = 'buff'
-            else:
-                change_entry['type'] = 'unknown'
-            
-            date_match = re.search(r'(\d{1,2}\s+[A-Z]{3}\s+\d{4})', change_text)
-            if date_match:
-                change_entry['date'] = date_match.group(1)
-            
-            patch_match = re.search(r'\(PATCH\s+([^)]+)\)', change_text)
-            if patch_match:
-                change_entry['patch'] = patch_match.group(1)
-        
-        # Simplified change extraction
-        changes = []
-        change_html = str(change_div)
-        change_html = change_html.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-        
-        temp_soup = BeautifulSoup(change_html, 'html.parser')
-        full_text = temp_soup.get_text()
-        lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-        
-        if lines and any(keyword in lines[0].upper() for keyword in ['NERFED', 'REWORKED', 'ADJUSTED', 'BUFFED']):
-            lines = lines[1:]
-        
-        current_ability = None
-        ability_changes = []
-        
-        for line in lines:
-            if any(marker in line for marker in ['(PASSIVE)', '(Q)', '(W)', '(E)', '(R)', 'BASE STATS']):
-                if current_ability and ability_changes:
-                    changes.append({
-                        'ability': current_ability,
-                        'changes': ability_changes
-                    })
-                
-                current_ability = re.sub(r'<[^>]+>', '', line).strip()
-                ability_changes = []
-                
-            elif current_ability and line:
-                if ':' in line and ('→' in line or ' to ' in line):
-                    stat_match = re.match(r'([^:]+):\s*(.+)', line)
-                    if stat_match:
-                        ability_changes.append({
-                            'stat': stat_match.group(1).strip(),
-                            'change': stat_match.group(2).strip()
-                        })
-                elif not any(skip_word in line.upper() for skip_word in ['NERFED', 'REWORKED', 'ADJUSTED', 'BUFFED']):
-                    ability_changes.append({'description': line})
-        
-        if current_ability and ability_changes:
-            changes.append({
-                'ability': current_ability,
-                'changes': ability_changes
-            })
+        change_entry = parse_change_entry_header(change_div)
+        if known_keys and change_entry_key(change_entry) in known_keys:
+            return change_history + [dict(entry) for entry in known]
         
-        change_entry['changes'] = changes
+        change_entry['changes'] = parse_change_entry_changes(change_div)
         change_history.append(change_entry)
     
     return change_history
 
-def scrape_champion_complete(url):
-    """Scrape complete champion data from URL"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract all champion data
-        champion_data = extract_champion_basic_info(soup, url)
-        champion_data = extract_champion_image_and_stats(soup, url, champion_data)
-        champion_data = extract_abilities(soup, url, champion_data)
-        
-        # Extract lanes and builds
-        lanes, builds = extract_complete_builds(soup, url)
-        champion_data['lanes'] = lanes
-        champion_data['builds'] = builds
+def parse_change_entry_header(change_div):
+    """Type, date and patch from the bold header of a change-history block"""
+    change_entry = {}
+    
+    first_b = change_div.find('b')
+    if first_b:
+        change_text = first_b.get_text(strip=True)
         
-        # Extract change history
-        change_history = extract_change_history(soup)
-        if change_history:
-            champion_data['change_history'] = change_history
+        if 'NERFED' in change_text:
+            change_entry['type'] = 'nerf'
+        elif 'REWORKED' in change_text:
+            change_entry['type'] = 'rework'
+        elif 'ADJUSTED' in change_text:
+            change_entry['type'] = 'adjustment'
+        elif 'BUFFED' in change_text:
+            change_entry['type'] = 'buff'
+        else:
+            change_entry['type'] = 'unknown'
         
-        return champion_data
+        date_match = re.search(r'(\d{1,2}\s+[A-Z]{3}\s+\d{4})', change_text)
+        if date_match:
+            change_entry['date'] = date_match.group(1)
         
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-        return None
+        patch_match = re.search(r'\(PATCH\s+([^)]{1,20})\)', change_text)
+        if patch_match:
+            change_entry['patch'] = patch_match.group(1)
 
-def smart_merge_champion_data(champion_name, url):
-    """Smart merge: preserve existing good data, fix missing data"""
-    try:
-        # Load existing data
-        filename = f"champions_clean/{champion_name.lower().replace(' ', '_').replace('-', '_')}.json"
-        existing_data = load_champion_data(filename)
-        
-        # Scrape fresh data
-        fresh_data = scrape_champion_complete(url)
-        
-        if not fresh_data:
-            print(f"  - Failed to scrape fresh data for {champion_name}")
-            return False
-        
-        # If no existing data, use fresh data
-        if not existing_data:
-            final_data = fresh_data
-        else:
-            # Smart merge: preserve existing, add missing
-            final_data = existing_data.copy()
-            
-            # Update basic info if missing
-            if not final_data.get('name'):
-                final_data['name'] = fresh_data.get('name', champion_name)
-            if not final_data.get('roles'):
-                final_data['roles'] = fresh_data.get('roles', [])
-            if not final_data.get('image'):
-                final_data['image'] = fresh_data.get('image', '')
-            if not final_data.get('tier'):
-                final_data['tier'] = fresh_data.get('tier', 1)
-            if not final_data.get('balance_status'):
-                final_data['balance_status'] = fresh_data.get('balance_status', '')
-            if not final_data.get('stats'):
-                final_data['stats'] = fresh_data.get('stats', {})
-            # Always update base_stats if fresh data has better stats (not all zeros)
-            fresh_base_stats = fresh_data.get('base_stats', {})
-            existing_base_stats = final_data.get('base_stats', {})
-            
-            # Check if existing base stats are empty or all zeros
-            existing_has_real_stats = any(
-                value > 0 for value in existing_base_stats.values() 
-                if isinstance(value, (int, float))
-            )
-            
-            # Check if fresh base stats have real values
-            fresh_has_real_stats = any(
-                value > 0 for value in fresh_base_stats.values() 
-                if isinstance(value, (int, float))
-            )
-            
-            if fresh_has_real_stats and not existing_has_real_stats:
-                final_data['base_stats'] = fresh_base_stats
-                print(f"    + Updated base stats with real values")
-            elif not final_data.get('base_stats'):
-                final_data['base_stats'] = fresh_base_stats
-                if fresh_base_stats:
-                    print(f"    + Added base stats")
-            if not final_data.get('abilities'):
-                final_data['abilities'] = fresh_data.get('abilities', [])
-            
-            # Update lanes if fresh data has more
-            fresh_lanes = fresh_data.get('lanes', [])
-            existing_lanes = final_data.get('lanes', [])
-            if len(fresh_lanes) > len(existing_lanes):
-                final_data['lanes'] = fresh_lanes
-                print(f"    + Updated lanes: {fresh_lanes}")
-            
-            # Smart merge builds
-            fresh_builds = fresh_data.get('builds', [])
-            existing_builds = final_data.get('builds', [])
+    return change_entry
+
+def parse_change_entry_changes(change_div):
+    """Per-ability changes listed in a change-history block"""
+    # Simplified change extraction
+    changes = []
+    change_html = str(change_div)
+    change_html = change_html.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+    
+    temp_soup = _beautiful_soup()(change_html, 'html.parser')
+    full_text = temp_soup.get_text()
+    lines = [line.strip() for line in full_text.split('\n') if line.strip()]
+    
+    if lines and any(keyword in lines[0].upper() for keyword in ['NERFED', 'REWORKED', 'ADJUSTED', 'BUFFED']):
+        lines = lines[1:]
+    
+    current_ability = None
+    ability_changes = []
+    
+    for line in lines:
+        if any(marker in line for marker in ['(PASSIVE)', '(Q)', '(W)', '(E)', '(R)', 'BASE STATS']):
+            if current_ability and ability_changes:
+                changes.append({
+                    'ability': current_ability,
+                    'changes': ability_changes
+                })
             
-            merged_builds = []
-            for i, existing_build in enumerate(existing_builds):
-                merged_build = existing_build.copy()
-                fresh_build = fresh_builds[i] if i < len(fresh_builds) else None
-                
-                if fresh_build:
-                    # Update missing data only
-                    if not merged_build.get('start_items') or len(merged_build.get('start_items', [])) == 0:
-                        if fresh_build.get('start_items'):
-                            merged_build['start_items'] = fresh_build['start_items']
-                            print(f"    + Added {len(fresh_build['start_items'])} start items to build {i+1}")
-                    
-                    if not merged_build.get('core_items') or len(merged_build.get('core_items', [])) == 0:
-                        if fresh_build.get('core_items'):
-                            merged_build['core_items'] = fresh_build['core_items']
-                            print(f"    + Added {len(fresh_build['core_items'])} core items to build {i+1}")
-                    
-                    # ALWAYS update boots/enchants (this is the main fix)
-                    if fresh_build.get('boots_enchants'):
-                        old_count = len(merged_build.get('boots_enchants', []))
-                        new_count = len(fresh_build['boots_enchants'])
-                        merged_build['boots_enchants'] = fresh_build['boots_enchants']
-                        print(f"    + Updated boots/enchants: {old_count} -> {new_count} items in build {i+1}")
-                    
-                    if not merged_build.get('example_build') or len(merged_build.get('example_build', [])) == 0:
-                        if fresh_build.get('example_build'):
-                            merged_build['example_build'] = fresh_build['example_build']
-                            print(f"    + Added {len(fresh_build['example_build'])} example build items to build {i+1}")
-                    
-                    if not merged_build.get('situational_items') or len(merged_build.get('situational_items', [])) == 0:
-                        if fresh_build.get('situational_items'):
-                            merged_build['situational_items'] = fresh_build['situational_items']
-                            print(f"    + Added {len(fresh_build['situational_items'])} situational categories to build {i+1}")
-                    
-                    if not merged_build.get('summoner_spells') or len(merged_build.get('summoner_spells', [])) == 0:
-                        if fresh_build.get('summoner_spells'):
-                            merged_build['summoner_spells'] = fresh_build['summoner_spells']
-                            print(f"    + Added {len(fresh_build['summoner_spells'])} summoner spells to build {i+1}")
-                    
-                    if not merged_build.get('runes') or not merged_build.get('runes', {}).get('keystone'):
-                        if fresh_build.get('runes') and fresh_build['runes'].get('keystone'):
-                            merged_build['runes'] = fresh_build['runes']
-                            print(f"    + Added runes data to build {i+1}")
-                    
-                    if not merged_build.get('situational_runes') or len(merged_build.get('situational_runes', [])) == 0:
-                        if fresh_build.get('situational_runes'):
-                            merged_build['situational_runes'] = fresh_build['situational_runes']
-                            print(f"    + Added {len(fresh_build['situational_runes'])} situational rune categories to build {i+1}")
-                
-                merged_builds.append(merged_build)
+            current_ability = re.sub(r'<[^<>]+>', '', line).strip()
+            ability_changes = []
             
-            # Add any additional fresh builds
-            if len(fresh_builds) > len(existing_builds):
-                for i in range(len(existing_builds), len(fresh_builds)):
-                    merged_builds.append(fresh_builds[i])
-                    print(f"    + Added new build {i+1}")
+        elif current_ability and line:
+            if ':' in line and ('→' in line or ' to ' in line):
+                stat_match = re.match(r'([^:]+):\s*(.+)', line)
+                if stat_match:
+                    ability_changes.append({
+                        'stat': stat_match.group(1).strip(),
+                        'change': stat_match.group(2).strip()
+                    })
+            elif not any(skip_word in line.upper() for skip_word in ['NERFED', 'REWORKED', 'ADJUSTED', 'BUFFED']):
+                ability_changes.append({'description': line})
+    
+    if current_ability and ability_changes:
+        changes.append({
+            'ability': current_ability,
+            'changes': ability_changes
+        })
+    
+    return changes
+
+# 429/503 responses are retried, waiting as long as Retry-After asks (capped)
+FETCH_RETRY_STATUS_CODES = (429, 503)
+FETCH_MAX_RETRIES = 3
+FETCH_MAX_RETRY_WAIT = 60.0
+
+def retry_after_seconds(value, default):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+def _get_with_retries(url, session=None, max_retries=FETCH_MAX_RETRIES, on_response=None, stream=False):
+    for attempt in range(max_retries + 1):
+        started = time.time()
+        response = (session or _requests()).get(url, headers=DEFAULT_HEADERS, stream=stream)
+        if on_response is not None:
+            # Per attempt, so the Retry-After wait below is never counted as latency
+            on_response(response.status_code, time.time() - started)
+        if response.status_code in FETCH_RETRY_STATUS_CODES and attempt < max_retries:
+            wait_for = retry_after_seconds(response.headers.get('Retry-After'), default=2.0 ** attempt)
+            response.close()
+            time.sleep(min(wait_for, FETCH_MAX_RETRY_WAIT))
+            continue
+        response.raise_for_status()
+        return response
+
+def fetch_champion_page(url, session=None, max_retries=FETCH_MAX_RETRIES, on_response=None):
+    """Download a champion page and return the raw HTML bytes
+    
+    on_response(status_code, seconds) is called for every HTTP attempt, retries
+    included, with that attempt's own latency.
+    """
+    return _get_with_retries(url, session, max_retries, on_response).content
+
+# Streaming fetch: keep only the page sections the extractors read
+STREAM_CHUNK_SIZE = 16384
+STREAM_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+                    'source', 'track', 'wbr'}
+# (tag, class) of the containers the extractors search
+STREAM_TARGET_SECTIONS = {
+    ('h1', 'firstscrean-main-title'),
+    ('img', 'champion-icon'),
+    ('div', 'tier-super'),
+    ('div', 'edit-balance'),
+    ('div', 'stats-block'),
+    ('div', 'ability-holder'),
+    ('div', 'bild-block'),
+    ('div', 'rune'),
+    ('div', 'tabs-box6'),
+    ('section', 'bg-very-light-gray3')
+}
+# Once all of these have closed the rest of the page is not read
+STREAM_REQUIRED_SECTIONS = {
+    ('h1', 'firstscrean-main-title'),
+    ('div', 'stats-block'),
+    ('div', 'rune'),
+    ('div', 'tabs-box6'),
+    ('section', 'bg-very-light-gray3')
+}
+
+class StreamingPageSlicer:
+    """Incremental HTML tokenizer that cuts the target sections out of a page as it streams in
+    
+    Captures are the outermost target elements, the parent of the stat circles
+    (the extractors read circle/title siblings), and each build h2 paired with
+    the div that follows it. done turns True once every required section
+    has closed.
+    """
+    
+    def __init__(self):
+        from html.parser import HTMLParser
+        slicer = self
+        
+        class _Tokenizer(HTMLParser):
+            def handle_starttag(self, tag, attrs):
+                slicer._start(tag, dict(attrs), slicer._offset(self.getpos()), self.get_starttag_text())
             
-            final_data['builds'] = merged_builds
+            def handle_startendtag(self, tag, attrs):
+                slicer._start(tag, dict(attrs), slicer._offset(self.getpos()), self.get_starttag_text(), void=True)
             
-            # Update change history if missing
-            if not final_data.get('change_history') and fresh_data.get('change_history'):
-                final_data['change_history'] = fresh_data['change_history']
-                print(f"    + Added change history")
+            def handle_endtag(self, tag):
+                slicer._end(tag, slicer._offset(self.getpos()))
         
-        # Save the final data
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
-        
-        return True
-        
-    except Exception as e:
-        print(f"  - Error processing {champion_name}: {e}")
-        return False
-
-def main():
-    """Main function - THE ULTIMATE ALL-IN-ONE SCRAPER"""
-    print("=== ULTIMATE ALL-IN-ONE CHAMPION SCRAPER ===\n")
-    print("This script does EVERYTHING:")
-    print("✓ Extracts complete champion data (name, roles, image, tier, stats, abilities)")
-    print("✓ Extracts ALL build components (start_items, core_items, example_build, situational_items)")
-    print("✓ Extracts LANE-SPECIFIC boots/enchants (not global duplicates)")
-    print("✓ Extracts summoner spells and runes")
-    print("✓ Preserves existing good data while fixing missing data")
-    print("✓ Handles all champions in batch")
-    print()
+        self.tokenizer = _Tokenizer(convert_charrefs=False)
+        # Fed text is kept as chunks (joined per capture) so feeding stays linear
+        self.chunks = []
+        self.chunk_starts = []
+        self.length = 0
+        self.line_starts = [0]
+        self.stack = []  # [tag, start offset]
+        self.capture = None  # (start offset, depth, kind)
+        self.captures = []
+        self.pending_build = None  # depth of a closed build h2 still waiting for its div
+        self.seen_required = set()
+        self.done = False
     
-    # Load champion URLs
-    champion_urls = load_champion_urls()
-    if not champion_urls:
-        print("Could not load champion URLs")
-        return
+    def _offset(self, position):
+        line, column = position
+        return self.line_starts[line - 1] + column
     
-    # Get list of champion files
-    champions_dir = Path("champions_clean")
-    if not champions_dir.exists():
-        print("Champions directory not found")
-        return
+    def feed(self, text):
+        if not text:
+            return
+        self.chunks.append(text)
+        self.chunk_starts.append(self.length)
+        self.line_starts.extend(self.length + match.end() for match in re.finditer('\n', text))
+        self.length += len(text)
+        self.tokenizer.feed(text)
     
-    champion_files = list(champions_dir.glob("*.json"))
-    print(f"Found {len(champion_files)} champion files to process\n")
+    def _chunk_index(self, offset):
+        import bisect
+        return bisect.bisect_right(self.chunk_starts, offset) - 1
     
-    # Statistics
-    total_champions = len(champion_files)
-    champions_processed = 0
-    champions_updated = 0
-    failed_champions = []
+    def _slice(self, start, end):
+        import bisect
+        first = self._chunk_index(start)
+        last = bisect.bisect_left(self.chunk_starts, end)
+        base = self.chunk_starts[first]
+        return ''.join(self.chunks[first:last])[start - base:end - base]
     
-    # Process each champion
-    for i, champion_file in enumerate(champion_files, 1):
-        champion_name = champion_file.stem.replace('_', ' ').title()
-        print(f"[{i}/{total_champions}] Processing {champion_name}...")
-        
-        # Find matching URL with improved name mapping
-        url = None
-        
-        # Special name mappings for problematic champions
-        name_mappings = {
-            'khazix': 'kha zix',
-            'kha_zix': 'kha zix',
-            'nunu_willump': 'nunu amp willump',
-            'nunu willump': 'nunu amp willump',
-            'wukong': 'vukong',
-            'dr_mundo': 'dr mundo',
-            'dr mundo': 'dr mundo',
-            'jarvan_iv': 'jarvan iv',
-            'jarvan iv': 'jarvan iv',
-            'xin_zhao': 'xin zhao',
-            'xin zhao': 'xin zhao',
-            'aurelion_sol': 'aurelion sol',
-            'aurelion sol': 'aurelion sol',
-            'miss_fortune': 'miss fortune',
-            'miss fortune': 'miss fortune',
-            'twisted_fate': 'twisted fate',
-            'twisted fate': 'twisted fate',
-            'lee_sin': 'lee sin',
-            'lee sin': 'lee sin',
-            'master_yi': 'master yi',
-            'master yi': 'master yi',
-            'tahm_kench': 'tahm kench',
-            'tahm kench': 'tahm kench',
-            'renata_glasc': 'renata glasc',
-            'renata glasc': 'renata glasc'
-        }
+    def _find(self, character, offset):
+        index = self._chunk_index(offset)
+        position = self.chunks[index].find(character, offset - self.chunk_starts[index])
+        while position < 0 and index + 1 < len(self.chunks):
+            index += 1
+            position = self.chunks[index].find(character)
+        return -1 if position < 0 else self.chunk_starts[index] + position
+    
+    def _start(self, tag, attrs, offset, raw, void=False):
+        classes = set((attrs.get('class') or '').split())
+        depth = len(self.stack)
+        void = void or tag in STREAM_VOID_TAGS
         
-        # Generate possible keys with improved mapping
-        base_name = champion_file.stem.lower()
-        display_name = champion_name.lower()
-        
-        possible_keys = [
-            base_name,
-            display_name,
-            base_name.replace('_', ' '),
-            display_name.replace(' ', '_'),
-            base_name.replace('_', '-'),
-            display_name.replace(' ', '-')
-        ]
+        if self.pending_build is not None and depth == self.pending_build:
+            if tag == 'div':
+                self._begin(offset, depth, 'build')
+            if tag in ('div', 'h2'):
+                self.pending_build = None
+        elif self.pending_build is not None and depth < self.pending_build:
+            self.pending_build = None
         
-        # Add special mappings
-        if base_name in name_mappings:
-            possible_keys.append(name_mappings[base_name])
-        if display_name in name_mappings:
-            possible_keys.append(name_mappings[display_name])
+        if self.capture is None:
+            target = next(((tag, name) for name in classes if (tag, name) in STREAM_TARGET_SECTIONS), None)
+            if target:
+                self._begin(offset, depth, target)
+            elif tag == 'h2':
+                self._begin(offset, depth, 'h2')
+            elif tag == 'div' and 'circle' in classes and self.stack:
+                # Re-cut from the parent so circle titles (siblings) come along
+                parent_start = self.stack[-1][1]
+                self.captures = [capture for capture in self.captures if capture[0] < parent_start]
+                self.capture = (parent_start, depth - 1, 'circles')
         
-        # Try to find URL
-        for key in possible_keys:
-            if key in champion_urls:
-                url = champion_urls[key]
-                print(f"  Found URL using key: '{key}'")
+        if void:
+            if self.capture is not None and self.capture[1] == depth and self.capture[0] == offset:
+                self._finish(offset + len(raw or ''))
+        else:
+            self.stack.append([tag, offset])
+    
+    def _begin(self, offset, depth, kind):
+        self.capture = (offset, depth, kind)
+    
+    def _end(self, tag, offset):
+        # Close the innermost matching element (and anything left open inside it)
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
                 break
-        
-        if url:
-            if smart_merge_champion_data(champion_name, url):
-                champions_updated += 1
-                print(f"  [OK] Updated {champion_name}")
-            else:
-                failed_champions.append(champion_name)
-                print(f"  [FAIL] Failed to update {champion_name}")
-            
-            champions_processed += 1
-            
-            # Be respectful to the server
-            time.sleep(1.5)
         else:
-            failed_champions.append(champion_name)
-            print(f"  [WARN] No URL found for {champion_name}")
+            return
+        del self.stack[index:]
+        
+        if self.capture is not None and index <= self.capture[1]:
+            end = self._find('>', offset)
+            self._finish(self.length if end < 0 else end + 1)
     
-    # Print summary
-    print(f"\n=== ULTIMATE ALL-IN-ONE SCRAPER COMPLETE ===")
-    print(f"Total Champions: {total_champions}")
-    print(f"Champions Processed: {champions_processed}")
-    print(f"Champions Updated: {champions_updated}")
-    print(f"Failed: {len(failed_champions)}")
-    print(f"Success Rate: {(champions_updated / total_champions * 100):.1f}%")
+    def _finish(self, end):
+        start, depth, kind = self.capture
+        self.capture = None
+        html = self._slice(start, end)
+        if kind == 'h2':
+            if 'Build' not in re.sub(r'<[^<>]*>', '', html):
+                return
+            self.pending_build = depth
+        self.captures.append((start, html))
+        if kind in STREAM_REQUIRED_SECTIONS:
+            self.seen_required.add(kind)
+            self.done = self.seen_required == STREAM_REQUIRED_SECTIONS
     
-    if failed_champions:
-        print(f"\nFailed champions:")
-        for name in failed_champions:
-            print(f"  - {name}")
+    def document(self):
+        """The captured sections as a small standalone page, in page order"""
+        return '<html><body>\n' + '\n'.join(html for _, html in self.captures) + '\n</body></html>'
+
+def fetch_champion_sections(url, session=None, max_retries=FETCH_MAX_RETRIES, on_response=None):
+    """Stream a champion page, stopping once the extractors' sections are in
     
-    print(f"\n🎉 ALL CHAMPION DATA IS NOW COMPLETE!")
-    print(f"📊 Every champion has:")
-    print(f"   ✓ Complete basic info (name, roles, image, tier, stats, abilities)")
-    print(f"   ✓ Complete build data (start_items, core_items, example_build, situational_items)")
-    print(f"   ✓ Lane-specific boots/enchants (4 items per lane, not 8+ duplicates)")
-    print(f"   ✓ Summoner spells and runes data")
-    print(f"   ✓ Change history where available")
+    Returns (document, raw, stats): the captured sections as a small page,
+    the bytes actually read, and {'bytes_read', 'bytes_total', 'early_stop'}.
+    on_response is called per HTTP attempt as in fetch_champion_page (latency
+    up to the response headers).
+    """
+    import codecs
+    response = _get_with_retries(url, session, max_retries, on_response, stream=True)
+    charset = re.search(r'charset=([\w\-]+)', response.headers.get('Content-Type', ''))
+    decoder = codecs.getincrementaldecoder(charset.group(1) if charset else 'utf-8')(errors='replace')
+    
+    slicer = StreamingPageSlicer()
+    raw = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            raw.extend(chunk)
+            slicer.feed(decoder.decode(chunk))
+            if slicer.done:
+                break
+        else:
+            slicer.feed(decoder.decode(b'', final=True))
+    finally:
+        response.close()
+    
+    stats = {
+        'bytes_read': len(raw),
+        'bytes_total': int(response.headers.get('Content-Length') or 0) or None,
+        'early_stop': slicer.done
+    }
+    return slicer.document(), bytes(raw), stats
+
+
+# Wall-clock budget per extractor, in seconds. In the main thread it is enforced
+# with SIGALRM; in worker threads it can only be checked afterwards. Neither can
+# interrupt the regex engine, which is why the patterns above are bounded.
+EXTRACTOR_TIME_BUDGETS = {
+    'builds': 2.0,
+    'change_history': 2.0
+}
+DEFAULT_EXTRACTOR_TIME_BUDGET = 1.0
+# Wall-clock budget for all sections of one page. Checked before each section,
+# so it also bounds worker threads, where a single extractor can't be interrupted.
+PAGE_EXTRACTION_BUDGET = 8.0
+
+class ExtractorTimeout(Exception):
+    """An extractor ran past its time budget"""
+
+class ExtractionLog:
+    """Failures, over-budget (but kept) results and slowest run time of each extractor used on a page"""
+    
+    def __init__(self):
+        self.failures = []
+        self.slow = []
+        self.timings = {}
+    
+    def record(self, name, elapsed, error=None):
+        self.timings[name] = max(elapsed, self.timings.get(name, 0.0))
+        if error:
+            self.failures.append({'section': name, 'error': error})
+
+def run_extractor(name, extract, log=None, deadline=None):
+    """Run one extractor within its time budget; failures return _MISSING instead of raising
+    
+    The budget is enforced with SIGALRM, which only works on the main thread.
+    Elsewhere (iter_scrape workers) an extractor can't be interrupted: an
+    over-budget result is kept and logged as slow. deadline (a perf_counter
+    time) is checked before starting, so a page's later sections are left out
+    once its budget is spent on any thread.
+    """
+    import signal
+    import threading
+    if deadline is not None and time.perf_counter() >= deadline:
+        error = f"ExtractorTimeout: page budget of {PAGE_EXTRACTION_BUDGET:g}s spent before this section"
+        if log is not None:
+            log.record(name, 0.0, error)
+        else:
+            print(f"  ! {name} extractor failed: {error}")
+        return _MISSING
+    budget = EXTRACTOR_TIME_BUDGETS.get(name.split('/')[0], DEFAULT_EXTRACTOR_TIME_BUDGET)
+    use_alarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    
+    if use_alarm:
+        def on_timeout(signum, frame):
+            raise ExtractorTimeout(f"over the {budget:g}s budget")
+        previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, budget)
+    
+    started = time.perf_counter()
+    error = None
+    try:
+        value = extract()
+    except Exception as e:
+        value = _MISSING
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    elapsed = time.perf_counter() - started
+    
+    if log is not None:
+        log.record(name, elapsed, error)
+    elif error:
+        print(f"  ! {name} extractor failed: {error}")
+    if error is None and elapsed > budget:
+        # Only reachable off the main thread, where the budget can't interrupt
+        # the extractor: the result is kept and reported as slow
+        if log is not None:
+            log.slow.append({'section': name, 'elapsed': round(elapsed, 3), 'budget': budget})
+        else:
+            print(f"  ! {name} extractor was slow: took {elapsed:.2f}s, over the {budget:g}s budget")
+    return value
+
+def parse_champion_page(html, url, parser='html.parser', as_record=False, log=None, section_cache=None,
+                        change_history=None):
+    """Extract complete champion data from page HTML (as a Champion record if as_record)
+    
+    Every section is extracted in isolation: one that fails or runs out of time
+    is left out (and reported to log) instead of failing the whole champion.
+    Sections not started within PAGE_EXTRACTION_BUDGET seconds are left out too.
+    section_cache(name, elements, extract) may return a stored result for a section;
+    extract(previous) hands incremental sections the result it stored last time.
+    change_history (stored entries, newest first) stops the change-history walk
+    at the first entry already known.
+    """
+    deadline = time.perf_counter() + PAGE_EXTRACTION_BUDGET
+    soup = _beautiful_soup()(html, parser)
+    
+    def section(name, elements, extract, incremental=False):
+        def guarded(previous=None):
+            if incremental:
+                return run_extractor(name, lambda: extract(previous), log, deadline)
+            return run_extractor(name, extract, log, deadline)
+        if section_cache is None:
+            return guarded()
+        return section_cache(name, elements, guarded)
+    
+    # Extract all champion data
+    champion_data = {}
+    for name, extract in (('basic_info', lambda: extract_champion_basic_info(soup, url)),
+                          ('image_and_stats', lambda: extract_champion_image_and_stats(soup, url, {}))):
+        value = run_extractor(name, extract, log, deadline)
+        if value is not _MISSING:
+            champion_data.update(value)
+    
+    sections = {
+        'base_stats': section('base_stats', lambda: [soup.find('div', class_='stats-block')],
+                              lambda: extract_base_stats(soup)),
+        'abilities': section('abilities', lambda: soup.find_all('div', class_='ability-holder'),
+                             lambda: extract_abilities(soup, url, {})['abilities'])
+    }
+    
+    # Page-wide build parts, shared by every lane
+    shared = {
+        'summoner_spells': section('summoner_spells', lambda: [find_summoner_section(soup)],
+                                   lambda: extract_summoner_spells(soup, url)),
+        'runes': section('runes', lambda: [soup.find('div', class_='rune')],
+                         lambda: extract_runes_data(soup, url)),
+        'situational_runes': section('situational_runes', lambda: [soup.find('div', class_='tabs-box6')],
+                                     lambda: extract_situational_runes(soup, url))
+    }
+    
+    # Extract lanes and builds
+    lanes = []
+    builds = []
+    headers = run_extractor('lanes', lambda: find_build_headers(soup), log)
+    for header, lane in ([] if headers is _MISSING else headers):
+        lanes.append(lane)
+        content_section = find_build_content_section(header)
+        if not content_section:
+            builds.append({'lane': lane})
+            continue
+        
+        def lane_elements(header=header, content_section=content_section):
+            elements = [header, content_section]
+            if not any('Boots' in title.get_text() and 'Enchant' in title.get_text()
+                       for title in content_section.find_all('div', class_='bildtitle2')):
+                # The boots/enchants fallback reads item holders from the whole page
+                elements.extend(soup.find_all('div', class_='ico-holder3'))
+            return elements
+        
+        items = section(f"builds/{lane}", lane_elements,
+                        lambda content_section=content_section, lane=lane:
+                            extract_lane_build_items(content_section, url, lane))
+        if items is _MISSING:
+            continue
+        build = {'lane': lane}
+        build.update(items)
+        for key, value in shared.items():
+            if value is not _MISSING:
+                build[key] = json.loads(json.dumps(value))
+        builds.append(build)
+    
+    for key, value in sections.items():
+        if value is not _MISSING:
+            champion_data[key] = value
+    growth = section('base_stats_growth', lambda: [soup.find('div', class_='stats-block')],
+                     lambda: extract_base_stats_growth(soup))
+    if growth and growth is not _MISSING:
+        champion_data['base_stats_growth'] = growth
+    if headers is not _MISSING:
+        champion_data['lanes'] = lanes
+        champion_data['builds'] = builds
+    
+    # Extract change history
+    known_history = change_history
+    change_history = section('change_history', lambda: [soup.find('section', class_='bg-very-light-gray3')],
+                             lambda previous: extract_change_history(soup, known_history or previous),
+                             incremental=True)
+    if change_history and change_history is not _MISSING:
+        champion_data['change_history'] = change_history
+    
+    if as_record:
+        return Champion.from_dict(champion_data)
+    return champion_data
+
+def scrape_champion_complete(url, parser='html.parser', session=None, change_history=None, log=None):
+    """Scrape complete champion data from URL (sections left out are reported to log)"""
+    try:
+        return parse_champion_page(fetch_champion_page(url, session), url, parser, log=log,
+                                   change_history=change_history)
+        
+    except Exception as e:
+        print(f"Error scraping {url}: {e}")
+        return None
+
+SECTION_FINGERPRINTS_FILE = 'logs/section_fingerprints.json'
+# Bump whenever an extractor's output changes: cached sections from another
+# version are dropped instead of reused
+SECTION_EXTRACTOR_VERSION = 2
+FINGERPRINT_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def fingerprint_elements(elements):
+    """Hash of the whitespace-normalized markup of one or more page elements"""
+    import hashlib
+    digest = hashlib.sha1()
+    for element in elements:
+        digest.update(FINGERPRINT_WHITESPACE_PATTERN.sub(' ', str(element)).encode('utf-8'))
+    return digest.hexdigest()
+
+def find_summoner_section(soup):
+    for section in soup.find_all('div', class_='bild-block'):
+        h3 = section.find('h3')
+        if h3 and 'Summoner' in h3.get_text():
+            return section
+    return None
+
+class IncrementalPageParser:
+    """iter_scrape parser that only re-extracts page sections whose markup changed
+    
+    Each section (stats block, abilities, every lane block, summoner spells,
+    runes, situational runes, change history) is fingerprinted by a hash of its
+    subtree. If the fingerprint matches the last run for the same URL, the
+    previous extracted output is reused. Call save() after the run. The cache
+    is discarded when it was written by another SECTION_EXTRACTOR_VERSION.
+    """
+    
+    def __init__(self, state_file=SECTION_FINGERPRINTS_FILE, parser='html.parser'):
+        import threading
+        self.state_file = state_file
+        self.parser = parser
+        self.lock = threading.Lock()
+        self.extracted = 0
+        self.reused = 0
+        self.state = {}
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = None
+        if isinstance(saved, dict) and saved.get('extractor_version') == SECTION_EXTRACTOR_VERSION:
+            self.state = saved.get('pages') or {}
+    
+    def _section(self, previous, current, name, elements, extract):
+        elements = [element for element in elements() if element is not None]
+        if not elements:
+            # Nothing to fingerprint; some extractors have page-wide fallbacks
+            return extract()
+        
+        fingerprint = fingerprint_elements(elements)
+        cached = previous.get(name)
+        if cached and cached[0] == fingerprint:
+            value = cached[1]
+            with self.lock:
+                self.reused += 1
+        else:
+            value = extract(cached[1] if cached else None)
+            if value is _MISSING:
+                return value
+            with self.lock:
+                self.extracted += 1
+        current[name] = [fingerprint, value]
+        return copy.deepcopy(value)
+    
+    def __call__(self, html, url, log=None, change_history=None):
+        previous = self.state.get(url, {})
+        current = {}
+        champion_data = parse_champion_page(
+            html, url, self.parser, log=log, change_history=change_history,
+            section_cache=lambda name, elements, extract: self._section(previous, current, name, elements, extract))
+        self.state[url] = current
+        return champion_data
+    
+    def save(self):
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        with self.lock:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump({'extractor_version': SECTION_EXTRACTOR_VERSION, 'pages': self.state}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+
+# Malformed-page harness for the extractors (the 'fuzz' subcommand)
+def _fuzz_insert(text, rng, anchor, payload):
+    position = text.find(anchor)
+    if position < 0:
+        position = rng.randrange(len(text) + 1)
+    return text[:position] + payload + text[position:]
+
+FUZZ_MUTATIONS = {
+    'truncate': lambda text, rng, size: text[:rng.randrange(len(text) + 1)],
+    'drop_closing_tags': lambda text, rng, size: re.sub(r'</(?:div|p|span|table)>',
+                                                        lambda match: '' if rng.random() < 0.5 else match.group(0), text),
+    'unclosed_smile': lambda text, rng, size: _fuzz_insert(text, rng, '<!--smile:', '<!--smile:attackdamage-->x' * (size // 26)),
+    'paren_flood': lambda text, rng, size: _fuzz_insert(text, rng, '<div class="ability-marker">', '<p>' + '(' * size + '</p>'),
+    'digit_flood': lambda text, rng, size: _fuzz_insert(text, rng, '<div class="ico-holder3">',
+                                                        '<div class="ico-holder3"><span>X</span><p>' + '9' * size + ' % ' * (size // 3) + 'a</p></div>'),
+    'whitespace_flood': lambda text, rng, size: _fuzz_insert(text, rng, '<div class="berrors', '<div class="berrors"><b>BUFFED' + ' ' * size + '(PATCH ' + ' ' * size + '</b></div>'),
+    'deep_nesting': lambda text, rng, size: _fuzz_insert(text, rng, '<div class="builds">', '<div>' * min(size, 500)),
+    'duplicate_sections': lambda text, rng, size: _fuzz_insert(text, rng, '<h2>', text[text.find('<h2>'):text.find('<h2>') + size] * 3),
+    'garbage': lambda text, rng, size: ''.join(
+        chunk if rng.random() < 0.9 else ''.join(chr(rng.randrange(32, 0x2ff)) for _ in range(rng.randrange(1, 200)))
+        for chunk in re.split(r'(?=<)', text))
+}
+
+def run_extraction_fuzz(pages, iterations=100, seed=0, size=20000, parser='html.parser', max_seconds=None):
+    """Feed mutated copies of saved pages to the extractors and report the worst run times"""
+    import random
+    rng = random.Random(seed)
+    seeds = [Path(page).read_bytes().decode('utf-8', errors='replace') for page in pages]
+    if max_seconds is None:
+        max_seconds = PAGE_EXTRACTION_BUDGET + max(EXTRACTOR_TIME_BUDGETS.values())
+    
+    print(f"=== EXTRACTION FUZZ: {iterations} pages from {len(seeds)} seeds ===\n")
+    results = {name: {'runs': 0, 'worst': 0.0, 'failures': 0, 'page_errors': 0, 'slowest': {}} for name in FUZZ_MUTATIONS}
+    for _ in range(iterations):
+        name = rng.choice(sorted(FUZZ_MUTATIONS))
+        html = FUZZ_MUTATIONS[name](rng.choice(seeds), rng, rng.randrange(size // 4, size + 1))
+        log = ExtractionLog()
+        started = time.perf_counter()
+        try:
+            parse_champion_page(html, 'https://wr-meta.com/fuzz.html', parser, log=log)
+        except Exception:
+            results[name]['page_errors'] += 1
+        elapsed = time.perf_counter() - started
+        
+        result = results[name]
+        result['runs'] += 1
+        result['worst'] = max(result['worst'], elapsed)
+        result['failures'] += len(log.failures)
+        for section, seconds in log.timings.items():
+            result['slowest'][section] = max(seconds, result['slowest'].get(section, 0.0))
+    
+    print(f"{'mutation':20s} {'runs':>5s} {'worst':>8s} {'left out':>9s} {'errors':>7s}  slowest extractor")
+    for name, result in sorted(results.items()):
+        if not result['runs']:
+            continue
+        slowest = max(result['slowest'].items(), key=lambda entry: entry[1], default=('-', 0.0))
+        print(f"{name:20s} {result['runs']:5d} {result['worst']:7.3f}s {result['failures']:9d} "
+              f"{result['page_errors']:7d}  {slowest[0]} ({slowest[1]:.3f}s)")
+    
+    worst = max(result['worst'] for result in results.values())
+    print(f"\nWorst page: {worst:.3f}s (bound {max_seconds:.1f}s)")
+    return 0 if worst <= max_seconds else 1
+
+class DirectoryPageCache:
+    """Page cache for iter_scrape that keeps raw HTML on disk, keyed by URL"""
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, url):
+        import hashlib
+        return self.directory / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+    
+    def get(self, url, default=None):
+        try:
+            return self._path(url).read_bytes()
+        except FileNotFoundError:
+            return default
+    
+    def __setitem__(self, url, html):
+        self._path(url).write_bytes(html)
+
+class AdaptiveConcurrency:
+    """AIMD limit on concurrent page fetches, driven by latency and error signals
+    
+    After each round (as many responses as the current limit) the limit grows
+    by `increase` if the window's p95 latency and error rate are under target.
+    A 429, 5xx or connection error, or a p95 over target, multiplies it by
+    `decrease` instead. There is at most one cut per round, so a burst of
+    errors from the same in-flight batch counts once.
+    """
+    
+    def __init__(self, initial=2, minimum=1, maximum=8, target_p95=2.0, max_error_rate=0.05,
+                 increase=1.0, decrease=0.5, window=20):
+        import threading
+        from collections import deque
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_p95 = target_p95
+        self.max_error_rate = max_error_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.since_change = 0
+        self.requests = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self.history = [(0.0, self.current)]
+    
+    @property
+    def current(self):
+        """Number of requests allowed in flight right now"""
+        return max(self.minimum, min(self.maximum, int(self.limit)))
+    
+    def _window_stats(self):
+        latencies = sorted(latency for latency, _ in self.samples)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        error_rate = sum(1 for _, congested in self.samples if congested) / len(self.samples) if self.samples else 0.0
+        return p95, error_rate
+    
+    def _set_limit(self, limit):
+        previous = self.current
+        self.limit = max(float(self.minimum), min(float(self.maximum), limit))
+        self.since_change = 0
+        if self.current != previous:
+            self.history.append((round(time.time() - self.started, 2), self.current))
+    
+    def _cut(self):
+        if self.limit > self.minimum:
+            self.decreases += 1
+        self._set_limit(self.limit * self.decrease)
+    
+    def record(self, latency, congested=False):
+        """Feed one response: its fetch latency and whether it signalled overload"""
+        with self.lock:
+            self.requests += 1
+            self.errors += bool(congested)
+            self.samples.append((latency, bool(congested)))
+            self.since_change += 1
+            
+            if congested:
+                if self.since_change >= self.current or not self.decreases:
+                    self._cut()
+                return
+            
+            if self.since_change < self.current:
+                return
+            p95, error_rate = self._window_stats()
+            if p95 > self.target_p95:
+                self._cut()
+            elif error_rate <= self.max_error_rate and self.limit < self.maximum:
+                self.increases += 1
+                self._set_limit(self.limit + self.increase)
+            else:
+                self.since_change = 0
+    
+    def snapshot(self):
+        """Controller state for the run metrics"""
+        with self.lock:
+            p95, error_rate = self._window_stats()
+            return {
+                'limit': self.current,
+                'minimum': self.minimum,
+                'maximum': self.maximum,
+                'target_p95': self.target_p95,
+                'max_error_rate': self.max_error_rate,
+                'window_p95': round(p95, 3),
+                'window_error_rate': round(error_rate, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'history': self.history[-200:]
+            }
+
+def is_congestion_status(status_code):
+    """True for HTTP statuses that mean the site is overloaded (429, 5xx)"""
+    return status_code == 429 or status_code >= 500
+
+def is_congestion_error(error):
+    """True for fetch errors that mean the site is overloaded (429, 5xx, connection trouble)"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return is_congestion_status(response.status_code)
+    requests_exceptions = _requests().exceptions
+    return isinstance(error, (requests_exceptions.ConnectionError, requests_exceptions.Timeout))
+
+def _iter_scrape_jobs(urls):
+    """Normalize iter_scrape input to (key, url) pairs without materializing it"""
+    if isinstance(urls, dict):
+        urls = urls.items()
+    for job in urls:
+        if isinstance(job, str):
+            yield job, job
+        else:
+            yield job[0], job[1]
+
+def iter_scrape(urls, *, concurrency=4, cache=None, parser='html.parser', delay=0.0, session=None,
+                records=False, stream=False, change_history=None):
+    """Scrape champion pages concurrently, yielding records as they complete
+    
+    urls may be a list of URLs, (key, url) pairs or a {key: url} mapping, and is
+    consumed lazily: a new page is only started when one of the `concurrency`
+    slots frees up and the caller asks for the next record (back-pressure).
+    concurrency may also be an AdaptiveConcurrency controller, which is fed
+    every fetch and moves the number of slots during the run.
+    cache is any mapping-like object with get()/__setitem__ holding raw HTML,
+    parser is a BeautifulSoup parser name or a callable (html, url) -> dict,
+    and delay is the minimum spacing between requests to the source site.
+    With records=True, 'data' is a typed Champion record instead of a dict.
+    With stream=True pages are parsed from just the sections the extractors
+    read, and the download stops once those are in (see fetch_champion_sections).
+    change_history(key) may return a champion's stored change history, so its
+    page is only read down to the newest known entry (not for callable parsers).
+    
+    Each record is {'key', 'url', 'data', 'error', 'cached', 'failures', 'slow', 'elapsed'};
+    failures lists page sections that could not be extracted and were left out,
+    slow the sections that were kept although they ran over their time budget.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    
+    pacing_lock = threading.Lock()
+    next_request_at = [0.0]
+    controller = concurrency if isinstance(concurrency, AdaptiveConcurrency) else None
+    slots = (lambda: controller.current) if controller is not None else (lambda: concurrency)
+    # One controller sample per HTTP attempt: a throttled attempt counts once, as
+    # congestion, and the retry that follows is timed on its own
+    on_response = ((lambda status, seconds: controller.record(seconds, congested=is_congestion_status(status)))
+                   if controller is not None else None)
+    
+    def scrape_one(key, url):
+        started = time.time()
+        record = {'key': key, 'url': url, 'data': None, 'error': None, 'cached': False, 'failures': [], 'slow': []}
+        try:
+            html = cache.get(url) if cache is not None else None
+            if html is not None:
+                record['cached'] = True
+            else:
+                if delay:
+                    with pacing_lock:
+                        wait_for = next_request_at[0] - time.time()
+                        next_request_at[0] = max(time.time(), next_request_at[0]) + delay
+                    if wait_for > 0:
+                        time.sleep(wait_for)
+                fetch_started = time.time()
+                try:
+                    if stream:
+                        html, raw, record['stream'] = fetch_champion_sections(url, session, on_response=on_response)
+                    else:
+                        html = raw = fetch_champion_page(url, session, on_response=on_response)
+                except Exception as e:
+                    # Errors with a response were already fed to the controller by on_response
+                    if controller is not None and getattr(e, 'response', None) is None:
+                        controller.record(time.time() - fetch_started, congested=is_congestion_error(e))
+                    raise
+                if cache is not None:
+                    cache[url] = raw
+            
+            log = ExtractionLog()
+            known_history = change_history(key) if change_history is not None else None
+            if isinstance(parser, IncrementalPageParser):
+                record['data'] = parser(html, url, log=log, change_history=known_history)
+                if records:
+                    record['data'] = Champion.from_dict(record['data'])
+            elif callable(parser):
+                record['data'] = parser(html, url)
+                if records and isinstance(record['data'], dict):
+                    record['data'] = Champion.from_dict(record['data'])
+            else:
+                record['data'] = parse_champion_page(html, url, parser, as_record=records, log=log,
+                                                     change_history=known_history)
+            record['failures'] = log.failures
+            record['slow'] = log.slow
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        record['elapsed'] = time.time() - started
+        return record
+    
+    jobs = _iter_scrape_jobs(urls)
+    in_flight = set()
+    max_workers = controller.maximum if controller is not None else concurrency
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for key, url in jobs:
+            in_flight.add(executor.submit(scrape_one, key, url))
+            while len(in_flight) >= slots():
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+# Champion output schema: path -> (severity, rule). "[]" means every element of a list.
+CHAMPION_SCHEMA = {
+    'name': ('critical', 'non_empty'),
+    'roles': ('warning', 'non_empty'),
+    'image': ('warning', 'non_empty'),
+    'stats': ('warning', 'non_empty'),
+    'base_stats': ('critical', 'non_zero'),
+    'abilities': ('critical', 'non_empty'),
+    'abilities[].description': ('warning', 'non_empty'),
+    'lanes': ('critical', 'non_empty'),
+    'builds': ('critical', 'non_empty'),
+    'builds[].lane': ('critical', 'non_empty'),
+    'builds[].core_items': ('critical', 'non_empty'),
+    'builds[].core_items[].name': ('critical', 'non_empty'),
+    'builds[].start_items': ('warning', 'non_empty'),
+    'builds[].boots_enchants': ('warning', 'non_empty'),
+    'builds[].example_build': ('warning', 'non_empty'),
+    'builds[].situational_items': ('warning', 'non_empty'),
+    'builds[].summoner_spells': ('warning', 'non_empty'),
+    'builds[].runes.keystone': ('warning', 'non_empty')
+}
+
+VALIDATION_REPORT_DIR = 'logs/validation'
+VALIDATION_CACHE_FILE = 'logs/validation/validation_cache.json'
+DEFAULT_MAX_ERROR_RATE = 0.2
+
+_MISSING = object()
+
+def _rule_non_empty(value):
+    """Rule: present and not empty"""
+    if value is _MISSING or value is None:
+        return 'Missing required field'
+    if isinstance(value, (str, list, dict)) and len(value) == 0:
+        return 'Empty required field'
+    return None
+
+def _rule_non_zero(value):
+    """Rule: present and holding at least one non-zero number"""
+    problem = _rule_non_empty(value)
+    if problem:
+        return problem
+    if isinstance(value, dict) and not any(
+        v > 0 for v in value.values() if isinstance(v, (int, float))
+    ):
+        return 'All-zero values in field'
+    return None
+
+VALIDATION_RULES = {
+    'non_empty': _rule_non_empty,
+    'non_zero': _rule_non_zero
+}
+
+def _compile_schema_path(parts):
+    """Compile a schema path into a function yielding (concrete_path, value) pairs"""
+    if not parts:
+        return lambda value, prefix: [(prefix, value)]
+    
+    head = parts[0]
+    rest = _compile_schema_path(parts[1:])
+    
+    if head.endswith('[]'):
+        key = head[:-2]
+        def resolve(obj, prefix):
+            sequence = obj.get(key) if isinstance(obj, dict) else None
+            if not isinstance(sequence, list):
+                return []
+            resolved = []
+            for i, element in enumerate(sequence):
+                # Name builds by lane so reports read "builds[Mid].core_items"
+                label = element.get('lane', i) if isinstance(element, dict) else i
+                resolved.extend(rest(element, f"{prefix}{key}[{label}]."))
+            return resolved
+    else:
+        def resolve(obj, prefix):
+            value = obj.get(head, _MISSING) if isinstance(obj, dict) else _MISSING
+            if value is _MISSING and len(parts) > 1:
+                return [(prefix + head, _MISSING)]
+            return rest(value, prefix + head + '.') if len(parts) > 1 else [(prefix + head, value)]
+    
+    return resolve
+
+def compile_champion_schema(schema=None):
+    """Compile the schema once into a flat list of (severity, resolver, rule) checks"""
+    compiled = []
+    for path, (severity, rule_name) in (schema or CHAMPION_SCHEMA).items():
+        compiled.append((severity, _compile_schema_path(path.split('.')), VALIDATION_RULES[rule_name]))
+    return compiled
+
+_COMPILED_CHAMPION_SCHEMA = None
+
+def validate_champion_data(champion_data, filename=''):
+    """Validate a champion record against the compiled schema"""
+    global _COMPILED_CHAMPION_SCHEMA
+    if _COMPILED_CHAMPION_SCHEMA is None:
+        _COMPILED_CHAMPION_SCHEMA = compile_champion_schema()
+    
+    issues = {'critical': [], 'warnings': []}
+    label = os.path.basename(str(filename))
+    for severity, resolve, rule in _COMPILED_CHAMPION_SCHEMA:
+        for path, value in resolve(champion_data, ''):
+            problem = rule(value)
+            if problem:
+                if severity == 'critical':
+                    issues['critical'].append(f"CRITICAL: {problem} '{path}' in {label}")
+                else:
+                    issues['warnings'].append(f"WARNING: {problem} '{path}' in {label}")
+    return issues
+
+def validate_champion_file(filename):
+    """Load and validate one champion file (runs inside worker processes)"""
+    champion_data = load_champion_data(filename)
+    if champion_data is None:
+        return str(filename), {'critical': [f"CRITICAL: Unreadable JSON in {os.path.basename(str(filename))}"], 'warnings': []}
+    return str(filename), validate_champion_data(champion_data, filename)
+
+class ValidationReport:
+    """Collects validation results for a run and writes the detailed report"""
+    
+    def __init__(self, max_error_rate=DEFAULT_MAX_ERROR_RATE, min_checked=10):
+        self.max_error_rate = max_error_rate
+        self.min_checked = min_checked
+        self.results = {}
+        self.failing_files = set()
+        self.blocked_files = []
+        self.extraction_failures = {}
+    
+    def record(self, filename, issues, failing=None, blocked=False):
+        """Record one champion; by default it counts as failing if it has critical issues"""
+        self.results[str(filename)] = issues
+        if failing is None:
+            failing = bool(issues['critical'])
+        if failing:
+            self.failing_files.add(str(filename))
+        if blocked:
+            self.blocked_files.append(str(filename))
+    
+    def record_extraction_failures(self, filename, failures):
+        """Page sections that were left out of a champion's fresh data"""
+        self.extraction_failures[str(filename)] = list(failures)
+    
+    def written_slugs(self):
+        """Champion slugs whose files were actually rewritten"""
+        blocked = set(self.blocked_files)
+        return [Path(filename).stem for filename in self.results if filename not in blocked]
+    
+    @property
+    def error_rate(self):
+        if not self.results:
+            return 0.0
+        return len(self.failing_files) / len(self.results)
+    
+    def threshold_exceeded(self):
+        """True once enough champions were checked and too many have critical issues"""
+        if self.max_error_rate is None or len(self.results) < self.min_checked:
+            return False
+        return self.error_rate > self.max_error_rate
+    
+    def write(self, report_dir=VALIDATION_REPORT_DIR):
+        """Write logs/validation/detailed_validation_report_<timestamp>.json"""
+        critical = [message for issues in self.results.values() for message in issues['critical']]
+        warnings = [message for issues in self.results.values() for message in issues['warnings']]
+        timestamp = time.time()
+        report = {
+            'timestamp': timestamp,
+            'stats': {
+                'items_checked': 0,
+                'champions_checked': len(self.results),
+                'runes_checked': 0,
+                'critical_issues': len(critical),
+                'warnings': len(warnings)
+            },
+            'summary': {
+                'total_issues': len(critical) + len(warnings),
+                'critical_issues': len(critical),
+                'warnings': len(warnings),
+                'info_issues': 0,
+                'errors': len(self.blocked_files),
+                'error_rate': round(self.error_rate, 4),
+                'max_error_rate': self.max_error_rate,
+                'threshold_exceeded': self.threshold_exceeded()
+            },
+            'issues': {
+                'critical': critical,
+                'warnings': warnings
+            },
+            'blocked_files': self.blocked_files,
+            'extraction_failures': self.extraction_failures
+        }
+        
+        os.makedirs(report_dir, exist_ok=True)
+        report_file = os.path.join(report_dir, f"detailed_validation_report_{int(timestamp)}.json")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report_file
+
+def save_champion_data(filename, final_data, existing_data=None, validation=None):
+    """Write path: validate changed champions, refuse regressions, then write"""
+    if existing_data is not None and final_data == existing_data:
+        return 'unchanged'
+    
+    issues = validate_champion_data(final_data, filename)
+    
+    # Only block data that is worse than what is already on disk, so a champion
+    # that never had e.g. core items can still be updated. Regressions are also
+    # what counts towards the run's error rate (a site layout change shows up here).
+    regressed = False
+    if issues['critical'] and existing_data:
+        existing_critical = set(validate_champion_data(existing_data, filename)['critical'])
+        regressed = any(message not in existing_critical for message in issues['critical'])
+    blocked = regressed or (validation is not None and validation.threshold_exceeded())
+    
+    if validation is not None:
+        validation.record(filename, issues, failing=regressed, blocked=blocked)
+    
+    if blocked:
+        for message in issues['critical'][:3]:
+            print(f"    ! {message}")
+        return 'blocked'
+    
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(final_data, f, indent=2, ensure_ascii=False)
+    return 'written'
+
+def validate_champion_files(champions_dir='champions_clean', workers=None, changed_only=False,
+                            cache_file=VALIDATION_CACHE_FILE, max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Bulk mode: validate champion files in parallel, skipping files unchanged since the last run"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    
+    report = ValidationReport(max_error_rate=max_error_rate, min_checked=1)
+    to_check = []
+    for champion_file in sorted(Path(champions_dir).glob('*.json')):
+        file_stat = champion_file.stat()
+        signature = [file_stat.st_mtime_ns, file_stat.st_size]
+        cached = cache.get(str(champion_file))
+        if changed_only and cached and cached['signature'] == signature:
+            report.record(champion_file, cached['issues'])
+        else:
+            to_check.append((champion_file, signature))
+    
+    if to_check:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            filenames = [str(champion_file) for champion_file, _ in to_check]
+            for (champion_file, signature), (_, issues) in zip(
+                to_check, executor.map(validate_champion_file, filenames, chunksize=8)
+            ):
+                report.record(champion_file, issues)
+                cache[str(champion_file)] = {'signature': signature, 'issues': issues}
+    
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    
+    return report, len(to_check)
+
+def run_validation(champions_dir='champions_clean', workers=None, changed_only=False,
+                   max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Validate champion output and write the detailed report; returns an exit code"""
+    report, checked = validate_champion_files(champions_dir, workers=workers, changed_only=changed_only,
+                                              max_error_rate=max_error_rate)
+    report_file = report.write()
+    
+    critical = sum(len(issues['critical']) for issues in report.results.values())
+    warnings = sum(len(issues['warnings']) for issues in report.results.values())
+    print(f"Validated {checked} changed / {len(report.results)} total champion files")
+    print(f"Critical issues: {critical}, warnings: {warnings}")
+    print(f"Error rate: {report.error_rate * 100:.1f}% (max {max_error_rate * 100:.1f}%)")
+    print(f"Report: {report_file}")
+    
+    if report.threshold_exceeded():
+        print("[FAIL] Error rate exceeds the threshold")
+        return 1
+    return 0
+
+# Precomputed per-build totals, so the champion page does no arithmetic
+CHAMPION_MAX_LEVEL = 15
+# Item stat key -> base stat key it adds to
+ITEM_STAT_BASE_KEYS = {
+    'attack_damage': 'attack_damage',
+    'health': 'health',
+    'mana': 'mana',
+    'armor': 'armor',
+    'magic_resistance': 'magic_resist',
+    'movement_speed': 'movement_speed',
+    'attack_speed': 'attack_speed',
+    'health_regen': 'health_regen',
+    'mana_regen': 'mana_regen'
+}
+# Growth and item bonuses for these are percentages of the base value
+PERCENT_SCALED_BASE_STATS = ('attack_speed',)
+
+def _item_totals_fields(item):
+    """Cost and stats of an item from its tooltip (memoized); stored values are only a fallback
+    
+    Stored costs can be stale or mis-parsed (older scrapes guessed them with a
+    regex), so the tooltip wins whenever the item has one.
+    """
+    parsed = parse_tooltip(item.get('name'), item.get('description')) if item.get('description') else {}
+    cost = parsed['cost'] if 'cost' in parsed else item.get('cost')
+    stats = parsed['stats'] if 'stats' in parsed else item.get('stats')
+    return cost, stats
+
+def _round_stat(value):
+    value = round(value, 2)
+    return int(value) if float(value).is_integer() else value
+
+def level_scaled_stats(base_stats, growth, item_stats=None, max_level=CHAMPION_MAX_LEVEL):
+    """stat -> [value at level 1..max_level], base plus linear growth plus item bonuses"""
+    item_stats = item_stats or {}
+    scaled = {}
+    for stat, base in base_stats.items():
+        if not isinstance(base, (int, float)) or stat not in growth:
+            continue
+        bonus = {}
+        for item_key, base_key in ITEM_STAT_BASE_KEYS.items():
+            if base_key == stat:
+                bonus = item_stats.get(item_key, {})
+        values = []
+        for level in range(1, max_level + 1):
+            if stat in PERCENT_SCALED_BASE_STATS:
+                percent = growth[stat] * (level - 1) + bonus.get('percentage', 0)
+                value = base * (1 + percent / 100)
+            else:
+                value = (base + growth[stat] * (level - 1) + bonus.get('flat', 0)) * (1 + bonus.get('percentage', 0) / 100)
+            values.append(_round_stat(value))
+        scaled[stat] = values
+    return scaled
+
+def compute_build_totals(build, base_stats=None, growth=None):
+    """Gold cost, summed item stats and level-scaled stats for one build
+    
+    Gold: core_gold and example_gold are the totals of core_items and
+    example_build; cumulative_gold is the running total along example_build.
+    item_stats sums the example build's stats as {stat: {type: value}}.
+    level_stats (only when growth is known) holds each base stat at levels
+    1..CHAMPION_MAX_LEVEL with the example build's bonuses added.
+    """
+    totals = {}
+    core_costs = [_item_totals_fields(item)[0] for item in build.get('core_items') or []]
+    if core_costs and all(cost is not None for cost in core_costs):
+        totals['core_gold'] = sum(core_costs)
+    
+    example_costs = []
+    item_stats = {}
+    for item in build.get('example_build') or []:
+        cost, stats = _item_totals_fields(item)
+        example_costs.append(cost)
+        for key, stat in (stats or {}).items():
+            by_type = item_stats.setdefault(key, {})
+            by_type[stat['type']] = _round_stat(by_type.get(stat['type'], 0) + stat['value'])
+    if example_costs and all(cost is not None for cost in example_costs):
+        totals['cumulative_gold'] = list(itertools.accumulate(example_costs))
+        totals['example_gold'] = totals['cumulative_gold'][-1]
+    if item_stats:
+        totals['item_stats'] = item_stats
+    
+    if base_stats and growth:
+        level_stats = level_scaled_stats(base_stats, growth, item_stats)
+        if level_stats:
+            totals['level_stats'] = level_stats
+    return totals
+
+def add_build_totals(champion_data):
+    """Copy of champion_data with `totals` set on every build (builds are copied, not edited)"""
+    builds = champion_data.get('builds')
+    if not isinstance(builds, list):
+        return champion_data
+    base_stats = champion_data.get('base_stats') if _has_real_numbers(champion_data.get('base_stats')) else None
+    growth = champion_data.get('base_stats_growth') or None
+    with_totals = []
+    for build in builds:
+        build = {key: value for key, value in build.items() if key != 'totals'}
+        totals = compute_build_totals(build, base_stats, growth)
+        if totals:
+            build['totals'] = totals
+        with_totals.append(build)
+    return dict(champion_data, builds=with_totals)
+
+def refresh_build_totals(champions_dir='champions_clean'):
+    """Recompute the stored build totals of every champion file; returns the number rewritten"""
+    rewritten = 0
+    for champion_file in sorted(Path(champions_dir).glob('*.json')):
+        existing_data = load_champion_data(champion_file)
+        if existing_data is None:
+            continue
+        if save_champion_data(champion_file, add_build_totals(existing_data), existing_data) == 'written':
+            rewritten += 1
+    print(f"Build totals: {rewritten} champion files updated")
+    return rewritten
+
+# Declarative field-level merge engine
+# path -> policy. "builds[]." paths apply inside each build; builds are matched
+# to fresh builds by lane, so a reordered page never merges Mid into Jungle.
+MERGE_POLICIES = {
+    'name': 'prefer-non-empty',
+    'roles': 'prefer-non-empty',
+    'image': 'prefer-non-empty',
+    'tier': 'prefer-non-empty',
+    'balance_status': 'prefer-non-empty',
+    'stats': 'prefer-non-empty',
+    'base_stats': 'prefer-non-zero',
+    'base_stats_growth': 'prefer-non-zero',
+    'abilities': 'prefer-non-empty',
+    'lanes': 'prefer-longer',
+    'builds': 'merge-by-lane',
+    'builds[].start_items': 'prefer-non-empty',
+    'builds[].core_items': 'prefer-non-empty',
+    # The main fix of this scraper: boots/enchants are always taken from the page
+    'builds[].boots_enchants': 'prefer-fresh',
+    'builds[].example_build': 'prefer-non-empty',
+    'builds[].situational_items': 'prefer-non-empty',
+    'builds[].summoner_spells': 'prefer-non-empty',
+    'builds[].runes': 'prefer-with-keystone',
+    'builds[].situational_runes': 'prefer-non-empty',
+    # Derived from the merged build, see add_build_totals
+    'builds[].totals': 'always-overwrite',
+    'change_history': 'prepend-new',
+    'patch': 'always-overwrite'
+}
+DEFAULT_MERGE_POLICY = 'keep-existing'
+
+# Targeted refreshes (scheduler, patch day) re-fetch a page because it is
+# expected to have changed, so the page wins for every field it owns; an empty
+# or failed section still keeps the stored value.
+REFRESH_MERGE_POLICIES = dict(MERGE_POLICIES, **{
+    'roles': 'prefer-fresh',
+    'image': 'prefer-fresh',
+    'tier': 'prefer-fresh',
+    'balance_status': 'prefer-fresh',
+    'stats': 'prefer-fresh',
+    'base_stats': 'prefer-fresh-non-zero',
+    'base_stats_growth': 'prefer-fresh-non-zero',
+    'abilities': 'prefer-fresh',
+    'builds[].start_items': 'prefer-fresh',
+    'builds[].core_items': 'prefer-fresh',
+    'builds[].example_build': 'prefer-fresh',
+    'builds[].situational_items': 'prefer-fresh',
+    'builds[].summoner_spells': 'prefer-fresh',
+    'builds[].runes': 'prefer-fresh-with-keystone',
+    'builds[].situational_runes': 'prefer-fresh'
+})
+KNOWN_LANES = ('Jungle', 'Mid', 'Baron', 'Support', 'Dragon')
+
+def _has_real_numbers(value):
+    """True for a dict holding at least one positive number"""
+    return isinstance(value, dict) and any(
+        v > 0 for v in value.values() if isinstance(v, (int, float))
+    )
+
+def _policy_keep_existing(existing, fresh):
+    return fresh if existing is _MISSING else existing
+
+def _policy_always_overwrite(existing, fresh):
+    return existing if fresh is _MISSING else fresh
+
+def _policy_prefer_fresh(existing, fresh):
+    return fresh if fresh is not _MISSING and fresh else existing
+
+def _policy_prefer_non_empty(existing, fresh):
+    if existing is not _MISSING and existing:
+        return existing
+    return fresh if fresh is not _MISSING and fresh else existing
+
+def _policy_prefer_non_zero(existing, fresh):
+    if _has_real_numbers(existing):
+        return existing
+    if _has_real_numbers(fresh) or existing is _MISSING or not existing:
+        return existing if fresh is _MISSING else fresh
+    return existing
+
+def _policy_prefer_fresh_non_zero(existing, fresh):
+    return fresh if _has_real_numbers(fresh) else _policy_prefer_non_zero(existing, fresh)
+
+def _policy_prefer_longer(existing, fresh):
+    if existing is _MISSING:
+        return fresh
+    if fresh is not _MISSING and len(fresh or []) > len(existing or []):
+        return fresh
+    return existing
+
+def _policy_prefer_with_keystone(existing, fresh):
+    if existing is not _MISSING and existing and existing.get('keystone'):
+        return existing
+    if fresh is not _MISSING and fresh and fresh.get('keystone'):
+        return fresh
+    return existing
+
+def _policy_prefer_fresh_with_keystone(existing, fresh):
+    if fresh is not _MISSING and fresh and fresh.get('keystone'):
+        return fresh
+    return _policy_prefer_with_keystone(existing, fresh)
+
+def _policy_prepend_new(existing, fresh):
+    # Change history is append-only: keep what is stored, add entries newer than its head
+    if existing is _MISSING or not existing:
+        return fresh if fresh is not _MISSING and fresh else existing
+    if fresh is _MISSING or not fresh:
+        return existing
+    known = {change_entry_key(entry) for entry in existing}
+    new_entries = []
+    for entry in fresh:
+        if change_entry_key(entry) in known:
+            break
+        new_entries.append(entry)
+    return new_entries + existing if new_entries else existing
+
+MERGE_POLICY_FUNCTIONS = {
+    'keep-existing': _policy_keep_existing,
+    'always-overwrite': _policy_always_overwrite,
+    'prefer-fresh': _policy_prefer_fresh,
+    'prefer-non-empty': _policy_prefer_non_empty,
+    'prefer-non-zero': _policy_prefer_non_zero,
+    'prefer-longer': _policy_prefer_longer,
+    'prefer-with-keystone': _policy_prefer_with_keystone,
+    'prefer-fresh-non-zero': _policy_prefer_fresh_non_zero,
+    'prefer-fresh-with-keystone': _policy_prefer_fresh_with_keystone,
+    'prepend-new': _policy_prepend_new
+}
+
+def _merge_object(existing, fresh, prefix, policies, changes):
+    """Merge two dicts field by field, counting changed fields as it goes"""
+    merged = dict(existing)
+    for key in list(existing) + [key for key in fresh if key not in existing]:
+        path = prefix + key
+        policy = policies.get(path, DEFAULT_MERGE_POLICY)
+        old_value = existing.get(key, _MISSING)
+        new_value = fresh.get(key, _MISSING)
+        
+        if policy == 'merge-by-lane':
+            value = _merge_builds(
+                old_value if isinstance(old_value, list) else [],
+                new_value if isinstance(new_value, list) else [],
+                path, policies, changes)
+        else:
+            value = MERGE_POLICY_FUNCTIONS[policy](old_value, new_value)
+            if value is not old_value and value != old_value:
+                changes[path] = changes.get(path, 0) + 1
+        
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+def _merge_builds(existing_builds, fresh_builds, path, policies, changes):
+    """Merge builds keyed by lane; placeholder lanes fall back to page order"""
+    fresh_by_lane = {}
+    for fresh_build in fresh_builds:
+        fresh_by_lane.setdefault(fresh_build.get('lane'), fresh_build)
+    
+    # Each fresh build merges into at most one existing build (the first with its lane)
+    matches = []
+    used = set()
+    for build in existing_builds:
+        fresh_build = fresh_by_lane.get(build.get('lane'))
+        if fresh_build is not None and id(fresh_build) in used:
+            fresh_build = None
+        if fresh_build is not None:
+            used.add(id(fresh_build))
+        matches.append(fresh_build)
+    
+    # Existing builds with placeholder lanes (e.g. "Build_1") take the remaining fresh builds in order
+    leftovers = [fresh_build for fresh_build in fresh_builds if id(fresh_build) not in used]
+    for i, build in enumerate(existing_builds):
+        if matches[i] is None and build.get('lane') not in KNOWN_LANES and leftovers:
+            matches[i] = leftovers.pop(0)
+            used.add(id(matches[i]))
+    
+    merged_builds = []
+    for build, fresh_build in zip(existing_builds, matches):
+        if fresh_build is None:
+            merged_builds.append(build)
+        else:
+            merged_builds.append(_merge_object(build, fresh_build, f"{path}[].", policies, changes))
+    
+    for fresh_build in fresh_builds:
+        if id(fresh_build) not in used:
+            merged_builds.append(fresh_build)
+            changes[path] = changes.get(path, 0) + 1
+    
+    return merged_builds
+
+def merge_records(existing, fresh, policies=None):
+    """Merge fresh champion data into existing data with per-path policies
+    
+    Returns (merged, field_changes) where field_changes maps each policy path
+    to the number of values it changed, computed in the same pass.
+    """
+    changes = {}
+    if not existing:
+        return fresh, {'.': 1}
+    merged = _merge_object(existing, fresh, '', policies or MERGE_POLICIES, changes)
+    return merged, changes
+
+def smart_merge_champion_data(champion_name, url, patch=None, champions_dir='champions_clean', validation=None,
+                              policies=None):
+    """Smart merge: preserve existing good data, fix missing data (policies as in merge_records)"""
+    # Scrape fresh data, reading change history only down to the newest stored entry
+    filename = f"{champions_dir}/{champion_name.lower().replace(' ', '_').replace('-', '_')}.json"
+    known_history = (load_champion_data(filename) or {}).get('change_history')
+    log = ExtractionLog()
+    fresh_data = scrape_champion_complete(url, change_history=known_history, log=log)
+    
+    if not fresh_data:
+        print(f"  - Failed to scrape fresh data for {champion_name}")
+        return False
+    
+    return merge_champion_data(champion_name, fresh_data, patch=patch, champions_dir=champions_dir,
+                               validation=validation, policies=policies, extraction_failures=log.failures)
+
+TOOLTIP_FIELDS = ('cost', 'stats', 'passive', 'active', 'cooldown')
+
+def _tooltip_entries(value):
+    """Yield every item/rune/spell dict (one with a name and description) nested in value"""
+    if isinstance(value, dict):
+        if value.get('name') and value.get('description'):
+            yield value
+        else:
+            for child in value.values():
+                yield from _tooltip_entries(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _tooltip_entries(child)
+
+def _with_tooltip_fields(value, fresh_fields):
+    """Copy of value with tooltip fields set on each entry, fresh entries matched by name"""
+    if isinstance(value, dict):
+        if value.get('name') and value.get('description'):
+            fields = fresh_fields.get(value['name'])
+            if fields is None:
+                fields = parse_tooltip(value['name'], value['description'])
+            return dict(value, **fields) if fields else value
+        return {key: _with_tooltip_fields(child, fresh_fields) for key, child in value.items()}
+    if isinstance(value, list):
+        return [_with_tooltip_fields(child, fresh_fields) for child in value]
+    return value
+
+def add_tooltip_fields(champion_data, fresh_data=None):
+    """Copy of champion_data whose build items, spells and runes carry the parsed tooltip fields
+    
+    The list merge policies keep stored lists, which may predate structured
+    tooltips; fields come from the fresh entry of the same name, or from the
+    entry's own description when the page no longer shows it.
+    """
+    builds = champion_data.get('builds')
+    if not isinstance(builds, list):
+        return champion_data
+    fresh_fields = {}
+    for entry in _tooltip_entries((fresh_data or {}).get('builds')):
+        fresh_fields.setdefault(entry['name'], {key: entry[key] for key in TOOLTIP_FIELDS if key in entry})
+    return dict(champion_data, builds=_with_tooltip_fields(builds, fresh_fields))
+
+def merge_champion_data(champion_name, fresh_data, patch=None, champions_dir='champions_clean', validation=None,
+                        change_counts=None, policies=None, extraction_failures=None):
+    """Merge freshly scraped data into the stored champion file and save it
+    
+    extraction_failures (ExtractionLog.failures) names page sections that were
+    left out of fresh_data; their stored values are kept and they are reported.
+    """
+    try:
+        # Load existing data
+        filename = f"{champions_dir}/{champion_name.lower().replace(' ', '_').replace('-', '_')}.json"
+        existing_data = load_champion_data(filename)
+        
+        # Stamp the patch this data was scraped for
+        if patch:
+            fresh_data = dict(fresh_data, patch=patch)
+        
+        # Declarative merge: preserve existing, add missing, per MERGE_POLICIES
+        final_data, field_changes = merge_records(existing_data, fresh_data, policies)
+        for failure in extraction_failures or []:
+            kept = 'stored value kept' if existing_data else 'left out'
+            print(f"    ! {failure['section']} not extracted ({failure['error']}), {kept}")
+        if extraction_failures and validation is not None:
+            validation.record_extraction_failures(filename, extraction_failures)
+        if existing_data and not final_data.get('name'):
+            final_data['name'] = champion_name
+        final_data = add_build_totals(add_tooltip_fields(final_data, fresh_data))
+        
+        for path, count in sorted(field_changes.items()):
+            print(f"    + Updated {path}" + (f" ({count} builds)" if count > 1 else ""))
+        if change_counts is not None:
+            for path, count in field_changes.items():
+                change_counts[path] = change_counts.get(path, 0) + count
+        
+        # Save the final data (validated, unchanged champions are skipped)
+        result = save_champion_data(filename, final_data, existing_data, validation=validation)
+        if result == 'blocked':
+            print(f"  - Validation blocked the write for {champion_name}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"  - Error processing {champion_name}: {e}")
+        return False
+
+# Special name mappings for problematic champions
+CHAMPION_NAME_MAPPINGS = {
+    'khazix': 'kha zix',
+    'kha_zix': 'kha zix',
+    'nunu_willump': 'nunu amp willump',
+    'nunu willump': 'nunu amp willump',
+    'wukong': 'vukong',
+    'dr_mundo': 'dr mundo',
+    'dr mundo': 'dr mundo',
+    'jarvan_iv': 'jarvan iv',
+    'jarvan iv': 'jarvan iv',
+    'xin_zhao': 'xin zhao',
+    'xin zhao': 'xin zhao',
+    'aurelion_sol': 'aurelion sol',
+    'aurelion sol': 'aurelion sol',
+    'miss_fortune': 'miss fortune',
+    'miss fortune': 'miss fortune',
+    'twisted_fate': 'twisted fate',
+    'twisted fate': 'twisted fate',
+    'lee_sin': 'lee sin',
+    'lee sin': 'lee sin',
+    'master_yi': 'master yi',
+    'master yi': 'master yi',
+    'tahm_kench': 'tahm kench',
+    'tahm kench': 'tahm kench',
+    'renata_glasc': 'renata glasc',
+    'renata glasc': 'renata glasc'
+}
+
+def find_champion_url(file_stem, champion_urls, verbose=True):
+    """Find the wr-meta URL for a champion file stem with improved name mapping"""
+    # Generate possible keys with improved mapping
+    base_name = file_stem.lower()
+    display_name = file_stem.replace('_', ' ').title().lower()
+    
+    possible_keys = [
+        base_name,
+        display_name,
+        base_name.replace('_', ' '),
+        display_name.replace(' ', '_'),
+        base_name.replace('_', '-'),
+        display_name.replace(' ', '-')
+    ]
+    
+    # Add special mappings
+    if base_name in CHAMPION_NAME_MAPPINGS:
+        possible_keys.append(CHAMPION_NAME_MAPPINGS[base_name])
+    if display_name in CHAMPION_NAME_MAPPINGS:
+        possible_keys.append(CHAMPION_NAME_MAPPINGS[display_name])
+    
+    # Try to find URL
+    for key in possible_keys:
+        if key in champion_urls:
+            if verbose:
+                print(f"  Found URL using key: '{key}'")
+            return champion_urls[key]
+    
+    return None
+
+# Refresh scheduler (daemon mode)
+SCHEDULER_STATE_FILE = 'logs/scheduler_state.json'
+
+# Tier 1 is the top of the meta, so it gets refreshed most often
+SCHEDULER_TIER_WEIGHTS = {1: 3.0, 2: 2.0, 3: 1.5, 4: 1.0, 5: 1.0}
+SCHEDULER_RECENT_CHANGE_DAYS = 30
+SCHEDULER_HOT_BOOST = 1000.0
+SCHEDULER_HOT_MINUTES = 60
+SCHEDULER_MAX_BACKOFF_SECONDS = 6 * 3600
+
+def load_scheduler_state(state_file=SCHEDULER_STATE_FILE):
+    """Load the scheduler state (per-champion refresh bookkeeping)"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    state.setdefault('champions', {})
+    state.setdefault('latest_patch', None)
+    return state
+
+def save_scheduler_state(state, state_file=SCHEDULER_STATE_FILE):
+    """Save the scheduler state atomically so a killed daemon never leaves half a file"""
+    os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, state_file)
+
+def parse_change_date(date_text):
+    """Parse a change history date like '17 APR 2025'"""
+    if not date_text:
+        return None
+    try:
+        return datetime.strptime(' '.join(date_text.split()).title(), '%d %b %Y')
+    except ValueError:
+        return None
+
+def latest_change_patch(champion_data):
+    """Return the patch of the newest change history entry"""
+    for entry in champion_data.get('change_history') or []:
+        if entry.get('patch'):
+            return entry['patch']
+    return None
+
+def patch_sort_key(patch):
+    """Sort key for patch versions like '6.1' or '6.2b'"""
+    match = re.match(r'(\d+)\.(\d+)([a-z]?)', patch or '', re.IGNORECASE)
+    if not match:
+        return (0, 0, '')
+    return (int(match.group(1)), int(match.group(2)), match.group(3).lower())
+
+def summarize_champion_for_scheduler(champion_data, now):
+    """Extract the fields the scheduler ranks on from a champion record"""
+    recent_changes = 0
+    for entry in champion_data.get('change_history') or []:
+        change_date = parse_change_date(entry.get('date'))
+        if change_date and (now - change_date.timestamp()) <= SCHEDULER_RECENT_CHANGE_DAYS * 86400:
+            recent_changes += 1
+    
+    tier = champion_data.get('tier')
+    return {
+        'tier': tier if isinstance(tier, int) else None,
+        'recent_changes': recent_changes,
+        'latest_patch': latest_change_patch(champion_data)
+    }
+
+def champion_refresh_priority(entry, now):
+    """Score how urgently a champion needs a refresh (higher is more urgent)"""
+    staleness_hours = max(0.0, now - entry.get('last_refreshed', 0)) / 3600
+    tier_weight = SCHEDULER_TIER_WEIGHTS.get(entry.get('tier'), 1.0)
+    activity_weight = 1.0 + 0.5 * entry.get('recent_changes', 0)
+    
+    # Smoothed failure rate so one early failure doesn't sink a champion forever
+    failure_rate = entry.get('failures', 0) / (entry.get('attempts', 0) + 2)
+    reliability = 1.0 - failure_rate
+    
+    priority = staleness_hours * tier_weight * activity_weight * reliability
+    if entry.get('hot_until', 0) > now:
+        priority += SCHEDULER_HOT_BOOST
+    return priority
+
+def mark_champions_hot(state, slugs, minutes=SCHEDULER_HOT_MINUTES, now=None):
+    """Push champions to the front of the refresh queue for a while"""
+    now = now or time.time()
+    for slug in slugs:
+        entry = state['champions'].setdefault(slug, {})
+        entry['hot_until'] = max(entry.get('hot_until', 0), now + minutes * 60)
+        entry['retry_after'] = 0
+
+def sync_scheduler_state(state, champions_dir, champion_urls, now=None):
+    """Make sure every champion file has a scheduler entry"""
+    now = now or time.time()
+    for champion_file in Path(champions_dir).glob('*.json'):
+        slug = champion_file.stem
+        entry = state['champions'].setdefault(slug, {})
+        if 'url' not in entry:
+            entry['url'] = find_champion_url(slug, champion_urls, verbose=False)
+        if 'last_refreshed' not in entry:
+            # Best guess for champions the scheduler has never touched
+            entry['last_refreshed'] = champion_file.stat().st_mtime
+        if 'tier' not in entry:
+            champion_data = load_champion_data(champion_file) or {}
+            entry.update(summarize_champion_for_scheduler(champion_data, now))
+    
+    if not state.get('latest_patch'):
+        known_patches = [entry['latest_patch'] for entry in state['champions'].values() if entry.get('latest_patch')]
+        if known_patches:
+            state['latest_patch'] = max(known_patches, key=patch_sort_key)
+    return state
+
+def build_refresh_queue(state, now):
+    """Build a priority queue of champions that are due for a refresh"""
+    queue = []
+    for slug, entry in state['champions'].items():
+        if not entry.get('url'):
+            continue
+        if entry.get('retry_after', 0) > now:
+            continue
+        heapq.heappush(queue, (-champion_refresh_priority(entry, now), slug))
+    return queue
+
+def record_refresh_result(state, slug, success, champions_dir, now=None):
+    """Update scheduler bookkeeping after a refresh attempt"""
+    now = now or time.time()
+    entry = state['champions'].setdefault(slug, {})
+    entry['attempts'] = entry.get('attempts', 0) + 1
+    
+    if success:
+        entry['last_refreshed'] = now
+        entry['consecutive_failures'] = 0
+        entry['retry_after'] = 0
+        entry['hot_until'] = 0
+        
+        champion_data = load_champion_data(Path(champions_dir) / f"{slug}.json") or {}
+        entry.update(summarize_champion_for_scheduler(champion_data, now))
+        
+        # A champion showing a newer patch means the patch just landed:
+        # everything from the top tiers and recently changed gets boosted
+        new_patch = entry.get('latest_patch')
+        if new_patch and patch_sort_key(new_patch) > patch_sort_key(state.get('latest_patch')):
+            if state.get('latest_patch'):
+                hot_slugs = [
+                    other_slug for other_slug, other in state['champions'].items()
+                    if other_slug != slug and (other.get('tier') == 1 or other.get('recent_changes', 0) > 0)
+                ]
+                mark_champions_hot(state, hot_slugs, now=now)
+                print(f"  + Patch {new_patch} detected, boosted {len(hot_slugs)} hot champions")
+            state['latest_patch'] = new_patch
+    else:
+        entry['failures'] = entry.get('failures', 0) + 1
+        entry['consecutive_failures'] = entry.get('consecutive_failures', 0) + 1
+        backoff = min(60 * 2 ** entry['consecutive_failures'], SCHEDULER_MAX_BACKOFF_SECONDS)
+        entry['retry_after'] = now + backoff
+    
+    return entry
+
+DEFAULT_OUTPUTS_EVERY = 10
+DEFAULT_OUTPUTS_INTERVAL = 900
+
+def run_refresh_scheduler(budget_per_hour=60, max_refreshes=None, champions_dir='champions_clean',
+                          state_file=SCHEDULER_STATE_FILE, outputs_every=DEFAULT_OUTPUTS_EVERY,
+                          outputs_interval=DEFAULT_OUTPUTS_INTERVAL):
+    """Daemon mode: keep refreshing the most urgent champion under a fixed request budget
+    
+    Refreshed pages overwrite the fields they own (REFRESH_MERGE_POLICIES).
+    Derived outputs are rebuilt for the champions changed since the last
+    rebuild, every outputs_every refreshes or outputs_interval seconds and
+    when the scheduler stops.
+    """
+    print("=== CHAMPION REFRESH SCHEDULER ===\n")
+    
+    champion_urls = load_champion_urls()
+    if not champion_urls:
+        print("Could not load champion URLs")
+        return
+    
+    state = sync_scheduler_state(load_scheduler_state(state_file), champions_dir, champion_urls)
+    save_scheduler_state(state, state_file)
+    
+    interval = 3600.0 / budget_per_hour
+    print(f"Budget: {budget_per_hour} requests/hour (one refresh every {interval:.1f}s)")
+    print(f"Tracking {len(state['champions'])} champions\n")
+    
+    refreshes = 0
+    pending_slugs = set()
+    pending_refreshes = 0
+    last_outputs = time.time()
+    
+    def flush_outputs():
+        nonlocal pending_refreshes, last_outputs
+        if pending_slugs:
+            write_run_outputs(champions_dir, changed_slugs=sorted(pending_slugs), patch=state.get('current_patch'))
+            pending_slugs.clear()
+        pending_refreshes = 0
+        last_outputs = time.time()
+    
+    try:
+        while max_refreshes is None or refreshes < max_refreshes:
+            started = time.time()
+            queue = build_refresh_queue(state, started)
+            
+            if queue:
+                negative_priority, slug = heapq.heappop(queue)
+                entry = state['champions'][slug]
+                champion_name = slug.replace('_', ' ').title()
+                print(f"[{refreshes + 1}] Refreshing {champion_name} (priority {-negative_priority:.1f})...")
+                
+                validation = ValidationReport()
+                success = smart_merge_champion_data(champion_name, entry['url'], patch=state.get('current_patch'),
+                                                     champions_dir=champions_dir, validation=validation,
+                                                     policies=REFRESH_MERGE_POLICIES)
+                record_refresh_result(state, slug, success, champions_dir)
+                save_scheduler_state(state, state_file)
+                print(f"  [{'OK' if success else 'FAIL'}] {champion_name}")
+                refreshes += 1
+                pending_refreshes += 1
+                pending_slugs.update(validation.written_slugs())
+            
+            # Aggregates, index, shards and bundles cover every champion, so they
+            # are rebuilt in batches rather than after each refresh
+            if pending_refreshes >= outputs_every or time.time() - last_outputs >= outputs_interval:
+                flush_outputs()
+            
+            # Spend the budget evenly so load on the source site stays flat
+            time.sleep(max(0.0, interval - (time.time() - started)))
+    finally:
+        flush_outputs()
+    
+    print(f"\nScheduler stopped after {refreshes} refreshes")
+
+# Patch-notes-triggered targeted refresh
+PATCH_NOTES_INDEX_URL = 'https://wildrift.leagueoflegends.com/en-us/news/game-updates/'
+PATCH_NOTES_URL_TEMPLATE = 'https://wildrift.leagueoflegends.com/en-us/news/game-updates/wild-rift-patch-notes-{slug}/'
+
+# Same patterns utils/patchFetcher.ts uses to spot patch notes links
+PATCH_NOTES_LINK_PATTERNS = [
+    re.compile(r'wild-rift-patch-notes-(\d+)-(\d+)([a-z]?)', re.IGNORECASE),
+    re.compile(r'patch-notes-(\d+)-(\d+)([a-z]?)', re.IGNORECASE),
+    re.compile(r'patch-(\d+)-(\d+)([a-z]?)', re.IGNORECASE)
+]
+PATCH_VERSION_PATTERN = re.compile(r'patch(?:\s+notes)?[\s\-]*(\d+)[.\-](\d+)([a-z]?)\b', re.IGNORECASE)
+PATCH_HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5']
+
+PATCH_CHANGE_KEYWORDS = [
+    ('nerf', ['nerf', '↓']),
+    ('buff', ['buff', '↑']),
+    ('rework', ['rework']),
+    ('adjustment', ['adjust'])
+]
+
+def normalize_game_name(name):
+    """Normalize a champion/item name for matching ('Kha'Zix' -> 'khazix')"""
+    return re.sub(r'[^a-z0-9]', '', (name or '').lower().replace('&amp;', '&'))
+
+def classify_patch_change(text):
+    """Classify a patch notes snippet as buff/nerf/rework/adjustment"""
+    lowered = (text or '').lower()
+    for change_type, keywords in PATCH_CHANGE_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return change_type
+    return None
+
+def find_latest_patch_notes_url(index_html):
+    """Find the newest patch notes link on the game updates page"""
+    latest_version = None
+    for pattern in PATCH_NOTES_LINK_PATTERNS:
+        for major, minor, letter in pattern.findall(index_html):
+            version = (int(major), int(minor), letter.lower())
+            if latest_version is None or version > latest_version:
+                latest_version = version
+    
+    if not latest_version:
+        return None
+    major, minor, letter = latest_version
+    return PATCH_NOTES_URL_TEMPLATE.format(slug=f"{major}-{minor}{letter}")
+
+def load_patch_notes(source=None):
+    """Load patch notes HTML from a local saved copy, a URL, or the latest live page"""
+    if source and os.path.exists(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            return f.read(), source
+    
+    requests = _requests()
+    url = source
+    if not url:
+        response = requests.get(PATCH_NOTES_INDEX_URL, headers=DEFAULT_HEADERS)
+        response.raise_for_status()
+        url = find_latest_patch_notes_url(response.text)
+        if not url:
+            raise ValueError("No patch notes link found on the game updates page")
+    
+    response = requests.get(url, headers=DEFAULT_HEADERS)
+    response.raise_for_status()
+    return response.text, url
+
+def detect_patch_version(html, source=''):
+    """Detect the patch version from the patch notes source name or page text"""
+    for pattern in PATCH_NOTES_LINK_PATTERNS:
+        match = pattern.search(source or '')
+        if match:
+            return f"{match.group(1)}.{match.group(2)}{match.group(3).lower()}"
+    
+    title_match = re.search(r'<title[^>]*>([^<]*)</title>', html, re.IGNORECASE)
+    for text in ([title_match.group(1)] if title_match else []) + [html[:20000]]:
+        match = PATCH_VERSION_PATTERN.search(text)
+        if match:
+            return f"{match.group(1)}.{match.group(2)}{match.group(3).lower()}"
+    return None
+
+def load_patch_name_lookups(champions_dir='champions_clean'):
+    """Build normalized name -> champion slug / item name lookups"""
+    champion_lookup = {}
+    for champion_file in Path(champions_dir).glob('*.json'):
+        champion_lookup[normalize_game_name(champion_file.stem)] = champion_file.stem
+    
+    try:
+        with open('champion_index.json', 'r', encoding='utf-8') as f:
+            for slug, info in json.load(f).items():
+                if slug in champion_lookup.values() and info.get('name'):
+                    champion_lookup[normalize_game_name(info['name'])] = slug
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    
+    item_lookup = {}
+    for item_file in Path('items').glob('*.json'):
+        item_data = load_champion_data(item_file) or {}
+        if item_file.stem == 'index':
+            item_names = list(item_data.get('items', {}))
+        else:
+            item_names = [item_data.get('name')]
+        for item_name in item_names:
+            if item_name:
+                item_lookup[normalize_game_name(item_name)] = item_name
+    
+    return champion_lookup, item_lookup
+
+def heading_section_text(heading, max_chars=2000):
+    """Collect the text between a heading and the next heading"""
+    parts = []
+    length = 0
+    for element in heading.next_elements:
+        if getattr(element, 'name', None) in PATCH_HEADING_TAGS:
+            break
+        if isinstance(element, str):
+            text = element.strip()
+            if text:
+                parts.append(text)
+                length += len(text)
+                if length >= max_chars:
+                    break
+    return ' '.join(parts)
+
+def extract_patch_changes(html, champion_lookup, item_lookup):
+    """Extract which champions and items were buffed, nerfed or adjusted"""
+    soup = _beautiful_soup()(html, 'html.parser')
+    changes = {'champions': {}, 'items': {}}
+    section_type = None
+    
+    for heading in soup.find_all(PATCH_HEADING_TAGS):
+        heading_text = heading.get_text(' ', strip=True)
+        key = normalize_game_name(heading_text)
+        
+        if key in champion_lookup or key in item_lookup:
+            change_type = (classify_patch_change(heading_text)
+                           or section_type
+                           or classify_patch_change(heading_section_text(heading))
+                           or 'adjustment')
+            if key in champion_lookup:
+                changes['champions'][champion_lookup[key]] = change_type
+            else:
+                changes['items'][item_lookup[key]] = change_type
+        else:
+            # Section headings like "Champion Buffs" / "Item Nerfs" set the context
+            section_type = classify_patch_change(heading_text)
+    
+    return changes
+
+def champion_build_item_names(champion_data):
+    """Collect every item name used in a champion's builds"""
+    item_names = set()
+    for build in champion_data.get('builds') or []:
+        for field in ['start_items', 'core_items', 'boots_enchants', 'example_build']:
+            for item in build.get(field) or []:
+                if item.get('name'):
+                    item_names.add(item['name'])
+        for situation in build.get('situational_items') or []:
+            for item in situation.get('items') or []:
+                if item.get('name'):
+                    item_names.add(item['name'])
+    return item_names
+
+def find_champions_affected_by_patch(changes, champions_dir='champions_clean'):
+    """Champions changed directly plus champions whose builds use a changed item"""
+    affected = set(changes['champions'])
+    changed_items = set(changes['items'])
+    
+    if changed_items:
+        for champion_file in Path(champions_dir).glob('*.json'):
+            if champion_file.stem in affected:
+                continue
+            champion_data = load_champion_data(champion_file) or {}
+            if champion_build_item_names(champion_data) & changed_items:
+                affected.add(champion_file.stem)
+    
+    return sorted(affected)
+
+def run_patch_refresh(source=None, schedule_only=False, champions_dir='champions_clean',
+                      state_file=SCHEDULER_STATE_FILE):
+    """Ingest patch notes and re-scrape only the champions the patch touched
+    
+    Refreshed pages overwrite the fields they own (REFRESH_MERGE_POLICIES), so
+    a buffed or nerfed champion gets its new tier and builds, not just a patch stamp.
+    """
+    print("=== PATCH-TRIGGERED REFRESH ===\n")
+    
+    try:
+        html, source_name = load_patch_notes(source)
+    except Exception as e:
+        print(f"Could not load patch notes: {e}")
+        return
+    
+    version = detect_patch_version(html, source_name)
+    champion_lookup, item_lookup = load_patch_name_lookups(champions_dir)
+    changes = extract_patch_changes(html, champion_lookup, item_lookup)
+    affected = find_champions_affected_by_patch(changes, champions_dir)
+    
+    print(f"Patch: {version or 'unknown'} ({source_name})")
+    print(f"Changed champions: {len(changes['champions'])}")
+    for slug, change_type in sorted(changes['champions'].items()):
+        print(f"  - {slug}: {change_type}")
+    print(f"Changed items: {len(changes['items'])}")
+    for item_name, change_type in sorted(changes['items'].items()):
+        print(f"  - {item_name}: {change_type}")
+    print(f"Champions to refresh: {len(affected)}\n")
+    
+    champion_urls = load_champion_urls()
+    state = sync_scheduler_state(load_scheduler_state(state_file), champions_dir, champion_urls)
+    if version:
+        state['current_patch'] = version
+    mark_champions_hot(state, affected)
+    save_scheduler_state(state, state_file)
+    
+    if schedule_only:
+        print("Scheduled for the refresh daemon")
+        return
+    
+    refreshed = 0
+    validation = ValidationReport()
+    for i, slug in enumerate(affected, 1):
+        url = state['champions'][slug].get('url')
+        champion_name = slug.replace('_', ' ').title()
+        if not url:
+            print(f"[{i}/{len(affected)}] [WARN] No URL found for {champion_name}")
+            continue
+        
+        print(f"[{i}/{len(affected)}] Refreshing {champion_name}...")
+        success = smart_merge_champion_data(champion_name, url, patch=version, champions_dir=champions_dir,
+                                            validation=validation, policies=REFRESH_MERGE_POLICIES)
+        record_refresh_result(state, slug, success, champions_dir)
+        save_scheduler_state(state, state_file)
+        if success:
+            refreshed += 1
+        
+        # Be respectful to the server
+        time.sleep(1.5)
+    
+    print(f"\nRefreshed {refreshed}/{len(affected)} champions for patch {version or 'unknown'}")
+    if validation.results:
+        print(f"Validation Report: {validation.write()}")
+    changed_slugs = validation.written_slugs()
+    if changed_slugs:
+        write_run_outputs(champions_dir, changed_slugs=changed_slugs, patch=version)
+
+# Distributed worker mode: leased work queue with a pluggable backend
+DEFAULT_WORK_QUEUE = 'logs/work_queue.sqlite3'
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RATE_PER_MINUTE = 40
+
+class WorkQueue:
+    """Interface for leased work queue backends
+    
+    Jobs move pending -> leased -> done/failed. A lease carries a token and an
+    expiry; workers heartbeat to extend it, and expired leases go back to
+    pending. complete() only succeeds for the current lease holder, so every
+    job stores exactly one result even if a slow worker finishes late.
+    """
+    
+    def enqueue(self, jobs):
+        raise NotImplementedError
+    
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        raise NotImplementedError
+    
+    def heartbeat(self, job_id, lease_token, lease_seconds=DEFAULT_LEASE_SECONDS):
+        raise NotImplementedError
+    
+    def complete(self, job_id, lease_token, result):
+        raise NotImplementedError
+    
+    def fail(self, job_id, lease_token, error):
+        raise NotImplementedError
+    
+    def requeue_expired(self):
+        raise NotImplementedError
+    
+    def acquire_rate_token(self, rate_per_minute):
+        raise NotImplementedError
+    
+    def unapplied_results(self):
+        raise NotImplementedError
+    
+    def mark_applied(self, job_id):
+        raise NotImplementedError
+    
+    def counts(self):
+        raise NotImplementedError
+    
+    def close(self):
+        pass
+
+class SQLiteWorkQueue(WorkQueue):
+    """SQLite-backed work queue; safe for many processes sharing one file"""
+    
+    def __init__(self, path=DEFAULT_WORK_QUEUE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        import sqlite3
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_token TEXT,
+                lease_expires REAL DEFAULT 0,
+                available_at REAL DEFAULT 0,
+                worker TEXT,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                updated REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+            CREATE TABLE IF NOT EXISTS results (
+                job_id TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                worker TEXT,
+                applied INTEGER DEFAULT 0,
+                created REAL
+            );
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                name TEXT PRIMARY KEY,
+                tokens REAL,
+                updated REAL
+            );
+        """)
+    
+    def _transaction(self):
+        """BEGIN IMMEDIATE so concurrent workers serialize on the write lock"""
+        queue = self
+        
+        class Transaction:
+            def __enter__(self):
+                queue.db.execute('BEGIN IMMEDIATE')
+                return queue.db
+            
+            def __exit__(self, exc_type, exc, tb):
+                queue.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+                return False
+        
+        return Transaction()
+    
+    def enqueue(self, jobs):
+        """Add (job_id, payload) pairs; already-queued job ids are reset to pending"""
+        now = time.time()
+        with self._transaction() as db:
+            for job_id, payload in jobs:
+                db.execute(
+                    "INSERT INTO jobs (id, payload, status, updated) VALUES (?, ?, 'pending', ?) "
+                    "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, status = 'pending', "
+                    "lease_token = NULL, attempts = 0, available_at = 0, updated = excluded.updated",
+                    (job_id, json.dumps(payload, ensure_ascii=False), now))
+                db.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+    
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Lease the next available job, or return None"""
+        import uuid
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE status = 'pending' AND available_at <= ? "
+                "ORDER BY available_at, id LIMIT 1", (now,)).fetchone()
+            if not row:
+                return None
+            lease_token = uuid.uuid4().hex
+            db.execute(
+                "UPDATE jobs SET status = 'leased', lease_token = ?, lease_expires = ?, worker = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (lease_token, now + lease_seconds, worker_id, now, row[0]))
+        return {'id': row[0], 'payload': json.loads(row[1]), 'attempts': row[2] + 1, 'lease_token': lease_token}
+    
+    def heartbeat(self, job_id, lease_token, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend a lease; False means the lease was lost"""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now + lease_seconds, now, job_id, lease_token))
+            return cursor.rowcount == 1
+    
+    def complete(self, job_id, lease_token, result, worker_id=None):
+        """Store the job's result; only the current lease holder can complete it"""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'done', lease_token = NULL, updated = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now, job_id, lease_token))
+            if cursor.rowcount != 1:
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO results (job_id, result, worker, applied, created) VALUES (?, ?, ?, 0, ?)",
+                (job_id, json.dumps(result, ensure_ascii=False), worker_id, now))
+            return True
+    
+    def fail(self, job_id, lease_token, error):
+        """Release a failed job for retry with backoff, or mark it failed for good"""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (job_id, lease_token)).fetchone()
+            if not row:
+                return False
+            if row[0] >= self.max_attempts:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', lease_token = NULL, last_error = ?, updated = ? WHERE id = ?",
+                    (error, now, job_id))
+            else:
+                db.execute(
+                    "UPDATE jobs SET status = 'pending', lease_token = NULL, last_error = ?, available_at = ?, "
+                    "updated = ? WHERE id = ?",
+                    (error, now + 30 * 2 ** row[0], now, job_id))
+            return True
+    
+    def requeue_expired(self):
+        """Put jobs whose workers stopped heartbeating back in the queue, or fail them after max_attempts"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', lease_token = NULL, last_error = 'lease expired', updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, now, self.max_attempts))
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'pending', lease_token = NULL, updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ?", (now, now))
+            return cursor.rowcount
+    
+    def acquire_rate_token(self, rate_per_minute):
+        """Shared token bucket across all workers; returns seconds to wait (0 = go)"""
+        rate = rate_per_minute / 60.0
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT tokens, updated FROM rate_limit WHERE name = 'fetch'").fetchone()
+            tokens, updated = row if row else (1.0, now)
+            tokens = min(1.0, tokens + (now - updated) * rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                wait = 0.0
+            else:
+                wait = (1.0 - tokens) / rate
+            db.execute("INSERT OR REPLACE INTO rate_limit (name, tokens, updated) VALUES ('fetch', ?, ?)",
+                       (tokens, now))
+        return wait
+    
+    def unapplied_results(self):
+        """Results stored by workers but not yet written to the champion store"""
+        rows = self.db.execute(
+            "SELECT results.job_id, jobs.payload, results.result FROM results "
+            "JOIN jobs ON jobs.id = results.job_id WHERE results.applied = 0 ORDER BY results.created").fetchall()
+        return [(job_id, json.loads(payload), json.loads(result)) for job_id, payload, result in rows]
+    
+    def mark_applied(self, job_id):
+        with self._transaction() as db:
+            db.execute("UPDATE results SET applied = 1 WHERE job_id = ?", (job_id,))
+    
+    def counts(self):
+        counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        counts['unapplied_results'] = self.db.execute(
+            "SELECT COUNT(*) FROM results WHERE applied = 0").fetchone()[0]
+        return counts
+    
+    def close(self):
+        self.db.close()
+
+WORK_QUEUE_BACKENDS = {
+    'sqlite': SQLiteWorkQueue
+}
+
+def open_work_queue(location=DEFAULT_WORK_QUEUE):
+    """Open a work queue from 'backend://path' (plain paths use SQLite)"""
+    backend, separator, path = location.partition('://')
+    if not separator:
+        backend, path = 'sqlite', location
+    if backend not in WORK_QUEUE_BACKENDS:
+        raise ValueError(f"Unknown work queue backend: {backend}")
+    return WORK_QUEUE_BACKENDS[backend](path)
+
+def enqueue_champion_jobs(queue, mapping_file='champion_url_mapping.json', champions_dir='champions_clean',
+                          namespace=None, slugs=None):
+    """Queue one scrape job per champion; namespace separates mirrors/languages/snapshots"""
+    champion_urls = load_champion_urls(mapping_file)
+    jobs = []
+    for champion_file in sorted(Path(champions_dir).glob('*.json')):
+        slug = champion_file.stem
+        if slugs and slug not in slugs:
+            continue
+        url = find_champion_url(slug, champion_urls, verbose=False)
+        if url:
+            job_id = f"{namespace}:{slug}" if namespace else slug
+            jobs.append((job_id, {'slug': slug, 'url': url, 'namespace': namespace}))
+    queue.enqueue(jobs)
+    return len(jobs)
+
+def run_queue_worker(queue, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+                     rate_per_minute=DEFAULT_RATE_PER_MINUTE, exit_when_idle=True, champions_dir='champions_clean'):
+    """Worker mode: lease champion jobs, scrape them and store results until the queue drains
+    
+    A champion file in champions_dir (if the worker has one) bounds the change-history walk.
+    """
+    import socket
+    import threading
+    
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    print(f"=== QUEUE WORKER {worker_id} ===\n")
+    
+    completed = 0
+    failed = 0
+    while True:
+        queue.requeue_expired()
+        job = queue.lease(worker_id, lease_seconds)
+        if not job:
+            counts = queue.counts()
+            if exit_when_idle and not counts.get('pending') and not counts.get('leased'):
+                break
+            time.sleep(min(5.0, lease_seconds / 4))
+            continue
+        
+        # Keep the lease alive while the page is fetched and parsed
+        stop_heartbeat = threading.Event()
+        
+        def keep_alive():
+            # SQLite connections belong to the thread that opened them
+            heartbeat_queue = open_work_queue(f"sqlite://{queue.path}") if isinstance(queue, SQLiteWorkQueue) else queue
+            try:
+                while not stop_heartbeat.wait(lease_seconds / 3):
+                    if not heartbeat_queue.heartbeat(job['id'], job['lease_token'], lease_seconds):
+                        break
+            finally:
+                if heartbeat_queue is not queue:
+                    heartbeat_queue.close()
+        
+        heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat_thread.start()
+        try:
+            # Global rate limit shared by every worker on the queue
+            wait = queue.acquire_rate_token(rate_per_minute)
+            while wait > 0:
+                time.sleep(wait)
+                wait = queue.acquire_rate_token(rate_per_minute)
+            
+            print(f"[{job['id']}] Scraping (attempt {job['attempts']})...")
+            url = job['payload']['url']
+            fresh_data = error = None
+            try:
+                known_history = (load_champion_data(Path(champions_dir) / f"{job['payload']['slug']}.json")
+                                 or {}).get('change_history')
+                fresh_data = parse_champion_page(fetch_champion_page(url), url, change_history=known_history)
+            except Exception as e:
+                error = repr(e)
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+        
+        if fresh_data:
+            if queue.complete(job['id'], job['lease_token'], fresh_data, worker_id=worker_id):
+                completed += 1
+                print(f"  [OK] {job['id']}")
+            else:
+                print(f"  [WARN] Lease lost for {job['id']}, result discarded")
+        else:
+            error = error or 'no champion data on the page'
+            queue.fail(job['id'], job['lease_token'], error)
+            failed += 1
+            print(f"  [FAIL] {job['id']}: {error}")
+    
+    print(f"\nWorker {worker_id} finished: {completed} completed, {failed} failed")
+    return completed
+
+def collect_queue_results(queue, champions_dir='champions_clean', patch=None):
+    """Converge worker results into the champion store, each result applied once"""
+    validation = ValidationReport()
+    applied = 0
+    for job_id, payload, fresh_data in queue.unapplied_results():
+        champion_name = payload['slug'].replace('_', ' ').title()
+        print(f"[{job_id}] Merging {champion_name}...")
+        # Merging is idempotent, so a crash before mark_applied only repeats the same write
+        merge_champion_data(champion_name, fresh_data, patch=patch, champions_dir=champions_dir,
+                            validation=validation)
+        queue.mark_applied(job_id)
+        applied += 1
+    
+    if validation.results:
+        print(f"Validation Report: {validation.write()}")
+    if applied:
+        write_run_outputs(champions_dir, changed_slugs=validation.written_slugs(), patch=patch)
+    print(f"\nApplied {applied} results")
+    return applied
+
+def run_queue_command(action, queue_location=DEFAULT_WORK_QUEUE, **options):
+    """Dispatch the queue subcommand"""
+    queue = open_work_queue(queue_location)
+    
+    if action == 'add':
+        count = enqueue_champion_jobs(queue, mapping_file=options.get('mapping', 'champion_url_mapping.json'),
+                                      champions_dir=options.get('champions_dir', 'champions_clean'),
+                                      namespace=options.get('namespace'), slugs=options.get('slugs'))
+        print(f"Queued {count} champion jobs")
+    elif action == 'work':
+        run_queue_worker(queue, worker_id=options.get('worker_id'), lease_seconds=options.get('lease_seconds', DEFAULT_LEASE_SECONDS),
+                         rate_per_minute=options.get('rate_per_minute', DEFAULT_RATE_PER_MINUTE),
+                         exit_when_idle=not options.get('forever'),
+                         champions_dir=options.get('champions_dir', 'champions_clean'))
+    elif action == 'collect':
+        collect_queue_results(queue, champions_dir=options.get('champions_dir', 'champions_clean'))
+    
+    for status, count in sorted(queue.counts().items()):
+        print(f"  {status}: {count}")
+
+# Precomputed cross-champion aggregates for the site
+AGGREGATES_DIR = 'aggregates'
+AGGREGATE_ITEM_SECTIONS = ('start_items', 'core_items', 'boots_enchants', 'example_build')
+
+def _build_item_names(build, sections=AGGREGATE_ITEM_SECTIONS):
+    """Unique item names used by a build record in the given sections"""
+    names = []
+    for section in sections:
+        for item in getattr(build, section) or []:
+            if item.name and item.name not in names:
+                names.append(item.name)
+    return names
+
+def _build_rune_names(build):
+    """Keystone, primary and secondary rune names of a build record"""
+    names = []
+    if build.runes:
+        runes = ([build.runes.keystone] if build.runes.keystone else []) + (build.runes.primary or []) + (build.runes.secondary or [])
+        for rune in runes:
+            if rune.name and rune.name not in names:
+                names.append(rune.name)
+    return names
+
+def _incidence_matrix(rows, vocabulary):
+    """Build a (rows x vocabulary) 0/1 matrix from lists of names"""
+    import numpy as np
+    column = {name: i for i, name in enumerate(vocabulary)}
+    matrix = np.zeros((len(rows), len(vocabulary)), dtype=np.int32)
+    for i, names in enumerate(rows):
+        matrix[i, [column[name] for name in names]] = 1
+    return matrix
+
+def _usage_by_lane(build_lanes, build_names, lanes, top=None):
+    """Count how many builds per lane use each name: one-hot(lanes)^T @ incidence"""
+    import numpy as np
+    vocabulary = sorted({name for names in build_names for name in names})
+    if not vocabulary:
+        return {lane: [] for lane in lanes}
+    
+    incidence = _incidence_matrix(build_names, vocabulary)
+    lane_index = {lane: i for i, lane in enumerate(lanes)}
+    lane_one_hot = np.zeros((len(build_lanes), len(lanes)), dtype=np.int32)
+    lane_one_hot[np.arange(len(build_lanes)), [lane_index[lane] for lane in build_lanes]] = 1
+    counts = lane_one_hot.T @ incidence
+    builds_per_lane = lane_one_hot.sum(axis=0)
+    
+    usage = {}
+    for lane, i in lane_index.items():
+        order = np.argsort(-counts[i], kind='stable')
+        usage[lane] = [
+            {
+                'name': vocabulary[j],
+                'count': int(counts[i, j]),
+                'rate': round(float(counts[i, j]) / float(builds_per_lane[i]), 4)
+            }
+            for j in order[:top] if counts[i, j] > 0
+        ]
+    return usage
+
+def _cooccurrence(build_names, min_count=1):
+    """Core item co-occurrence: incidence^T @ incidence"""
+    vocabulary = sorted({name for names in build_names for name in names})
+    if not vocabulary:
+        return {'items': [], 'counts': []}
+    incidence = _incidence_matrix(build_names, vocabulary)
+    matrix = incidence.T @ incidence
+    keep = matrix.diagonal() >= min_count
+    return {
+        'items': [name for name, kept in zip(vocabulary, keep) if kept],
+        'counts': matrix[keep][:, keep].tolist()
+    }
+
+def compute_aggregates(champions_dir='champions_clean'):
+    """Compute item/rune usage per lane, tier lists and core item co-occurrence"""
+    build_lanes = []
+    build_items = []
+    build_core_items = []
+    build_runes = []
+    tier_lists = {'by_role': {}, 'by_lane': {}}
+    champion_count = 0
+    
+    for slug, champion in load_champion_records(champions_dir):
+        champion_count += 1
+        entry = {'slug': slug, 'name': champion.name or slug, 'tier': champion.tier}
+        for role in champion.roles or []:
+            tier_lists['by_role'].setdefault(role, []).append(entry)
+        for lane in champion.lanes or []:
+            tier_lists['by_lane'].setdefault(lane, []).append(entry)
+        
+        for build in champion.builds or []:
+            if build.lane not in KNOWN_LANES:
+                continue
+            build_lanes.append(build.lane)
+            build_items.append(_build_item_names(build))
+            build_core_items.append(_build_item_names(build, ('core_items',)))
+            build_runes.append(_build_rune_names(build))
+    
+    # Tier 1 is the top of the meta; unknown tiers go last
+    for groups in tier_lists.values():
+        for entries in groups.values():
+            entries.sort(key=lambda entry: (entry['tier'] if isinstance(entry['tier'], int) else 99, entry['name']))
+    
+    lanes = [lane for lane in KNOWN_LANES if lane in build_lanes]
+    core_cooccurrence = {'all': _cooccurrence(build_core_items, min_count=2), 'by_lane': {}}
+    for lane in lanes:
+        lane_core_items = [names for build_lane, names in zip(build_lanes, build_core_items) if build_lane == lane]
+        core_cooccurrence['by_lane'][lane] = _cooccurrence(lane_core_items, min_count=2)
+    
+    return {
+        'item_usage_by_lane': _usage_by_lane(build_lanes, build_items, lanes),
+        'core_item_usage_by_lane': _usage_by_lane(build_lanes, build_core_items, lanes),
+        'rune_usage_by_lane': _usage_by_lane(build_lanes, build_runes, lanes),
+        'tier_lists': tier_lists,
+        'core_item_cooccurrence': core_cooccurrence,
+        'champion_count': champion_count,
+        'build_count': len(build_lanes)
+    }
+
+def write_aggregates(champions_dir='champions_clean', output_dir=AGGREGATES_DIR):
+    """Write each aggregate as a small precomputed JSON file plus an index"""
+    try:
+        aggregates = compute_aggregates(champions_dir)
+    except ImportError:
+        print("Skipping aggregates: numpy is not installed")
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    index = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'champion_count': aggregates.pop('champion_count'),
+        'build_count': aggregates.pop('build_count'),
+        'files': {}
+    }
+    for name, data in aggregates.items():
+        filename = f"{name}.json"
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        index['files'][name] = filename
+    
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    
+    print(f"Aggregates: {len(index['files'])} files in {output_dir}/ "
+          f"({index['champion_count']} champions, {index['build_count']} builds)")
+    return index
+
+# Prebuilt full-text search index
+SEARCH_INDEX_FILE = 'search_index.json'
+SEARCH_INDEX_STATE_FILE = 'logs/search_index_state.json'
+SEARCH_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)?", re.UNICODE)
+SEARCH_MIN_TOKEN_LENGTH = 2
+
+# How much a term counts depending on where it appears
+SEARCH_FIELD_WEIGHTS = {
+    'name': 10,
+    'ability_name': 5,
+    'role': 3,
+    'lane': 3,
+    'text': 1
+}
+
+def tokenize_search_text(text):
+    """Lowercase tokens; "Kha'Zix" yields khazix, kha and zix"""
+    tokens = []
+    for match in SEARCH_TOKEN_PATTERN.findall((text or '').lower()):
+        parts = match.split("'")
+        if len(parts) > 1:
+            tokens.append(''.join(parts))
+        tokens.extend(parts)
+    return [token for token in tokens if len(token) >= SEARCH_MIN_TOKEN_LENGTH]
+
+def _add_search_terms(terms, text, field):
+    weight = SEARCH_FIELD_WEIGHTS[field]
+    for token in tokenize_search_text(text):
+        terms[token] = terms.get(token, 0) + weight
+
+def champion_search_documents(slug, champion):
+    """Search documents for a champion record and the items/runes its builds use"""
+    champion_terms = {}
+    _add_search_terms(champion_terms, champion.name or slug.replace('_', ' '), 'name')
+    for role in champion.roles or []:
+        _add_search_terms(champion_terms, role, 'role')
+    for lane in champion.lanes or []:
+        _add_search_terms(champion_terms, lane, 'lane')
+    for ability in champion.abilities or []:
+        _add_search_terms(champion_terms, ability.name, 'ability_name')
+        _add_search_terms(champion_terms, ability.description, 'text')
+    for entry in champion.change_history or []:
+        for change in entry.changes or []:
+            _add_search_terms(champion_terms, change.get('ability'), 'text')
+            for line in change.get('changes') or []:
+                _add_search_terms(champion_terms, ' '.join(str(value) for value in line.values()), 'text')
+    
+    documents = {f"champion:{slug}": {'type': 'champion', 'slug': slug, 'name': champion.name or slug,
+                                      'terms': champion_terms}}
+    
+    for build in champion.builds or []:
+        entries = [('item', item) for section in AGGREGATE_ITEM_SECTIONS for item in getattr(build, section) or []]
+        entries += [('item', item) for situation in build.situational_items or [] for item in situation.items or []]
+        if build.runes:
+            runes = ([build.runes.keystone] if build.runes.keystone else []) + (build.runes.primary or []) + (build.runes.secondary or [])
+            entries += [('rune', rune) for rune in runes]
+        entries += [('rune', rune) for situation in build.situational_runes or [] for rune in situation.runes or []]
+        
+        for doc_type, entry in entries:
+            key = f"{doc_type}:{entry.name}"
+            if not entry.name or key in documents:
+                continue
+            terms = {}
+            _add_search_terms(terms, entry.name, 'name')
+            _add_search_terms(terms, entry.description, 'text')
+            documents[key] = {'type': doc_type, 'slug': None, 'name': entry.name, 'terms': terms}
+    
+    return documents
+
+def build_search_index(documents):
+    """Compact inverted index: sorted terms (prefix-friendly) with [doc, weight, ...] postings"""
+    doc_keys = sorted(documents, key=lambda key: (documents[key]['type'] != 'champion', key))
+    doc_ids = {key: i for i, key in enumerate(doc_keys)}
+    
+    postings = {}
+    for key in doc_keys:
+        for term, weight in documents[key]['terms'].items():
+            postings.setdefault(term, []).append((doc_ids[key], weight))
+    
+    terms = sorted(postings)
+    return {
+        'version': 1,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'docs': [[documents[key]['type'], documents[key]['slug'], documents[key]['name']] for key in doc_keys],
+        'terms': terms,
+        'postings': [
+            [value for doc_id, weight in sorted(postings[term], key=lambda posting: -posting[1]) for value in (doc_id, weight)]
+            for term in terms
+        ]
+    }
+
+def update_search_index(champions_dir='champions_clean', changed_slugs=None,
+                        index_file=SEARCH_INDEX_FILE, state_file=SEARCH_INDEX_STATE_FILE):
+    """Rebuild the search index, re-reading only changed champions when changed_slugs is given"""
+    state = None
+    if changed_slugs is not None:
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = None
+    
+    if state is None:
+        # Full rebuild
+        state = {'champions': {}}
+        records = load_champion_records(champions_dir)
+    else:
+        records = []
+        for slug in changed_slugs:
+            champion_data = load_champion_data(Path(champions_dir) / f"{slug}.json")
+            if champion_data is None:
+                state['champions'].pop(slug, None)
+            else:
+                records.append((slug, Champion.from_dict(champion_data)))
+    
+    updated = 0
+    for slug, champion in records:
+        state['champions'][slug] = champion_search_documents(slug, champion)
+        updated += 1
+    
+    # Items and runes are shared; the first champion (by slug) that uses one provides its text
+    documents = {}
+    for slug in sorted(state['champions']):
+        for key, document in state['champions'][slug].items():
+            documents.setdefault(key, document)
+    
+    index = build_search_index(documents)
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    
+    os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+    
+    print(f"Search index: {len(index['terms'])} terms over {len(index['docs'])} documents "
+          f"({'full rebuild' if changed_slugs is None else f'{updated} champions updated'})")
+    return index
+
+def search_index_lookup(index, query, limit=10):
+    """Reference query implementation: AND of terms, last term matched as a prefix"""
+    import bisect
+    tokens = tokenize_search_text(query)
+    if not tokens:
+        return []
+    
+    scores = None
+    for position, token in enumerate(tokens):
+        token_scores = {}
+        start = bisect.bisect_left(index['terms'], token)
+        end = start + 1
+        if position == len(tokens) - 1:
+            end = bisect.bisect_left(index['terms'], token + '￿')
+        for term_id in range(start, min(end, len(index['terms']))):
+            if position < len(tokens) - 1 and index['terms'][term_id] != token:
+                continue
+            posting = index['postings'][term_id]
+            for i in range(0, len(posting), 2):
+                token_scores[posting[i]] = token_scores.get(posting[i], 0) + posting[i + 1]
+        if scores is None:
+            scores = token_scores
+        else:
+            scores = {doc_id: score + token_scores[doc_id] for doc_id, score in scores.items() if doc_id in token_scores}
+    
+    ranked = sorted(scores.items(), key=lambda entry: -entry[1])[:limit]
+    return [index['docs'][doc_id] + [score] for doc_id, score in ranked]
+
+# Content-addressed history of champion snapshots
+HISTORY_DIR = 'history'
+SNAPSHOT_SECTIONS = ('abilities', 'change_history')
+
+def _canonical_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def _chunk_path(history_dir, chunk_hash):
+    return Path(history_dir) / 'chunks' / chunk_hash[:2] / f"{chunk_hash}.json"
+
+def store_snapshot_chunk(history_dir, data):
+    """Store a section once under the hash of its canonical JSON and return the hash"""
+    import hashlib
+    encoded = _canonical_json(data).encode('utf-8')
+    chunk_hash = hashlib.sha256(encoded).hexdigest()
+    chunk_file = _chunk_path(history_dir, chunk_hash)
+    if not chunk_file.exists():
+        chunk_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = chunk_file.with_suffix('.tmp')
+        temp_file.write_bytes(encoded)
+        os.replace(temp_file, chunk_file)
+    return chunk_hash
+
+def load_snapshot_chunk(history_dir, chunk_hash):
+    with open(_chunk_path(history_dir, chunk_hash), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def snapshot_champion(history_dir, champion_data):
+    """Split a champion into summary, abilities, one chunk per build and change history"""
+    summary = {key: value for key, value in champion_data.items()
+               if key not in SNAPSHOT_SECTIONS and key != 'builds'}
+    entry = {
+        'summary': store_snapshot_chunk(history_dir, summary),
+        'builds': [[build.get('lane'), store_snapshot_chunk(history_dir, build)]
+                   for build in champion_data.get('builds') or []]
+    }
+    for section in SNAPSHOT_SECTIONS:
+        if section in champion_data:
+            entry[section] = store_snapshot_chunk(history_dir, champion_data[section])
+    return entry
+
+def load_history_index(history_dir=HISTORY_DIR):
+    try:
+        with open(Path(history_dir) / 'index.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'runs': []}
+
+def load_run_manifest(history_dir, run_id):
+    with open(Path(history_dir) / 'runs' / f"{run_id}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def record_snapshot_run(champions_dir='champions_clean', changed_slugs=None, patch=None, history_dir=HISTORY_DIR):
+    """Add a run manifest covering every champion, re-chunking only changed ones"""
+    index = load_history_index(history_dir)
+    previous = load_run_manifest(history_dir, index['runs'][-1]['run'])['champions'] if index['runs'] else {}
+    
+    if changed_slugs is None or not previous:
+        changed_slugs = [champion_file.stem for champion_file in Path(champions_dir).glob('*.json')]
+    
+    champions = dict(previous)
+    patches = []
+    for slug in changed_slugs:
+        champion_data = load_champion_data(Path(champions_dir) / f"{slug}.json")
+        if champion_data is None:
+            champions.pop(slug, None)
+        else:
+            champions[slug] = snapshot_champion(history_dir, champion_data)
+            if champion_data.get('patch'):
+                patches.append(champion_data['patch'])
+    
+    if champions == previous:
+        print("History: no changes since the last snapshot")
+        return None
+    
+    if patch is None:
+        patch = max(patches, key=patch_sort_key) if patches else (index['runs'][-1]['patch'] if index['runs'] else None)
+    
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if any(run['run'] == run_id for run in index['runs']):
+        run_id = f"{run_id}_{len(index['runs'])}"
+    
+    manifest = {'run': run_id, 'created_at': datetime.now().isoformat(timespec='seconds'), 'patch': patch,
+                'champions': dict(sorted(champions.items()))}
+    runs_dir = Path(history_dir) / 'runs'
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    with open(runs_dir / f"{run_id}.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    
+    changed = sorted(slug for slug in set(champions) | set(previous) if champions.get(slug) != previous.get(slug))
+    index['runs'].append({'run': run_id, 'created_at': manifest['created_at'], 'patch': patch, 'changed': changed})
+    with open(Path(history_dir) / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    
+    print(f"History: run {run_id} ({len(changed)} champions changed, patch {patch or 'unknown'})")
+    return run_id
+
+def find_snapshot_run(run=None, patch=None, patches_ago=None, history_dir=HISTORY_DIR):
+    """Resolve a run id, a patch version or "N patches ago" to a run in the history index"""
+    runs = load_history_index(history_dir)['runs']
+    if run is not None:
+        matches = [entry for entry in runs if entry['run'] == run]
+    elif patch is not None:
+        matches = [entry for entry in runs if (entry['patch'] or '').lower() == patch.lower()]
+    elif patches_ago:
+        patches = sorted({entry['patch'] for entry in runs if entry['patch']}, key=patch_sort_key)
+        if patches_ago >= len(patches):
+            return None
+        target = patches[-1 - patches_ago]
+        matches = [entry for entry in runs if entry['patch'] == target]
+    else:
+        matches = runs
+    return matches[-1]['run'] if matches else None
+
+def load_snapshot(slug, run=None, patch=None, patches_ago=None, history_dir=HISTORY_DIR):
+    """Point lookup: rebuild a champion as it was stored in a past run (latest by default)"""
+    run_id = find_snapshot_run(run, patch, patches_ago, history_dir)
+    if run_id is None:
+        return None
+    entry = load_run_manifest(history_dir, run_id)['champions'].get(slug)
+    if entry is None:
+        return None
+    
+    champion_data = load_snapshot_chunk(history_dir, entry['summary'])
+    for section in SNAPSHOT_SECTIONS:
+        if section in entry:
+            champion_data[section] = load_snapshot_chunk(history_dir, entry[section])
+    champion_data['builds'] = [load_snapshot_chunk(history_dir, chunk_hash) for _, chunk_hash in entry['builds']]
+    return champion_data
+
+# Per-section sharded champion output, so the site loads only what it renders
+SHARDS_DIR = 'champions_shards'
+
+def _shard_file_name(lane):
+    return re.sub(r'[^a-z0-9]+', '_', (lane or '').lower()).strip('_') or 'unknown'
+
+def champion_shards(champion_data):
+    """Shard path -> data: summary.json, abilities.json, builds/<lane>.json, history.json"""
+    shards = {'summary.json': {key: value for key, value in champion_data.items()
+                               if key not in ('abilities', 'builds', 'change_history')}}
+    if 'abilities' in champion_data:
+        shards['abilities.json'] = champion_data['abilities']
+    for build in champion_data.get('builds') or []:
+        path = f"builds/{_shard_file_name(build.get('lane'))}.json"
+        suffix = 2
+        while path in shards:
+            path = f"builds/{_shard_file_name(build.get('lane'))}_{suffix}.json"
+            suffix += 1
+        shards[path] = build
+    if 'change_history' in champion_data:
+        shards['history.json'] = champion_data['change_history']
+    return shards
+
+def write_champion_shards(slug, champion_data, shards_dir=SHARDS_DIR):
+    """Write one champion's changed shards and its manifest; returns the number of shards written
+    
+    manifest.json lists every shard with its SHA-256 and size, and maps each
+    lane to its build shard. Shards whose hash matches the manifest are left alone.
+    """
+    import hashlib
+    champion_dir = Path(shards_dir) / slug
+    manifest_file = champion_dir / 'manifest.json'
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+    previous_shards = previous.get('shards', {})
+    
+    entries = {}
+    lanes = {}
+    written = 0
+    for path, data in champion_shards(champion_data).items():
+        encoded = _canonical_json(data).encode('utf-8')
+        digest = hashlib.sha256(encoded).hexdigest()
+        entries[path] = {'sha256': digest, 'size': len(encoded)}
+        if path.startswith('builds/'):
+            lanes[data.get('lane') or path] = path
+        shard_file = champion_dir / path
+        if previous_shards.get(path, {}).get('sha256') == digest and shard_file.exists():
+            continue
+        shard_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = shard_file.with_suffix('.tmp')
+        temp_file.write_bytes(encoded)
+        os.replace(temp_file, shard_file)
+        written += 1
+    
+    for path in set(previous_shards) - set(entries):
+        (champion_dir / path).unlink(missing_ok=True)
+    
+    manifest = {'name': champion_data.get('name'), 'slug': slug, 'lanes': lanes, 'shards': entries}
+    if manifest != previous:
+        champion_dir.mkdir(parents=True, exist_ok=True)
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    return written
+
+def update_champion_shards(champions_dir='champions_clean', changed_slugs=None, shards_dir=SHARDS_DIR):
+    """Re-shard changed champions (all of them on the first run)"""
+    import shutil
+    if changed_slugs is None or not Path(shards_dir).exists():
+        changed_slugs = [champion_file.stem for champion_file in Path(champions_dir).glob('*.json')]
+    
+    written = 0
+    for slug in changed_slugs:
+        champion_data = load_champion_data(Path(champions_dir) / f"{slug}.json")
+        if champion_data is None:
+            shutil.rmtree(Path(shards_dir) / slug, ignore_errors=True)
+        else:
+            written += write_champion_shards(slug, champion_data, shards_dir)
+    print(f"Shards: {written} shard files written for {len(changed_slugs)} champions")
+    return written
+
+# Packed random-access champion bundle
+# Layout (little-endian): header <4sHHI> magic, version, flags, record count;
+# then per record <H> slug length, slug (UTF-8), <QI> offset, length; then the
+# records, each the canonical JSON of one champion (zlib-compressed when flags
+# has BUNDLE_FLAG_ZLIB). Offsets are from the start of the file.
+BUNDLE_FILE = 'champions.bundle'
+BUNDLE_MAGIC = b'WRCB'
+BUNDLE_VERSION = 1
+BUNDLE_FLAG_ZLIB = 1
+BUNDLE_HEADER = '<4sHHI'
+BUNDLE_INDEX_ENTRY = '<QI'
+
+def write_champion_bundle(champions_dir='champions_clean', bundle_file=BUNDLE_FILE, changed_slugs=None):
+    """Pack every champion file into one bundle; returns the number of records
+    
+    With changed_slugs, the encoded records of all other champions are copied
+    unchanged from the existing bundle instead of being re-encoded.
+    """
+    import struct
+    import zlib
+    previous = None
+    if changed_slugs is not None and Path(bundle_file).exists():
+        try:
+            previous = ChampionBundle(bundle_file, cache_size=0)
+        except ValueError:
+            previous = None
+    changed = set(changed_slugs or [])
+    
+    records = []
+    try:
+        for champion_file in sorted(Path(champions_dir).glob('*.json')):
+            slug = champion_file.stem
+            if previous is not None and slug not in changed and slug in previous:
+                records.append((slug, bytes(previous.raw(slug))))
+                continue
+            champion_data = load_champion_data(champion_file)
+            if champion_data is not None:
+                records.append((slug, zlib.compress(_canonical_json(champion_data).encode('utf-8'), 6)))
+    finally:
+        if previous is not None:
+            previous.close()
+    
+    index_size = sum(2 + len(slug.encode('utf-8')) + struct.calcsize(BUNDLE_INDEX_ENTRY) for slug, _ in records)
+    offset = struct.calcsize(BUNDLE_HEADER) + index_size
+    parts = [struct.pack(BUNDLE_HEADER, BUNDLE_MAGIC, BUNDLE_VERSION, BUNDLE_FLAG_ZLIB, len(records))]
+    for slug, encoded in records:
+        slug_bytes = slug.encode('utf-8')
+        parts.append(struct.pack('<H', len(slug_bytes)) + slug_bytes
+                     + struct.pack(BUNDLE_INDEX_ENTRY, offset, len(encoded)))
+        offset += len(encoded)
+    parts.extend(encoded for _, encoded in records)
+    
+    os.makedirs(os.path.dirname(bundle_file) or '.', exist_ok=True)
+    temp_file = f"{bundle_file}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.writelines(parts)
+    os.replace(temp_file, bundle_file)
+    print(f"Bundle: {len(records)} champions, {offset // 1024} KB in {bundle_file}")
+    return len(records)
+
+class ChampionBundle:
+    """Read-only, memory-mapped view of a champion bundle
+    
+    Opening reads only the header and index. Records are decoded on access
+    and the last cache_size decoded champions are kept (LRU). raw() and
+    iter_raw() hand out memoryview slices of the mapping without copying.
+    
+        with ChampionBundle('champions.bundle') as bundle:
+            ahri = bundle['ahri']
+    """
+    
+    def __init__(self, bundle_file=BUNDLE_FILE, cache_size=32, records=False):
+        import mmap
+        import struct
+        from collections import OrderedDict
+        self.bundle_file = bundle_file
+        self.cache_size = cache_size
+        self.records = records
+        self._cache = OrderedDict()
+        self._file = open(bundle_file, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{bundle_file} is empty")
+        self._view = memoryview(self._map)
+        
+        header_size = struct.calcsize(BUNDLE_HEADER)
+        magic, version, self.flags, count = struct.unpack_from(BUNDLE_HEADER, self._map, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"{bundle_file} is not a version {BUNDLE_VERSION} champion bundle")
+        
+        entry_size = struct.calcsize(BUNDLE_INDEX_ENTRY)
+        self._index = {}
+        position = header_size
+        for _ in range(count):
+            (slug_length,) = struct.unpack_from('<H', self._map, position)
+            slug = bytes(self._view[position + 2:position + 2 + slug_length]).decode('utf-8')
+            position += 2 + slug_length
+            self._index[slug] = struct.unpack_from(BUNDLE_INDEX_ENTRY, self._map, position)
+            position += entry_size
+    
+    def __len__(self):
+        return len(self._index)
+    
+    def __contains__(self, slug):
+        return slug in self._index
+    
+    def __iter__(self):
+        return iter(self._index)
+    
+    def keys(self):
+        return self._index.keys()
+    
+    def raw(self, slug):
+        """Encoded record as a memoryview into the mapping (no copy)"""
+        offset, length = self._index[slug]
+        return self._view[offset:offset + length]
+    
+    def iter_raw(self):
+        """(slug, memoryview) for every record, in bundle order, without copying"""
+        for slug, (offset, length) in self._index.items():
+            yield slug, self._view[offset:offset + length]
+    
+    def _decode(self, encoded):
+        import zlib
+        data = json.loads(zlib.decompress(encoded) if self.flags & BUNDLE_FLAG_ZLIB else bytes(encoded))
+        return Champion.from_dict(data) if self.records else data
+    
+    def __getitem__(self, slug):
+        if slug in self._cache:
+            self._cache.move_to_end(slug)
+            return self._cache[slug]
+        champion = self._decode(self.raw(slug))
+        if self.cache_size > 0:
+            self._cache[slug] = champion
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return champion
+    
+    def get(self, slug, default=None):
+        return self[slug] if slug in self._index else default
+    
+    def items(self):
+        """(slug, champion) for every record; decoded one at a time, bypassing the cache"""
+        for slug, encoded in self.iter_raw():
+            yield slug, self._decode(encoded)
+    
+    def close(self):
+        self._cache.clear()
+        if self._map is not None:
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                # raw()/iter_raw() views are still held; the mapping is freed along with them
+                pass
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Per-locale champion bundles for the en/mn front end
+# Roles, lanes, situational purposes and stat labels are translated with the
+# tables in locales/<locale>.json; terms listed under game_terms stay English
+# (as in utils/gameTerms.ts). Every string value in a locale's champion payloads
+# is the base-36 index of its text in the locale's shared "strings" table.
+LOCALES_DIR = 'locales'
+LOCALE_BUNDLES_DIR = 'locale_bundles'
+LOCALE_LANE_KEYS = {'Mid': 'mid_lane', 'Baron': 'baron_lane', 'Dragon': 'dragon_lane', 'Jungle': 'jungle',
+                    'Support': 'support'}
+LOCALE_STAT_KEYS = {'health_regen': 'health_regeneration', 'mana_regen': 'mana_regeneration',
+                    'magic_resist': 'magic_resistance'}
+# English glossary sections whose phrases can translate a situational purpose
+LOCALE_GLOSSARY_SECTIONS = ('stats', 'roles', 'lanes', 'summoner_spells', 'builds')
+# Incremental runs only append to a string table; past this growth since the last full build it is rebuilt
+LOCALE_TABLE_MAX_GROWTH = 1.25
+
+def _base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    text = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
+
+class LocaleTerms:
+    """Translation tables for one locale, read from locales/<locale>.json"""
+    
+    def __init__(self, locale, locales_dir=LOCALES_DIR):
+        import hashlib
+        table_bytes = (Path(locales_dir) / f"{locale}.json").read_bytes()
+        english_bytes = (Path(locales_dir) / 'en.json').read_bytes()
+        self.table = json.loads(table_bytes)
+        english = json.loads(english_bytes)
+        self.locale = locale
+        # Changes whenever either table does, so encoded champions can tell they are stale
+        self.digest = hashlib.sha256(table_bytes + b'\0' + english_bytes).hexdigest()
+        self.protected = set(english.get('game_terms', {})) | set(english.get('game_terms', {}).values())
+        self.english_stats = english.get('stats', {})
+        # English phrase (lowercased) -> (section, key)
+        self.glossary = {}
+        for section in LOCALE_GLOSSARY_SECTIONS:
+            for key, phrase in english.get(section, {}).items():
+                if isinstance(phrase, str):
+                    self.glossary.setdefault(phrase.lower(), (section, key))
+        for key, phrase in english.get('runes', {}).get('trees', {}).items():
+            self.glossary.setdefault(phrase.lower(), ('runes.trees', key))
+    
+    def _lookup(self, section, key, default):
+        table = self.table
+        for part in section.split('.'):
+            table = table.get(part, {})
+        value = table.get(key)
+        return value if isinstance(value, str) and value else default
+    
+    def role(self, role):
+        return self._lookup('roles', (role or '').lower(), role)
+    
+    def lane(self, lane):
+        return self._lookup('lanes', LOCALE_LANE_KEYS.get(lane, (lane or '').lower()), lane)
+    
+    def stat(self, stat_key):
+        """Stat label; game terms (Armor, Mana, ...) keep their English label"""
+        key = LOCALE_STAT_KEYS.get(stat_key, stat_key)
+        english = self.english_stats.get(key) or stat_key.replace('_', ' ').title()
+        if english in self.protected:
+            return english
+        return self._lookup('stats', key, english)
+    
+    def phrase(self, text):
+        """Translate a whole phrase found in the glossary; game terms and unknown text are kept"""
+        if not text or text in self.protected:
+            return text
+        entry = self.glossary.get(text.strip().lower())
+        return self._lookup(*entry, text) if entry else text
+
+def localize_champion(champion_data, terms):
+    """Copy of a champion with translated labels; ids (roles, lanes, lane) are kept alongside"""
+    localized = dict(champion_data)
+    if champion_data.get('roles'):
+        localized['role_labels'] = [terms.role(role) for role in champion_data['roles']]
+    if champion_data.get('lanes'):
+        localized['lane_labels'] = [terms.lane(lane) for lane in champion_data['lanes']]
+    builds = []
+    for build in champion_data.get('builds') or []:
+        build = dict(build)
+        if build.get('lane'):
+            build['lane_label'] = terms.lane(build['lane'])
+        for section in ('situational_items', 'situational_runes'):
+            if build.get(section):
+                build[section] = [dict(situation, purpose=terms.phrase(situation['purpose']))
+                                  if situation.get('purpose') else situation for situation in build[section]]
+        builds.append(build)
+    if 'builds' in champion_data:
+        localized['builds'] = builds
+    return localized
+
+def _string_counts(value, counts):
+    if isinstance(value, str):
+        counts[value] = counts.get(value, 0) + 1
+    elif isinstance(value, dict):
+        for element in value.values():
+            _string_counts(element, counts)
+    elif isinstance(value, list):
+        for element in value:
+            _string_counts(element, counts)
+
+def _encode_strings(value, refs):
+    if isinstance(value, str):
+        return refs[value]
+    if isinstance(value, dict):
+        return {key: _encode_strings(element, refs) for key, element in value.items()}
+    if isinstance(value, list):
+        return [_encode_strings(element, refs) for element in value]
+    return value
+
+def build_locale_bundle(champions, terms, strings=None):
+    """Locale bundle: stat labels, a string table and string-indexed champions
+    
+    A new table is ordered most used first. Given an existing table, its
+    indices are kept and only the strings it lacks are appended, so champions
+    encoded against it stay valid.
+    """
+    localized = {slug: localize_champion(champion_data, terms) for slug, champion_data in champions.items()}
+    counts = {}
+    _string_counts(localized, counts)
+    strings = list(strings or [])
+    known = set(strings)
+    strings += sorted((text for text in counts if text not in known), key=lambda text: (-counts[text], text))
+    refs = {text: _base36(index) for index, text in enumerate(strings)}
+    stat_keys = list(dict.fromkeys(list(BASE_STAT_SMILES) + list(TOOLTIP_STAT_LABELS.values())
+                                   + list(TOOLTIP_FLAT_STAT_KEYS.values())))
+    return {
+        'locale': terms.locale,
+        'stat_labels': {stat_key: terms.stat(stat_key) for stat_key in stat_keys},
+        'strings': strings,
+        'champions': {slug: _encode_strings(champion_data, refs) for slug, champion_data in localized.items()}
+    }
+
+def decode_locale_bundle(bundle):
+    """slug -> champion dict with the string table resolved (the inverse of build_locale_bundle)"""
+    strings = bundle['strings']
+    
+    def decode(value):
+        if isinstance(value, str):
+            return strings[int(value, 36)]
+        if isinstance(value, dict):
+            return {key: decode(element) for key, element in value.items()}
+        if isinstance(value, list):
+            return [decode(element) for element in value]
+        return value
+    
+    return {slug: decode(champion_data) for slug, champion_data in bundle['champions'].items()}
+
+def read_locale_bundle(locale, output_dir=LOCALE_BUNDLES_DIR, slugs=None):
+    """Reassemble a written locale (or some of its champions) into a build_locale_bundle() dict"""
+    locale_dir = Path(output_dir) / locale
+    with open(locale_dir / 'strings.json', 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    champions = {}
+    for slug in table['champions'] if slugs is None else slugs:
+        with open(locale_dir / 'champions' / f"{slug}.json", 'r', encoding='utf-8') as f:
+            champions[slug] = json.load(f)
+    return {'locale': locale, 'stat_labels': table['stat_labels'], 'strings': table['strings'],
+            'champions': champions}
+
+def _write_locale_file(output_file, data):
+    """Write data as canonical JSON unless the file already holds exactly that; returns True if written"""
+    encoded = _canonical_json(data).encode('utf-8')
+    if output_file.exists() and output_file.read_bytes() == encoded:
+        return False
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = output_file.with_suffix('.tmp')
+    temp_file.write_bytes(encoded)
+    os.replace(temp_file, output_file)
+    return True
+
+def write_locale_bundles(champions_dir='champions_clean', locales_dir=LOCALES_DIR, output_dir=LOCALE_BUNDLES_DIR,
+                         changed_slugs=None):
+    """Write <output_dir>/<locale>/ for every locale in locales_dir
+    
+    strings.json holds the stat labels, the champion slugs and the string table
+    shared by the locale's champions/<slug>.json payloads. With changed_slugs
+    only those payloads are re-encoded and new strings are appended to the
+    table. A full run, a changed locale file or a table grown past
+    LOCALE_TABLE_MAX_GROWTH rebuilds the table most used first and rewrites
+    every payload.
+    """
+    all_champions = None
+    
+    def load_all_champions():
+        nonlocal all_champions
+        if all_champions is None:
+            all_champions = {}
+            for champion_file in sorted(Path(champions_dir).glob('*.json')):
+                champion_data = load_champion_data(champion_file)
+                if champion_data is not None:
+                    all_champions[champion_file.stem] = champion_data
+        return all_champions
+    
+    written = []
+    for locale_file in sorted(Path(locales_dir).glob('*.json')):
+        locale = locale_file.stem
+        terms = LocaleTerms(locale, locales_dir)
+        locale_dir = Path(output_dir) / locale
+        payloads_dir = locale_dir / 'champions'
+        table_file = locale_dir / 'strings.json'
+        try:
+            with open(table_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = None
+        
+        incremental = (changed_slugs is not None and previous is not None and previous.get('terms') == terms.digest
+                       and len(previous['strings']) <= previous['full_size'] * LOCALE_TABLE_MAX_GROWTH)
+        if incremental:
+            champions = {}
+            slugs = set(previous['champions'])
+            for slug in changed_slugs:
+                champion_data = load_champion_data(Path(champions_dir) / f"{slug}.json")
+                if champion_data is None:
+                    slugs.discard(slug)
+                    (payloads_dir / f"{slug}.json").unlink(missing_ok=True)
+                else:
+                    champions[slug] = champion_data
+                    slugs.add(slug)
+            bundle = build_locale_bundle(champions, terms, strings=previous['strings'])
+        else:
+            champions = load_all_champions()
+            slugs = set(champions)
+            bundle = build_locale_bundle(champions, terms)
+            for payload_file in payloads_dir.glob('*.json'):
+                if payload_file.stem not in slugs:
+                    payload_file.unlink()
+            # Single-file bundle left by older runs
+            (Path(output_dir) / f"{locale}.json").unlink(missing_ok=True)
+        
+        # The table only grows between full runs, so writing it first keeps existing payloads readable
+        table = {'locale': locale, 'terms': terms.digest, 'stat_labels': bundle['stat_labels'],
+                 'full_size': previous['full_size'] if incremental else len(bundle['strings']),
+                 'champions': sorted(slugs), 'strings': bundle['strings']}
+        table_written = _write_locale_file(table_file, table)
+        payloads = sum(_write_locale_file(payloads_dir / f"{slug}.json", champion_data)
+                       for slug, champion_data in bundle['champions'].items())
+        if table_written or payloads:
+            written.append(f"{locale} ({payloads} champions, {len(bundle['strings'])} strings)")
+    print(f"Locale bundles: {', '.join(written) if written else 'unchanged'}")
+    return written
+
+def write_run_outputs(champions_dir='champions_clean', changed_slugs=None, patch=None, bundle_file=None):
+    """Derived files refreshed after every run that changed champion data"""
+    write_aggregates(champions_dir)
+    update_search_index(champions_dir, changed_slugs=changed_slugs)
+    record_snapshot_run(champions_dir, changed_slugs=changed_slugs, patch=patch)
+    update_champion_shards(champions_dir, changed_slugs=changed_slugs)
+    write_locale_bundles(champions_dir, changed_slugs=changed_slugs)
+    if bundle_file:
+        write_champion_bundle(champions_dir, bundle_file, changed_slugs=changed_slugs)
+
+RUN_METRICS_FILE = 'logs/run_metrics.json'
+DEFAULT_MAX_CONCURRENCY = 8
+
+def write_run_metrics(metrics, metrics_file=RUN_METRICS_FILE):
+    os.makedirs(os.path.dirname(metrics_file) or '.', exist_ok=True)
+    with open(metrics_file, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, ensure_ascii=False)
+    return metrics_file
+
+def run_batch_scrape(max_error_rate=DEFAULT_MAX_ERROR_RATE, mapping_file='champion_url_mapping.json',
+                     champions_dir='champions_clean', concurrency=1, delay=None, cache_dir=None,
+                     incremental=True, max_concurrency=DEFAULT_MAX_CONCURRENCY, stream=False, bundle_file=None,
+                     run_outputs=True):
+    """Batch mode - THE ULTIMATE ALL-IN-ONE SCRAPER over every champion file
+    
+    By default pages are fetched one at a time, 1.5s apart. concurrency='auto'
+    (opt-in) lets an AdaptiveConcurrency controller pick the number of parallel
+    fetches (up to max_concurrency); delay then defaults to none.
+    bundle_file also repacks the champions into a ChampionBundle file.
+    run_outputs=False skips the derived outputs (see write_run_outputs).
+    """
+    print("=== ULTIMATE ALL-IN-ONE CHAMPION SCRAPER ===\n")
+    print("This script does EVERYTHING:")
+    print("✓ Extracts complete champion data (name, roles, image, tier, stats, abilities)")
+    print("✓ Extracts ALL build components (start_items, core_items, example_build, situational_items)")
+    print("✓ Extracts LANE-SPECIFIC boots/enchants (not global duplicates)")
+    print("✓ Extracts summoner spells and runes")
+    print("✓ Preserves existing good data while fixing missing data")
+    print("✓ Handles all champions in batch")
+    print()
+    
+    # Load champion URLs
+    champion_urls = load_champion_urls(mapping_file)
+    if not champion_urls:
+        print("Could not load champion URLs")
+        return
+    
+    # Get list of champion files
+    champions_path = Path(champions_dir)
+    if not champions_path.exists():
+        print("Champions directory not found")
+        return
+    
+    champion_files = list(champions_path.glob("*.json"))
+    print(f"Found {len(champion_files)} champion files to process\n")
+    
+    # Statistics
+    total_champions = len(champion_files)
+    champions_processed = 0
+    champions_updated = 0
+    failed_champions = []
+    validation = ValidationReport(max_error_rate=max_error_rate)
+    change_counts = {}
+    
+    def champion_jobs():
+        for champion_file in champion_files:
+            # Find matching URL with improved name mapping
+            url = find_champion_url(champion_file.stem, champion_urls, verbose=False)
+            if url:
+                yield champion_file.stem, url
+            else:
+                champion_name = champion_file.stem.replace('_', ' ').title()
+                failed_champions.append(champion_name)
+                print(f"  [WARN] No URL found for {champion_name}")
+    
+    # Process each champion as its page comes in (delay keeps us respectful to the server)
+    cache = DirectoryPageCache(cache_dir) if cache_dir else None
+    page_parser = IncrementalPageParser() if incremental else 'html.parser'
+    if concurrency == 'auto':
+        concurrency = AdaptiveConcurrency(initial=1, maximum=max_concurrency)
+        delay = 0.0 if delay is None else delay
+    elif delay is None:
+        delay = 1.5
+    started = time.time()
+    # Stored history bounds the change-history walk even without cached sections (--full-extract, new cache)
+    def stored_change_history(slug):
+        return (load_champion_data(champions_path / f"{slug}.json") or {}).get('change_history')
+    
+    records = iter_scrape(champion_jobs(), concurrency=concurrency, cache=cache, parser=page_parser, delay=delay,
+                          stream=stream, change_history=stored_change_history)
+    bytes_read = 0
+    for record in records:
+        if validation.threshold_exceeded():
+            print(f"\n[STOP] Validation error rate {validation.error_rate * 100:.1f}% exceeds "
+                  f"{max_error_rate * 100:.1f}%, no further champions will be written")
+            records.close()
+            break
+        
+        champions_processed += 1
+        bytes_read += record.get('stream', {}).get('bytes_read', 0)
+        champion_name = record['key'].replace('_', ' ').title()
+        print(f"[{champions_processed}/{total_champions}] Processing {champion_name}...")
+        
+        if record['error']:
+            print(f"Error scraping {record['url']}: {record['error']}")
+            print(f"  - Failed to scrape fresh data for {champion_name}")
+        for failure in record['failures']:
+            print(f"  ! {failure['section']} left out: {failure['error']}")
+        for slow in record.get('slow', []):
+            print(f"  ! {slow['section']} slow: took {slow['elapsed']:.2f}s, over the {slow['budget']:g}s budget (kept)")
+        
+        if record['data'] and merge_champion_data(champion_name, record['data'], champions_dir=champions_dir,
+                                                  validation=validation, change_counts=change_counts,
+                                                  extraction_failures=record['failures']):
+            champions_updated += 1
+            print(f"  [OK] Updated {champion_name}")
+        else:
+            failed_champions.append(champion_name)
+            print(f"  [FAIL] Failed to update {champion_name}")
+    
+    if incremental:
+        page_parser.save()
+    
+    # Print summary
+    print(f"\n=== ULTIMATE ALL-IN-ONE SCRAPER COMPLETE ===")
+    print(f"Total Champions: {total_champions}")
+    print(f"Champions Processed: {champions_processed}")
+    print(f"Champions Updated: {champions_updated}")
+    print(f"Failed: {len(failed_champions)}")
+    print(f"Success Rate: {(champions_updated / total_champions * 100):.1f}%")
+    if incremental:
+        print(f"Page sections: {page_parser.extracted} re-extracted, {page_parser.reused} unchanged")
+    
+    metrics = {
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_seconds': round(time.time() - started, 2),
+        'processed': champions_processed,
+        'updated': champions_updated,
+        'failed': len(failed_champions),
+        'pages_per_second': round(champions_processed / max(time.time() - started, 1e-9), 2),
+        'delay': delay
+    }
+    if isinstance(concurrency, AdaptiveConcurrency):
+        metrics['concurrency'] = concurrency.snapshot()
+        print(f"Concurrency: settled at {metrics['concurrency']['limit']} "
+              f"({metrics['concurrency']['increases']} increases, {metrics['concurrency']['decreases']} decreases, "
+              f"p95 {metrics['concurrency']['window_p95']:.2f}s)")
+    else:
+        metrics['concurrency'] = {'limit': concurrency}
+    if incremental:
+        metrics['page_sections'] = {'extracted': page_parser.extracted, 'reused': page_parser.reused}
+    if stream:
+        metrics['stream_bytes_read'] = bytes_read
+    print(f"Run metrics: {write_run_metrics(metrics)}")
+    
+    if change_counts:
+        print(f"\nField changes:")
+        for path, count in sorted(change_counts.items(), key=lambda entry: -entry[1]):
+            print(f"  {path}: {count}")
+    
+    if validation.results:
+        print(f"Validation Report: {validation.write()}")
+    
+    if run_outputs:
+        write_run_outputs(champions_dir, changed_slugs=validation.written_slugs(), bundle_file=bundle_file)
+    
+    if failed_champions:
+        print(f"\nFailed champions:")
+        for name in failed_champions:
+            print(f"  - {name}")
+    
+    print(f"\n🎉 ALL CHAMPION DATA IS NOW COMPLETE!")
+    print(f"📊 Every champion has:")
+    print(f"   ✓ Complete basic info (name, roles, image, tier, stats, abilities)")
+    print(f"   ✓ Complete build data (start_items, core_items, example_build, situational_items)")
+    print(f"   ✓ Lane-specific boots/enchants (4 items per lane, not 8+ duplicates)")
+    print(f"   ✓ Summoner spells and runes data")
+    print(f"   ✓ Change history where available")
+    
+    return {'total': total_champions, 'processed': champions_processed, 'updated': champions_updated,
+            'failed': len(failed_champions), 'concurrency': metrics['concurrency']['limit']}
+
+# Local wr-meta stand-in site and end-to-end benchmark
+STAND_IN_ROLE_ICONS = {
+    'Assassin': 'roleassassinicon',
+    'Fighter': 'rolefightericon',
+    'Tank': 'roletankicon',
+    'Support': 'rolesupporticon',
+    'Marksman': 'rolemarkmanicon',
+    'Mage': 'rolemageicon'
+}
+STAND_IN_STAT_SMILES = BASE_STAT_SMILES
+STAND_IN_CHANGE_TYPES = {'nerf': 'NERFED', 'buff': 'BUFFED', 'adjustment': 'ADJUSTED', 'rework': 'REWORKED'}
+
+def _render_holder(entry, holder_class='ico-holder3'):
+    import html
+    return (f'<div class="{holder_class}"><img data-src="{html.escape(entry.get("image", ""))}" '
+            f'alt="{html.escape(entry.get("alt", ""))}"><span>{html.escape(entry.get("name", ""))}</span>'
+            f'<p>{html.escape(entry.get("description", ""))}</p></div>')
+
+def _render_combo(title, entries):
+    return (f'<div class="text-center"><div class="bildtitle2">{title}</div>'
+            f'<div class="chapter-combo2">{"".join(_render_holder(entry) for entry in entries)}</div></div>')
+
+def _render_rune(rune, keystone=False):
+    import html
+    image = f'<img data-src="{html.escape(rune.get("image", ""))}" alt="{html.escape(rune.get("alt", ""))}">'
+    if keystone:
+        image = f'<div class="img-big">{image}</div>'
+    return (f'<div class="newsbox_h">{image}<div class="newsbox_h_title">{html.escape(rune.get("name", ""))}</div>'
+            f'<div class="newsbox_h_short">{html.escape(rune.get("description", ""))}</div></div>')
+
+def render_champion_page(champion_data):
+    """Render champion data as a wr-meta style page that parse_champion_page reads back"""
+    import html
+    escape = html.escape
+    parts = ['<html><head><title>Wild Rift</title></head><body><main>']
+    
+    roles = ''.join(f'<i class="{STAND_IN_ROLE_ICONS.get(role, "")}"></i>' for role in champion_data.get('roles', []))
+    parts.append(f'<h1 class="firstscrean-main-title"><span>{escape(champion_data.get("name", ""))}</span>{roles}</h1>')
+    parts.append(f'<img class="champion-icon" data-src="{escape(champion_data.get("image", ""))}">')
+    stars = '<i class="fas fa-star"></i>' * int(champion_data.get('tier') or 0)
+    growth = champion_data.get('base_stats_growth') or {}
+    parts.append(f'<div class="tier-super">{stars}</div>')
+    parts.append(f'<div class="edit-balance">{escape(champion_data.get("balance_status", ""))}</div>')
+    parts.append('<div class="circles">' + ''.join(
+        f'<div class="circle per-{value}"></div><div class="circle-title">{escape(title)}</div>'
+        for title, value in champion_data.get('stats', {}).items()) + '</div>')
+    parts.append('<div class="stats-block"><table><tr>' + ''.join(
+        f'<td><!--smile:{STAND_IN_STAT_SMILES[stat]}--><img alt="{STAND_IN_STAT_SMILES[stat]}"><!--/smile--> {value}{f" ({growth[stat]})" if stat in growth else ""}</td>'
+        for stat, value in champion_data.get('base_stats', {}).items() if stat in STAND_IN_STAT_SMILES) + '</tr></table></div>')
+    
+    for ability in champion_data.get('abilities', []):
+        parts.append(f'<div class="ability-holder"><img data-src="{escape(ability.get("image", ""))}" '
+                     f'alt="{escape(ability.get("alt_text", ""))}"><div class="ability-marker">{escape(ability.get("key", ""))}</div>'
+                     f'<p>{escape(ability.get("description", ""))}</p></div>')
+    
+    builds = champion_data.get('builds', [])
+    parts.append('<div class="builds">')
+    for build in builds:
+        parts.append(f'<h2>{escape(build.get("lane", ""))} Build</h2><div class="bcontent">')
+        parts.append(_render_combo('Start', build.get('start_items', [])))
+        parts.append(f'<div class="core">{"".join(_render_holder(item) for item in build.get("core_items", []))}</div>')
+        parts.append(_render_combo('Boots &amp; Enchant', build.get('boots_enchants', [])))
+        parts.append(_render_combo('Example build', build.get('example_build', [])))
+        for situation in build.get('situational_items', []):
+            parts.append(f'<div class="tabs-b5"><div class="bildtitle4">{escape(situation.get("purpose", ""))}</div>'
+                         f'{"".join(_render_holder(item) for item in situation.get("items", []))}'
+                         f'<div class="newsbox_h_short">{escape(situation.get("tips", ""))}</div></div>')
+        parts.append('</div>')
+    parts.append('</div>')
+    
+    # Spells and runes are page-wide on wr-meta; the first build provides them
+    first_build = builds[0] if builds else {}
+    parts.append(f'<div class="bild-block"><h3>Summoner Spells</h3>'
+                 f'{"".join(_render_holder(spell) for spell in first_build.get("summoner_spells", []))}</div>')
+    runes = first_build.get('runes') or {}
+    parts.append('<div class="rune">')
+    if runes.get('keystone'):
+        parts.append(_render_rune(runes['keystone'], keystone=True))
+    parts.extend(_render_rune(rune) for rune in runes.get('primary', []))
+    parts.append('</div><div class="tabs-box6">')
+    for situation in first_build.get('situational_runes', []):
+        parts.append(f'<div class="tabs-b6"><div class="bildtitle4">{escape(situation.get("purpose", ""))}</div>' + ''.join(
+            f'<div class="ico-holder2"><img src="{escape(rune.get("image", ""))}" alt="{escape(rune.get("alt", ""))}">'
+            f'<title>{escape(rune.get("name", ""))}</title><p>{escape(rune.get("description", ""))}</p></div>'
+            for rune in situation.get('runes', [])) + '</div>')
+    parts.append('</div>')
+    
+    parts.append('<section class="bg-very-light-gray3"><div class="content_block">')
+    for entry in champion_data.get('change_history', []):
+        lines = []
+        for change in entry.get('changes', []):
+            lines.append(escape(change.get('ability', '')))
+            for line in change.get('changes', []):
+                lines.append(escape(f"{line['stat']}: {line['change']}" if 'stat' in line else line.get('description', '')))
+        parts.append(f'<div class="{"berrorsred" if entry.get("type") == "nerf" else "berrors"}">'
+                     f'<b>{STAND_IN_CHANGE_TYPES.get(entry.get("type"), "CHANGED")} {entry.get("date", "")} '
+                     f'(PATCH {entry.get("patch", "")})</b><br>{"<br>".join(lines)}</div>')
+    parts.append('</div></section></main></body></html>')
+    return '\n'.join(parts)
+
+def synthesize_champion_variant(champion_data, variant):
+    """Deterministic variation of a champion (tier, stats, item order) for load tests"""
+    import copy
+    import random
+    rng = random.Random(f"{champion_data.get('name')}:{variant}")
+    data = copy.deepcopy(champion_data)
+    data['tier'] = rng.randint(1, 5)
+    data['stats'] = {title: max(0, min(100, value + rng.randint(-10, 10))) for title, value in data.get('stats', {}).items()}
+    for build in data.get('builds', []):
+        for section in ('core_items', 'situational_items'):
+            rng.shuffle(build.get(section) or [])
+    return data
+
+class StandInSite:
+    """Champion pages for a local stand-in server: recorded pages, or rendered from champion JSON
+    
+    Slugs get `variants` extra synthesized pages each. Every request waits
+    latency (+ up to jitter) seconds, and fails with a 500 at error_rate or a
+    429 with Retry-After at throttle_rate.
+    """
+    
+    def __init__(self, champions_dir='champions_clean', pages_dir=None, variants=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=0):
+        import random
+        import threading
+        self.champions_dir = Path(champions_dir)
+        self.pages_dir = Path(pages_dir) if pages_dir else None
+        self.variants = variants
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.slugs = sorted(champion_file.stem for champion_file in self.champions_dir.glob('*.json'))
+        self.counts = {'pages': 0, 'errors': 0, 'throttled': 0, 'missing': 0}
+    
+    def urls(self, base_url):
+        """{key: url} for every page the site serves, base pages first"""
+        urls = {slug: f"{base_url}/{slug}.html" for slug in self.slugs}
+        for variant in range(1, self.variants + 1):
+            urls.update({f"{slug}_v{variant}": f"{base_url}/{slug}--v{variant}.html" for slug in self.slugs})
+        return urls
+    
+    def page(self, path):
+        match = re.fullmatch(r'/([a-z0-9_]+?)(?:--v(\d+))?\.html', path)
+        if not match or match.group(1) not in self.slugs:
+            return None
+        slug, variant = match.group(1), int(match.group(2) or 0)
+        if variant > self.variants:
+            return None
+        
+        if not variant and self.pages_dir and (self.pages_dir / f"{slug}.html").exists():
+            return (self.pages_dir / f"{slug}.html").read_bytes()
+        champion_data = load_champion_data(self.champions_dir / f"{slug}.json")
+        if variant:
+            champion_data = synthesize_champion_variant(champion_data, variant)
+        return render_champion_page(champion_data).encode('utf-8')
+    
+    def make_server(self, host='127.0.0.1', port=8765):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        site = self
+        
+        class StandInHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    roll = site.rng.random()
+                    delay = site.latency + site.jitter * site.rng.random()
+                    if roll < site.throttle_rate:
+                        outcome = 'throttled'
+                    elif roll < site.throttle_rate + site.error_rate:
+                        outcome = 'errors'
+                    else:
+                        outcome = 'pages'
+                    site.counts[outcome] += 1
+                if delay:
+                    time.sleep(delay)
+                
+                if outcome == 'throttled':
+                    self.send_response(429)
+                    self.send_header('Retry-After', str(site.retry_after))
+                    self.end_headers()
+                    return
+                if outcome == 'errors':
+                    self.send_error(500)
+                    return
+                
+                body = site.page(self.path.split('?')[0])
+                if body is None:
+                    with site.lock:
+                        site.counts['pages'] -= 1
+                        site.counts['missing'] += 1
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), StandInHandler)
+        server.daemon_threads = True
+        return server
+
+def run_stand_in_server(host='127.0.0.1', port=8765, mapping_file=None, **site_options):
+    """Serve the stand-in site until interrupted, optionally writing a URL mapping for it"""
+    site = StandInSite(**site_options)
+    server = site.make_server(host, port)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    urls = site.urls(base_url)
+    if mapping_file:
+        with open(mapping_file, 'w', encoding='utf-8') as f:
+            json.dump(urls, f, indent=2)
+    
+    print(f"Stand-in site serving {len(urls)} pages at {base_url}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print(f"Served: {site.counts}")
+
+def _run_benchmark_child(workdir, options, results):
+    """One benchmark level in a fresh process, so CPU and peak memory are its own"""
+    import resource
+    os.chdir(workdir)
+    sys.stdout = open(os.devnull, 'w')
+    started = time.perf_counter()
+    try:
+        summary = run_batch_scrape(**options)
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+        raise
+    wall = time.perf_counter() - started
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    results.put({'wall': wall, 'cpu': usage.ru_utime + usage.ru_stime, 'max_rss_kb': usage.ru_maxrss,
+                 'summary': summary})
+
+def run_scaling_benchmark(concurrency_levels=(1, 2, 4, 8), pages=200, champions_dir='champions_clean',
+                          pages_dir=None, latency=0.05, jitter=0.0, error_rate=0.0, throttle_rate=0.0, stream=False):
+    """Run the batch pipeline against the stand-in site at several concurrency levels"""
+    import multiprocessing
+    import shutil
+    import tempfile
+    import threading
+    
+    champions_dir = Path(champions_dir).resolve()
+    base_count = len(list(champions_dir.glob('*.json')))
+    if not base_count:
+        print(f"No champion files in {champions_dir}")
+        return 1
+    
+    site = StandInSite(champions_dir, pages_dir=pages_dir, variants=max(0, -(-pages // base_count) - 1),
+                       latency=latency, jitter=jitter, error_rate=error_rate, throttle_rate=throttle_rate)
+    server = site.make_server('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = dict(list(site.urls(f"http://127.0.0.1:{server.server_address[1]}").items())[:pages])
+    
+    print(f"=== SCALING BENCHMARK: {len(urls)} pages, {latency * 1000:.0f}ms latency, "
+          f"{error_rate:.0%} errors, {throttle_rate:.0%} throttled ===\n")
+    print(f"{'concurrency':>11s} {'pages/s':>8s} {'CPU ms/page':>12s} {'peak MB':>8s} {'updated':>8s} {'wall s':>7s} {'final':>6s}")
+    
+    context = multiprocessing.get_context('spawn')
+    for concurrency in concurrency_levels:
+        with tempfile.TemporaryDirectory() as workdir:
+            work_champions = Path(workdir) / 'champions_clean'
+            work_champions.mkdir()
+            for key in urls:
+                shutil.copyfile(champions_dir / f"{re.sub(r'_v[0-9]+$', '', key)}.json", work_champions / f"{key}.json")
+            with open(Path(workdir) / 'champion_url_mapping.json', 'w', encoding='utf-8') as f:
+                json.dump(urls, f)
+            
+            results = context.Queue()
+            # Derived outputs don't depend on concurrency; leave them out of the timing
+            options = {'concurrency': concurrency, 'delay': 0.0, 'max_error_rate': 1.0, 'stream': stream,
+                       'run_outputs': False}
+            child = context.Process(target=_run_benchmark_child, args=(workdir, options, results))
+            child.start()
+            result = results.get()
+            child.join()
+        
+        if 'error' in result:
+            print(f"{concurrency:>11}  failed: {result['error']}")
+            continue
+        summary = result['summary'] or {}
+        print(f"{concurrency:>11} {len(urls) / result['wall']:8.1f} {result['cpu'] / len(urls) * 1000:12.1f} "
+              f"{result['max_rss_kb'] / 1024:8.1f} {summary.get('updated', 0):8d} {result['wall']:7.1f} "
+              f"{summary.get('concurrency', '-'):>6}")
+    
+    server.shutdown()
+    print(f"\nServed: {site.counts}")
+    return 0
+
+def _concurrency_arg(value):
+    if value == 'auto':
+        return value
+    try:
+        return max(1, int(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+
+def main(argv=None):
+    """Main function - command line entry point"""
+    parser = argparse.ArgumentParser(description="Wild Rift champion scraper")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    scrape_parser = subparsers.add_parser('scrape', help="Refresh every champion once (default)")
+    scrape_parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                               help="Stop writing once this share of validated champions has critical issues")
+    scrape_parser.add_argument('--concurrency', type=_concurrency_arg, default=1,
+                               help="Pages fetched in parallel (default 1), or 'auto' to adapt to the site")
+    scrape_parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                               help="Upper bound for --concurrency auto")
+    scrape_parser.add_argument('--delay', type=float, default=None,
+                               help="Minimum seconds between requests (default: 1.5, none with --concurrency auto)")
+    scrape_parser.add_argument('--mapping', default='champion_url_mapping.json', help="Champion URL mapping file")
+    scrape_parser.add_argument('--champions-dir', default='champions_clean')
+    scrape_parser.add_argument('--cache-dir', default=None, help="Keep raw pages here and reuse them on later runs")
+    scrape_parser.add_argument('--stream', action='store_true',
+                               help="Parse pages as they download and stop once the needed sections are in")
+    scrape_parser.add_argument('--full-extract', action='store_true',
+                               help="Re-extract every page section, ignoring logs/section_fingerprints.json")
+    scrape_parser.add_argument('--bundle', nargs='?', const=BUNDLE_FILE, default=None,
+                               help=f"Also write a packed champion bundle (default path: {BUNDLE_FILE})")
+    
+    schedule_parser = subparsers.add_parser('schedule', help="Run as a priority/staleness-aware refresh daemon")
+    schedule_parser.add_argument('--budget', type=int, default=60, help="Requests per hour to the source site")
+    schedule_parser.add_argument('--max-refreshes', type=int, default=None, help="Stop after this many refreshes")
+    schedule_parser.add_argument('--state-file', default=SCHEDULER_STATE_FILE)
+    schedule_parser.add_argument('--champions-dir', default='champions_clean')
+    schedule_parser.add_argument('--outputs-every', type=int, default=DEFAULT_OUTPUTS_EVERY,
+                                 help="Rebuild aggregates/index/shards/bundles after this many refreshes")
+    schedule_parser.add_argument('--outputs-interval', type=float, default=DEFAULT_OUTPUTS_INTERVAL,
+                                 help="...or after this many seconds, whichever comes first")
+    
+    patch_parser = subparsers.add_parser('patch', help="Re-scrape only what the latest patch notes touched")
+    patch_parser.add_argument('--source', default=None, help="Patch notes URL or saved HTML file (default: latest live)")
+    patch_parser.add_argument('--schedule-only', action='store_true', help="Only queue the champions for the daemon")
+    patch_parser.add_argument('--state-file', default=SCHEDULER_STATE_FILE)
+    patch_parser.add_argument('--champions-dir', default='champions_clean')
+    
+    validate_parser = subparsers.add_parser('validate', help="Validate champion output and write the detailed report")
+    validate_parser.add_argument('--workers', type=int, default=None, help="Parallel worker processes")
+    validate_parser.add_argument('--changed-only', action='store_true', help="Only re-check files changed since the last run")
+    validate_parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                                 help="Exit non-zero when this share of champions has critical issues")
+    validate_parser.add_argument('--champions-dir', default='champions_clean')
+    
+    queue_parser = subparsers.add_parser('queue', help="Distributed mode: shared leased work queue")
+    queue_parser.add_argument('action', choices=['add', 'work', 'collect', 'status'])
+    queue_parser.add_argument('--queue', default=DEFAULT_WORK_QUEUE, help="Queue location, e.g. sqlite://path/queue.db")
+    queue_parser.add_argument('--mapping', default='champion_url_mapping.json')
+    queue_parser.add_argument('--champions-dir', default='champions_clean')
+    queue_parser.add_argument('--namespace', default=None, help="Job id prefix for a mirror, language or snapshot")
+    queue_parser.add_argument('--only', nargs='*', default=None, help="Only queue these champion slugs")
+    queue_parser.add_argument('--worker-id', default=None)
+    queue_parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS)
+    queue_parser.add_argument('--rate-per-minute', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                              help="Global request rate shared by all workers")
+    queue_parser.add_argument('--forever', action='store_true', help="Keep polling when the queue is empty")
+    
+    aggregate_parser = subparsers.add_parser('aggregate', help="Recompute the precomputed aggregate JSON files")
+    aggregate_parser.add_argument('--champions-dir', default='champions_clean')
+    aggregate_parser.add_argument('--output-dir', default=AGGREGATES_DIR)
+    
+    search_parser = subparsers.add_parser('search-index', help="Rebuild the full-text search index")
+    search_parser.add_argument('--champions-dir', default='champions_clean')
+    search_parser.add_argument('--only', nargs='*', default=None, help="Only re-index these champion slugs")
+    search_parser.add_argument('--query', default=None, help="Run a test query against the index")
+    
+    history_parser = subparsers.add_parser('history', help="Snapshot history of champion data")
+    history_parser.add_argument('action', choices=['snapshot', 'list', 'show'])
+    history_parser.add_argument('slug', nargs='?', help="Champion slug for show")
+    history_parser.add_argument('--champions-dir', default='champions_clean')
+    history_parser.add_argument('--history-dir', default=HISTORY_DIR)
+    history_parser.add_argument('--run', default=None, help="Run id for show")
+    history_parser.add_argument('--patch', default=None, help="Patch version for show/snapshot")
+    history_parser.add_argument('--patches-ago', type=int, default=None, help="For show: N patches before the latest")
+    
+    totals_parser = subparsers.add_parser('totals', help="Recompute the stored per-build totals")
+    totals_parser.add_argument('--champions-dir', default='champions_clean')
+    
+    shards_parser = subparsers.add_parser('shards', help="Rewrite the per-section champion shards")
+    shards_parser.add_argument('--champions-dir', default='champions_clean')
+    shards_parser.add_argument('--shards-dir', default=SHARDS_DIR)
+    shards_parser.add_argument('--only', nargs='*', default=None, help="Only re-shard these champion slugs")
+    
+    bundle_parser = subparsers.add_parser('bundle', help="Write or read the packed champion bundle")
+    bundle_parser.add_argument('action', choices=['write', 'list', 'show'])
+    bundle_parser.add_argument('slug', nargs='?', help="Champion slug for show")
+    bundle_parser.add_argument('--champions-dir', default='champions_clean')
+    bundle_parser.add_argument('--bundle', default=BUNDLE_FILE)
+    
+    locale_parser = subparsers.add_parser('locale-bundles', help="Rewrite the per-locale champion bundles")
+    locale_parser.add_argument('--champions-dir', default='champions_clean')
+    locale_parser.add_argument('--locales-dir', default=LOCALES_DIR)
+    locale_parser.add_argument('--output-dir', default=LOCALE_BUNDLES_DIR)
+    locale_parser.add_argument('--only', nargs='*', default=None, help="Only re-encode these champion slugs")
+    
+    fuzz_parser = subparsers.add_parser('fuzz', help="Time the extractors on malformed copies of saved pages")
+    fuzz_parser.add_argument('pages', nargs='+', help="Saved champion pages (.html) to mutate")
+    fuzz_parser.add_argument('--iterations', type=int, default=100)
+    fuzz_parser.add_argument('--seed', type=int, default=0)
+    fuzz_parser.add_argument('--size', type=int, default=20000, help="Largest injected payload in characters")
+    fuzz_parser.add_argument('--max-seconds', type=float, default=None,
+                             help="Fail if any page takes longer (default: sum of extractor budgets)")
+    
+    serve_parser = subparsers.add_parser('serve', help="Run a local wr-meta stand-in site for offline testing")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--champions-dir', default='champions_clean', help="Pages are rendered from these files")
+    serve_parser.add_argument('--pages-dir', default=None, help="Serve recorded <slug>.html pages from here instead")
+    serve_parser.add_argument('--variants', type=int, default=0, help="Synthesized variant pages per champion")
+    serve_parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    serve_parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra random seconds")
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with 500")
+    serve_parser.add_argument('--throttle-rate', type=float, default=0.0, help="Share answered with 429")
+    serve_parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    serve_parser.add_argument('--write-mapping', default=None, help="Write a URL mapping file for the served pages")
+    
+    bench_parser = subparsers.add_parser('bench', help="Benchmark the batch pipeline against the stand-in site")
+    bench_parser.add_argument('--concurrency', type=_concurrency_arg, nargs='+', default=[1, 2, 4, 8, 'auto'])
+    bench_parser.add_argument('--pages', type=int, default=200)
+    bench_parser.add_argument('--champions-dir', default='champions_clean')
+    bench_parser.add_argument('--pages-dir', default=None)
+    bench_parser.add_argument('--latency', type=float, default=0.05)
+    bench_parser.add_argument('--jitter', type=float, default=0.0)
+    bench_parser.add_argument('--error-rate', type=float, default=0.0)
+    bench_parser.add_argument('--throttle-rate', type=float, default=0.0)
+    bench_parser.add_argument('--stream', action='store_true', help="Benchmark the streaming parse mode")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'schedule':
+        run_refresh_scheduler(budget_per_hour=args.budget, max_refreshes=args.max_refreshes,
+                              champions_dir=args.champions_dir, state_file=args.state_file,
+                              outputs_every=args.outputs_every, outputs_interval=args.outputs_interval)
+    elif args.command == 'patch':
+        run_patch_refresh(source=args.source, schedule_only=args.schedule_only, champions_dir=args.champions_dir,
+                          state_file=args.state_file)
+    elif args.command == 'queue':
+        run_queue_command(args.action, args.queue, mapping=args.mapping, champions_dir=args.champions_dir,
+                          namespace=args.namespace, slugs=args.only, worker_id=args.worker_id,
+                          lease_seconds=args.lease_seconds, rate_per_minute=args.rate_per_minute,
+                          forever=args.forever)
+    elif args.command == 'aggregate':
+        write_aggregates(args.champions_dir, args.output_dir)
+    elif args.command == 'search-index':
+        index = update_search_index(args.champions_dir, changed_slugs=args.only)
+        if args.query:
+            for doc_type, slug, name, score in search_index_lookup(index, args.query):
+                print(f"  {score:5d}  {doc_type:8s} {name}")
+    elif args.command == 'history':
+        if args.action == 'snapshot':
+            record_snapshot_run(args.champions_dir, patch=args.patch, history_dir=args.history_dir)
+        elif args.action == 'list':
+            for run in load_history_index(args.history_dir)['runs']:
+                print(f"{run['run']}  patch {run['patch'] or '?':8s} {len(run['changed'])} changed")
+        else:
+            if not args.slug:
+                parser.error("history show needs a champion slug")
+            snapshot = load_snapshot(args.slug, run=args.run, patch=args.patch, patches_ago=args.patches_ago,
+                                     history_dir=args.history_dir)
+            if snapshot is None:
+                print(f"No snapshot of {args.slug} for that run")
+                return 1
+            print(json.dumps(snapshot, indent=2, ensure_ascii=False))
+    elif args.command == 'totals':
+        refresh_build_totals(args.champions_dir)
+    elif args.command == 'shards':
+        update_champion_shards(args.champions_dir, changed_slugs=args.only, shards_dir=args.shards_dir)
+    elif args.command == 'bundle':
+        if args.action == 'write':
+            write_champion_bundle(args.champions_dir, args.bundle)
+            return 0
+        with ChampionBundle(args.bundle) as bundle:
+            if args.action == 'list':
+                for slug, encoded in bundle.iter_raw():
+                    print(f"{slug:24s} {len(encoded):7d} bytes")
+            elif not args.slug or args.slug not in bundle:
+                parser.error("bundle show needs a champion slug from the bundle")
+            else:
+                print(json.dumps(bundle[args.slug], indent=2, ensure_ascii=False))
+    elif args.command == 'locale-bundles':
+        write_locale_bundles(args.champions_dir, args.locales_dir, args.output_dir, changed_slugs=args.only)
+    elif args.command == 'fuzz':
+        return run_extraction_fuzz(args.pages, iterations=args.iterations, seed=args.seed, size=args.size,
+                                   max_seconds=args.max_seconds)
+    elif args.command == 'serve':
+        run_stand_in_server(args.host, args.port, mapping_file=args.write_mapping,
+                            champions_dir=args.champions_dir, pages_dir=args.pages_dir, variants=args.variants,
+                            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    elif args.command == 'bench':
+        return run_scaling_benchmark(args.concurrency, pages=args.pages, champions_dir=args.champions_dir,
+                                     pages_dir=args.pages_dir, latency=args.latency, jitter=args.jitter,
+                                     error_rate=args.error_rate, throttle_rate=args.throttle_rate, stream=args.stream)
+    elif args.command == 'validate':
+        return run_validation(champions_dir=args.champions_dir, workers=args.workers,
+                              changed_only=args.changed_only, max_error_rate=args.max_error_rate)
+    elif args.command == 'scrape':
+        run_batch_scrape(max_error_rate=args.max_error_rate, mapping_file=args.mapping,
+                         champions_dir=args.champions_dir, concurrency=args.concurrency,
+                         delay=args.delay, cache_dir=args.cache_dir, incremental=not args.full_extract,
+                         max_concurrency=args.max_concurrency, stream=args.stream, bundle_file=args.bundle)
+    else:
+        run_batch_scrape()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file